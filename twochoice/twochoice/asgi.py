@@ -3,6 +3,11 @@ ASGI config for twochoice project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The notification SSE stream (``/notifications/stream/``) needs this entry point,
+e.g. ``gunicorn twochoice.asgi:application -k uvicorn_worker.UvicornWorker``
+(uvicorn, uvicorn-worker and, for NOTIFICATION_EVENTS_BACKEND='redis', redis
+are pinned in requirements.txt).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -191,6 +191,30 @@ LOGOUT_REDIRECT_URL = 'home'
 
 FEATURE_POLL_STATUS_BADGE = os.environ.get('FEATURE_POLL_STATUS_BADGE', 'True').lower() in ('1', 'true', 'yes', 'y', 'on')
 
+# Oy yazımı: 'sync' (istek içinde) veya 'buffered' (arka planda toplu yazım, bkz. twochoice_app/vote_ingest.py)
+VOTE_INGESTION_MODE = os.environ.get('VOTE_INGESTION_MODE', 'sync').strip().lower()
+VOTE_BUFFER_BATCH_SIZE = int(os.environ.get('VOTE_BUFFER_BATCH_SIZE', '200'))
+VOTE_BUFFER_FLUSH_INTERVAL = float(os.environ.get('VOTE_BUFFER_FLUSH_INTERVAL', '1.0'))
+VOTE_BUFFER_MAX_PENDING = int(os.environ.get('VOTE_BUFFER_MAX_PENDING', '10000'))
+
+# Moderatörlere toplu bildirim: 'async' (commit sonrası arka planda) veya 'sync' (bkz. twochoice_app/notification_fanout.py)
+NOTIFICATION_FANOUT_MODE = os.environ.get('NOTIFICATION_FANOUT_MODE', 'async').strip().lower()
+NOTIFICATION_FANOUT_WORKERS = int(os.environ.get('NOTIFICATION_FANOUT_WORKERS', '2'))
+
+# Bildirimler SSE ile itilir (navbar polling'i kapanır). Uzun bağlantılar için uygulama
+# ASGI ile servis edilmelidir, ör: gunicorn twochoice.asgi:application -k uvicorn_worker.UvicornWorker
+NOTIFICATION_STREAM_ENABLED = os.environ.get('NOTIFICATION_STREAM_ENABLED', 'False').lower() in ('1', 'true', 'yes', 'y', 'on')
+# Olay dağıtımı: 'memory' (tek süreç) veya 'redis' (çok worker, REDIS_URL gerekir)
+NOTIFICATION_EVENTS_BACKEND = os.environ.get('NOTIFICATION_EVENTS_BACKEND', 'redis' if REDIS_URL else 'memory').strip().lower()
+
+# `manage.py compact_notifications` (periyodik): okunmuş oy/yorum bildirimleri bu kadar günden sonra
+# gruplarına katlanır, tüm bildirimler saklama süresi dolunca silinir
+NOTIFICATION_COMPACT_AFTER_DAYS = int(os.environ.get('NOTIFICATION_COMPACT_AFTER_DAYS', '30'))
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '180'))
+
+# Story kartları bu kadar süreçlik havuzda çizilir; 0 ise istek içinde (bkz. twochoice_app/story_card_cache.py)
+STORY_CARD_RENDER_WORKERS = int(os.environ.get('STORY_CARD_RENDER_WORKERS', '2'))
+
 # Email Settings
 RESEND_API_KEY = os.environ.get('RESEND_API_KEY', '').strip()
 
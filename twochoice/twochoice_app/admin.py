@@ -5,7 +5,12 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.db.models import Count, Q
-from .models import UserProfile, Post, PostImage, PollOption, PollVote, Comment, Report, Notification, Feedback, FeedbackMessage, ModerationLog
+from .models import UserProfile, Post, PostImage, PollOption, PollVote, Comment, Report, Notification, Feedback, FeedbackMessage, ModerationLog, Hashtag, ModerationWord
+from .ranking import refresh_scores
+from .user_stats import refresh_user_stats
+from .search_index import reindex_posts
+from .hashtags import sync_hashtags_for_posts
+from . import feed_cache, live_results
 
 
 class UserProfileInline(admin.StackedInline):
@@ -38,6 +43,7 @@ class PostImageInline(admin.TabularInline):
 class PollOptionInline(admin.TabularInline):
     model = PollOption
     extra = 2
+    readonly_fields = ['vote_count']
 
 
 @admin.register(Post)
@@ -92,8 +98,7 @@ class PostAdmin(admin.ModelAdmin):
     def vote_count_display(self, obj):
         if obj.post_type == 'comment_only':
             return '-'
-        count = obj.votes.count()
-        return format_html('<strong>{}</strong> oy', count)
+        return format_html('<strong>{}</strong> oy', obj.vote_count)
     vote_count_display.short_description = 'Oy Sayısı'
     
     def comment_count_display(self, obj):
@@ -110,23 +115,41 @@ class PostAdmin(admin.ModelAdmin):
         return '-'
     view_on_site_link.short_description = 'Site Linki'
     
+    def _sync_derived_data(self, post_ids):
+        # queryset.update() sinyal tetiklemez; skor, arama index'i, hashtag, akış cache'i, tally sürümleri ve yazar istatistiklerini elle eşitle
+        refresh_scores(post_ids=post_ids)
+        reindex_posts(post_ids)
+        sync_hashtags_for_posts(post_ids)
+        feed_cache.bump()
+        for post_id in post_ids:
+            live_results.bump(post_id)
+        refresh_user_stats(user_ids=set(Post.objects.filter(pk__in=post_ids).values_list('author_id', flat=True)))
+
     def approve_posts(self, request, queryset):
+        post_ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(status='p', moderated_by=request.user)
+        self._sync_derived_data(post_ids)
         self.message_user(request, f'{updated} gönderi onaylandı.')
     approve_posts.short_description = 'Seçili gönderileri onayla'
     
     def reject_posts(self, request, queryset):
+        post_ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(status='r', moderated_by=request.user)
+        self._sync_derived_data(post_ids)
         self.message_user(request, f'{updated} gönderi reddedildi.')
     reject_posts.short_description = 'Seçili gönderileri reddet'
     
     def soft_delete_posts(self, request, queryset):
+        post_ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(is_deleted=True)
+        self._sync_derived_data(post_ids)
         self.message_user(request, f'{updated} gönderi silindi (soft delete).')
     soft_delete_posts.short_description = 'Seçili gönderileri sil (geri alınabilir)'
     
     def restore_posts(self, request, queryset):
+        post_ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(is_deleted=False)
+        self._sync_derived_data(post_ids)
         self.message_user(request, f'{updated} gönderi geri yüklendi.')
     restore_posts.short_description = 'Seçili gönderileri geri yükle'
 
@@ -160,7 +183,22 @@ class PollOptionAdmin(admin.ModelAdmin):
     list_display = ['option_text', 'post', 'vote_count', 'created_at']
     list_filter = ['created_at']
     search_fields = ['option_text', 'post__title']
-    readonly_fields = ['created_at']
+    readonly_fields = ['vote_count', 'created_at']
+
+
+@admin.register(Hashtag)
+class HashtagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'post_count', 'created_at']
+    search_fields = ['name']
+    readonly_fields = ['post_count', 'created_at']
+
+
+@admin.register(ModerationWord)
+class ModerationWordAdmin(admin.ModelAdmin):
+    list_display = ['word', 'kind', 'is_active', 'updated_at']
+    list_filter = ['kind', 'is_active']
+    search_fields = ['word']
+    readonly_fields = ['created_at', 'updated_at']
 
 
 @admin.register(PollVote)
@@ -195,11 +233,17 @@ class CommentAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['user', 'actor', 'verb', 'post', 'feedback', 'is_read', 'created_at']
-    list_filter = ['is_read', 'created_at']
-    search_fields = ['user__username', 'actor__username', 'verb', 'post__title']
+    list_display = ['user', 'actor', 'kind', 'message_display', 'post', 'feedback', 'is_read', 'created_at']
+    list_filter = ['kind', 'is_read', 'created_at']
+    search_fields = ['user__username', 'actor__username', 'post__title', 'feedback__subject']
+    list_select_related = ['user', 'actor', 'post', 'feedback']
     readonly_fields = ['created_at']
 
+    def message_display(self, obj):
+        # verb şablonlu bildirimlerde boştur; metin şablondan üretilir
+        return obj.message
+    message_display.short_description = 'Mesaj'
+
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
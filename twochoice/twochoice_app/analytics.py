@@ -14,13 +14,13 @@ def get_poll_analytics(post):
     """Get comprehensive analytics for a poll"""
     
     # Basic stats
-    total_votes = post.votes.count()
+    total_votes = post.vote_count
     total_comments = post.comments.filter(is_deleted=False).count()
     
     # Vote distribution by option
     vote_distribution = []
     for option in post.poll_options.all():
-        vote_count = option.votes.count()
+        vote_count = option.vote_count
         percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
         vote_distribution.append({
             'option': option.option_text,
@@ -117,9 +117,7 @@ def get_user_analytics(user):
     avg_votes = total_votes / total_posts if total_posts > 0 else 0
     
     # Most popular post
-    most_popular = posts.annotate(
-        vote_count=Count('votes')
-    ).order_by('-vote_count').first()
+    most_popular = posts.order_by('-vote_count').first()
     
     # Most commented post
     most_commented = posts.annotate(
@@ -2,6 +2,7 @@
 
 from django.core.cache import cache
 from django.conf import settings
+from django.db.models import F
 from functools import wraps
 import hashlib
 import json
@@ -83,7 +84,6 @@ def invalidate_cache_pattern(pattern):
 def cache_trending_posts(limit=10, timeout=CACHE_TIMEOUT_MEDIUM):
     """Cache trending posts"""
     from .models import Post
-    from django.db.models import Count
     
     cache_key = f"trending_posts:{limit}"
     posts = cache.get(cache_key)
@@ -92,9 +92,7 @@ def cache_trending_posts(limit=10, timeout=CACHE_TIMEOUT_MEDIUM):
         posts = list(Post.objects.filter(
             status='p',
             is_deleted=False
-        ).annotate(
-            vote_count=Count('votes')
-        ).order_by('-vote_count', '-created_at')[:limit])
+        ).order_by(F('score__hot_score').desc(nulls_last=True), '-created_at')[:limit])
         
         cache.set(cache_key, posts, timeout)
     
@@ -9,3 +9,33 @@ VOTE_RATE_LIMIT_SECONDS = 0.5
 TREND_CUTOFF_HOURS = 24
 
 POSTS_PER_PAGE = 20
+
+FEED_CACHE_TIMEOUT = 300
+
+# Moderasyon kelime listesinin sürümü her worker'da en fazla bu aralıkla kontrol edilir
+MODERATION_RELOAD_INTERVAL = 30
+
+# Okunmamış bildirim sayısı; her yazım/okuma cache'i sildiği için kısa tutulması gerekmez
+NOTIFICATION_COUNT_CACHE_TIMEOUT = 300
+
+# Canlı anket sonuçları: anket başına en fazla tick'te bir hesaplama, istemci aralığı
+LIVE_RESULTS_TICK = 2
+# Sürüm anahtarı süreli tutulur (rastgele pk'lar cache'i doldurmasın); snapshot ondan uzun yaşar
+LIVE_RESULTS_VERSION_TIMEOUT = 3600
+LIVE_RESULTS_SNAPSHOT_TIMEOUT = 7200
+LIVE_RESULTS_POLL_SECONDS = 5
+
+# Toplu paylaşım verisi isteğinde en fazla gönderi sayısı
+SHARE_DATA_BATCH_LIMIT = 50
+
+# Landing/ana sayfa genel sayıları: bu süreden eski snapshot bir istekte yenilenir
+SITE_STATS_MAX_AGE = 300
+SITE_STATS_TIMEOUT = 86400
+
+# Story kartları tally sürümüyle anahtarlandığı için uzun tutulabilir
+STORY_CARD_CACHE_TIMEOUT = 3600
+STORY_CARD_RENDER_TIMEOUT = 10
+
+# Embed gövdeleri tally sürümüyle anahtarlanır; max-age paylaşımlı cache'lerin (CDN) tutma süresi
+EMBED_CACHE_TIMEOUT = 3600
+EMBED_MAX_AGE = 60
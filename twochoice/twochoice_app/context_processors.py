@@ -1,6 +1,5 @@
 from django.conf import settings
-from django.core.cache import cache
-from .models import Notification
+from .notification_groups import unread_count
 
 
 def notifications_unread_count(request):
@@ -18,11 +17,8 @@ def notifications_unread_count(request):
         }
 
     return {
-        'notifications_unread_count': cache.get_or_set(
-            f'notifications:unread_count:{request.user.id}',
-            lambda: Notification.objects.filter(user=request.user, is_read=False).count(),
-            10,
-        ),
+        'notifications_unread_count': unread_count(request.user.id),
+        'notification_stream_enabled': getattr(settings, 'NOTIFICATION_STREAM_ENABLED', False),
         'show_welcome_popup': bool(request.session.pop('show_welcome_popup', False)),
         'feature_poll_status_badge': getattr(settings, 'FEATURE_POLL_STATUS_BADGE', False),
     }
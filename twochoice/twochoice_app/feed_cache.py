@@ -0,0 +1,81 @@
+"""
+Home feed fragment cache
+
+Her (sıralama, konu) ikilisinin bir nesil sayacı vardır; yayınlama, oy ve yorum
+olayları ilgili sayaçları artırır. Render edilmiş `post_list.html` parçası nesil
+numarasıyla birlikte anahtarlandığı için eski parçalar silinmeden geçersiz olur.
+Parça kullanıcıya özel bir şey içermez; giriş yapmış kullanıcının seçtiği
+seçenekler ayrıca (tek sorgu ile) döndürülür ve istemci tarafında işaretlenir.
+"""
+import time
+
+from django.core.cache import cache
+
+from .constants import FEED_CACHE_TIMEOUT
+from .models import Post, PollVote
+
+FEED_SORTS = ('new', 'popular', 'trend')
+
+
+def _generation_key(sort, topic):
+    return f"feed_gen:{sort}:{topic or 'all'}"
+
+
+def get_generation(sort, topic=''):
+    key = _generation_key(sort, topic)
+    generation = cache.get(key)
+    if generation is None:
+        # Sayaç cache'ten düşerse eski parçalarla çakışmaması için zamandan başlat
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key, 0)
+    return generation
+
+
+def bump(topic=None, sorts=FEED_SORTS):
+    """Invalidate cached fragments of ``sorts`` for ``topic`` and the all-topics feed.
+
+    ``topic=None`` bumps every topic.
+    """
+    topics = [''] + ([topic] if topic else [code for code, _ in Post.TOPIC_CHOICES])
+    for sort in sorts:
+        for scope in topics:
+            key = _generation_key(sort, scope)
+            try:
+                cache.incr(key)
+            except ValueError:
+                get_generation(sort, scope)
+
+
+def bump_for_post(post, sorts=FEED_SORTS):
+    bump(topic=post.topic or None, sorts=sorts)
+
+
+def fragment_key(sort, topic, cursor, authenticated):
+    generation = get_generation(sort, topic)
+    audience = 'auth' if authenticated else 'anon'
+    return f"feed_fragment:{sort}:{topic or 'all'}:{cursor or 'first'}:{audience}:g{generation}"
+
+
+def get_fragment(key):
+    return cache.get(key)
+
+
+def set_fragment(key, html, post_ids, next_cursor):
+    fragment = {
+        'html': str(html),
+        'post_ids': list(post_ids),
+        'next_cursor': next_cursor,
+    }
+    cache.set(key, fragment, timeout=FEED_CACHE_TIMEOUT)
+    return fragment
+
+
+def selected_option_ids(user, post_ids):
+    """Per-user overlay: the option ids ``user`` voted for among ``post_ids``."""
+    if not post_ids or not getattr(user, 'is_authenticated', False):
+        return []
+    return list(
+        PollVote.objects.filter(user=user, post_id__in=post_ids)
+        .order_by('option_id')
+        .values_list('option_id', flat=True)
+    )
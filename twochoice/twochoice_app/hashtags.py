@@ -2,8 +2,14 @@
 Hashtag System
 """
 import re
-from django.db.models import Count
-from .models import Post
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import Hashtag, HashtagDailyCount, Post, PostHashtag
+from .text_normalize import turkish_lower
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +24,7 @@ def extract_hashtags(text):
     hashtags = re.findall(r'#(\w+)', text)
     
     # Convert to lowercase and remove duplicates
-    hashtags = list(set([tag.lower() for tag in hashtags]))
+    hashtags = list(set([turkish_lower(tag) for tag in hashtags]))
     
     return hashtags
 
@@ -35,77 +41,112 @@ def linkify_hashtags(text):
     return re.sub(r'#(\w+)', replace_hashtag, text)
 
 
+def _bump_daily_counts(hashtag_ids, day, delta):
+    if not hashtag_ids:
+        return
+    if delta > 0:
+        HashtagDailyCount.objects.bulk_create(
+            [HashtagDailyCount(hashtag_id=hashtag_id, day=day) for hashtag_id in hashtag_ids],
+            ignore_conflicts=True,
+        )
+    HashtagDailyCount.objects.filter(hashtag_id__in=hashtag_ids, day=day).update(
+        count=Greatest(F('count') + delta, Value(0))
+    )
+
+
+def sync_post_hashtags(post):
+    """Bring the post's PostHashtag links and the counters in line with its text.
+
+    Only published, non-deleted posts are linked, so unpublishing removes them.
+    """
+    wanted = set()
+    if post.status == 'p' and not post.is_deleted:
+        wanted = {tag[:100] for tag in extract_hashtags(f"{post.title} {post.content}")}
+
+    existing = {
+        link.hashtag.name: link
+        for link in PostHashtag.objects.filter(post_id=post.id).select_related('hashtag')
+    }
+    added = wanted - existing.keys()
+    removed = [existing[name] for name in existing.keys() - wanted]
+    if not added and not removed:
+        return
+
+    with transaction.atomic():
+        if added:
+            Hashtag.objects.bulk_create([Hashtag(name=name) for name in added], ignore_conflicts=True)
+            hashtag_ids = list(Hashtag.objects.filter(name__in=added).values_list('id', flat=True))
+            today = timezone.localdate()
+            PostHashtag.objects.bulk_create(
+                [PostHashtag(post_id=post.id, hashtag_id=hashtag_id, day=today) for hashtag_id in hashtag_ids],
+                ignore_conflicts=True,
+            )
+            Hashtag.objects.filter(id__in=hashtag_ids).update(post_count=F('post_count') + 1)
+            _bump_daily_counts(hashtag_ids, today, 1)
+
+        if removed:
+            PostHashtag.objects.filter(id__in=[link.id for link in removed]).delete()
+            Hashtag.objects.filter(id__in=[link.hashtag_id for link in removed]).update(
+                post_count=Greatest(F('post_count') - 1, Value(0))
+            )
+            by_day = defaultdict(list)
+            for link in removed:
+                by_day[link.day].append(link.hashtag_id)
+            for day, hashtag_ids in by_day.items():
+                _bump_daily_counts(hashtag_ids, day, -1)
+
+
+def sync_hashtags_for_posts(post_ids):
+    """Sync hashtag links after bulk updates that bypass post_save."""
+    for post in Post.objects.filter(pk__in=post_ids):
+        sync_post_hashtags(post)
+
+
 def get_trending_hashtags(limit=10):
-    """Get trending hashtags"""
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    # Get posts from last 7 days
-    week_ago = timezone.now() - timedelta(days=7)
-    
-    recent_posts = Post.objects.filter(
-        status='p',
-        is_deleted=False,
-        created_at__gte=week_ago
-    ).values_list('title', 'content')
-    
-    # Count hashtags
-    hashtag_counts = {}
-    for title, content in recent_posts:
-        text = f"{title} {content}"
-        hashtags = extract_hashtags(text)
-        
-        for tag in hashtags:
-            hashtag_counts[tag] = hashtag_counts.get(tag, 0) + 1
-    
-    # Sort by count and return top N
-    trending = sorted(hashtag_counts.items(), key=lambda x: x[1], reverse=True)[:limit]
-    
-    return [{'tag': tag, 'count': count} for tag, count in trending]
+    """Get trending hashtags (last 7 days, from the daily count buckets)"""
+    since = timezone.localdate() - timedelta(days=7)
+
+    trending = (
+        HashtagDailyCount.objects.filter(day__gte=since)
+        .values('hashtag__name')
+        .annotate(total=Sum('count'))
+        .filter(total__gt=0)
+        .order_by('-total', 'hashtag__name')[:limit]
+    )
+
+    return [{'tag': row['hashtag__name'], 'count': row['total']} for row in trending]
 
 
 def get_related_hashtags(hashtag, limit=5):
-    """Get related hashtags"""
-    # Find posts with this hashtag
-    posts = Post.objects.filter(
-        status='p',
-        is_deleted=False
-    ).filter(
-        models.Q(title__icontains=f'#{hashtag}') | 
-        models.Q(content__icontains=f'#{hashtag}')
+    """Get related hashtags (most frequent co-occurring tags)"""
+    name = turkish_lower(hashtag.lstrip('#'))
+
+    related = (
+        PostHashtag.objects.filter(post__hashtag_links__hashtag__name=name)
+        .exclude(hashtag__name=name)
+        .values('hashtag__name')
+        .annotate(together=Count('post', distinct=True))
+        .order_by('-together', 'hashtag__name')[:limit]
     )
-    
-    # Extract all hashtags from these posts
-    all_hashtags = {}
-    for post in posts:
-        text = f"{post.title} {post.content}"
-        tags = extract_hashtags(text)
-        
-        for tag in tags:
-            if tag != hashtag.lower():
-                all_hashtags[tag] = all_hashtags.get(tag, 0) + 1
-    
-    # Sort and return top N
-    related = sorted(all_hashtags.items(), key=lambda x: x[1], reverse=True)[:limit]
-    
-    return [tag for tag, count in related]
+
+    return [row['hashtag__name'] for row in related]
+
+
+def filter_by_hashtag(queryset, hashtag):
+    """Restrict a Post queryset to posts tagged with ``hashtag``."""
+    name = turkish_lower(hashtag.lstrip('#'))
+    return queryset.filter(hashtag_links__hashtag__name=name)
 
 
 def search_by_hashtag(hashtag):
     """Search posts by hashtag"""
-    from django.db import models
-    
-    return Post.objects.filter(
-        status='p',
-        is_deleted=False
-    ).filter(
-        models.Q(title__icontains=f'#{hashtag}') | 
-        models.Q(content__icontains=f'#{hashtag}')
+    return filter_by_hashtag(
+        Post.objects.filter(status='p', is_deleted=False),
+        hashtag
     ).select_related(
         'author',
         'author__profile'
     ).prefetch_related(
-        'poll_options__votes',
         'images',
         'comments'
     ).order_by('-created_at')
@@ -0,0 +1,167 @@
+"""
+Live poll results
+
+post_detail ve embed sayfaları açık anketlerin sonuçlarını `poll_results_api`
+üzerinden periyodik olarak (If-None-Match ile) sorar. Her anketin bir tally
+sürümü vardır; oy yazımı sürümü artırır. Sonuçlar sürümle birlikte cache'te
+tek bir snapshot olarak tutulur ve anket başına en fazla LIVE_RESULTS_TICK
+saniyede bir yeniden hesaplanır; aynı tick içindeki oylar tek hesaplamada
+birleşir, izleyici sayısı ne olursa olsun diğer istekler snapshot'tan (ya da
+304 ile) cevaplanır. Snapshot hiç yokken de hesaplamayı kilidi alan tek istek
+yapar; diğerleri kısa süre onun sonucunu bekler. Snapshot bir önceki sayıları da tutar; istemci elindeki
+sürümü ``since`` ile gönderirse sadece değişen seçenekler döner.
+Toplu okumalar (bkz. posts_share_data_api) taze snapshot'ları tek seferde
+cache'ten alır, eskimiş olanları kendi yükledikleri satırlarla yeniler.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .constants import LIVE_RESULTS_SNAPSHOT_TIMEOUT, LIVE_RESULTS_TICK, LIVE_RESULTS_VERSION_TIMEOUT
+from .models import Post, PollOption
+
+
+def _version_key(post_id):
+    return f"poll_tally:v:{post_id}"
+
+
+def _snapshot_key(post_id):
+    return f"poll_tally:snapshot:{post_id}"
+
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+def tick_seconds():
+    return float(getattr(settings, 'LIVE_RESULTS_TICK', LIVE_RESULTS_TICK))
+
+
+def tally_version(post_id):
+    key = _version_key(post_id)
+    version = cache.get(key)
+    if version is None:
+        # Sayaç cache'ten düşerse eski snapshot'larla çakışmaması için zamandan başlat
+        cache.add(key, int(time.time() * 1000), timeout=LIVE_RESULTS_VERSION_TIMEOUT)
+        version = cache.get(key, 0)
+    return version
+
+
+def bump(post_id):
+    """Mark ``post_id``'s results as changed; the next tick recomputes them."""
+    key = _version_key(post_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        tally_version(post_id)
+
+
+def _aggregate(post_id, version, previous):
+    post = Post.objects.filter(pk=post_id).values('status', 'is_deleted', 'post_type').first()
+    if post is None or post['post_type'] == 'comment_only':
+        return None
+
+    counts = dict(PollOption.objects.filter(post_id=post_id).order_by('id').values_list('id', 'vote_count'))
+    return _build(version, post['status'] == 'p' and not post['is_deleted'], counts, previous)
+
+
+def _build(version, public, counts, previous):
+    return {
+        'v': version,
+        'at': time.time(),
+        'public': public,
+        # Post.vote_count seçenek sayaçlarının toplamıdır (bkz. apply_vote_change)
+        'total': sum(counts.values()),
+        'counts': counts,
+        'prev': {'v': previous['v'], 'counts': previous['counts']} if previous else None,
+    }
+
+
+def _is_fresh(snap, version):
+    return snap['v'] == version or time.time() - snap['at'] < tick_seconds()
+
+
+def _wait_for(key):
+    # Kilit sahibinin snapshot'ı yazmasını en fazla bir tick bekle
+    deadline = time.monotonic() + tick_seconds()
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        snap = cache.get(key)
+        if snap is not None or cache.get(f"{key}:lock") is None:
+            return snap
+    return None
+
+
+def snapshot(post_id):
+    """Current results of ``post_id`` (or ``None`` if it is not a poll), recomputed at most once per tick."""
+    key = _snapshot_key(post_id)
+    current = cache.get(key)
+    if current is not None and _is_fresh(current, tally_version(post_id)):
+        return current
+
+    # Tick başına tek hesaplama; kilidi alamayan istek eski snapshot'ı döndürür,
+    # snapshot hiç yoksa kilit sahibinin sonucunu bekler
+    if not cache.add(f"{key}:lock", 1, timeout=max(int(tick_seconds()), 1)):
+        if current is not None:
+            return current
+        current = _wait_for(key)
+        if current is not None:
+            return current
+
+    missing = current is None
+    result = _aggregate(post_id, tally_version(post_id), current)
+    if result is not None:
+        cache.set(key, result, timeout=LIVE_RESULTS_SNAPSHOT_TIMEOUT)
+    if missing:
+        # İlk hesaplamanın kilidi sadece eşzamanlı istekleri birleştirir, tick'i kısıtlamaz
+        cache.delete(f"{key}:lock")
+    return result
+
+
+def cached_snapshots(post_ids):
+    """
+    Batch lookup without queries: ``(fresh, versions)`` where ``fresh`` maps post
+    ids to snapshots still valid under the same rule as ``snapshot()`` and
+    ``versions`` holds every post's tally version, read before the caller loads rows.
+    """
+    stored = cache.get_many([_version_key(post_id) for post_id in post_ids])
+    versions = {
+        post_id: stored[_version_key(post_id)] if _version_key(post_id) in stored else tally_version(post_id)
+        for post_id in post_ids
+    }
+    snaps = cache.get_many([_snapshot_key(post_id) for post_id in post_ids])
+    fresh = {}
+    for post_id in post_ids:
+        snap = snaps.get(_snapshot_key(post_id))
+        if snap is not None and _is_fresh(snap, versions[post_id]):
+            fresh[post_id] = snap
+    return fresh, versions
+
+
+def prime(rows, versions):
+    """Cache snapshots for rows the caller already loaded; ``rows`` maps post_id -> (public, counts)."""
+    previous = cache.get_many([_snapshot_key(post_id) for post_id in rows])
+    cache.set_many({
+        _snapshot_key(post_id): _build(versions[post_id], public, counts, previous.get(_snapshot_key(post_id)))
+        for post_id, (public, counts) in rows.items()
+    }, timeout=LIVE_RESULTS_SNAPSHOT_TIMEOUT)
+
+
+def etag(post_id, snap):
+    return f'"{post_id}-{snap["v"]}"'
+
+
+def payload(snap, since=None):
+    """Compact JSON body; only the changed options if ``since`` is the previous version."""
+    data = {'v': snap['v'], 'total': snap['total']}
+    previous = snap['prev']
+    if since and previous and str(previous['v']) == str(since):
+        data['delta'] = True
+        data['counts'] = {
+            option_id: count
+            for option_id, count in snap['counts'].items()
+            if previous['counts'].get(option_id) != count
+        }
+    else:
+        data['counts'] = snap['counts']
+    return data
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from twochoice_app.notification_kinds import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert legacy free-text notification verbs into kind codes rendered from message "
+        "templates, and recompute dedupe keys. Processes rows in id order in batches; safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per update batch.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Do not write changes, only report how many rows would be converted.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = bool(options.get('dry_run'))
+        report = backfill(batch_size=options['batch_size'], dry_run=dry_run)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Converted: {report['classified']}, kept as free text: {report['generic']}"
+        ))
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Dry run enabled; no changes were written.'))
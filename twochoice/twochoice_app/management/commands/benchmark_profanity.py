@@ -0,0 +1,83 @@
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from twochoice_app.profanity_filter import PROFANITY_WORDS, contains_profanity, filter_profanity
+
+SAMPLE_WORDS = (
+    'bence', 'bu', 'anket', 'çok', 'güzel', 'olmuş', 'ama', 'ikinci', 'seçenek', 'daha', 'mantıklı',
+    'kahve', 'çay', 'İstanbul', 'Ankara', 'hafta', 'sonu', 'maç', 'izledim', 'neden', 'böyle', 'düşünüyorsun',
+)
+
+
+def legacy_contains_profanity(text):
+    """Önceki uygulama: kelime başına iki regex (karşılaştırma için)."""
+    if not text:
+        return False
+    text_lower = text.lower()
+    for word in PROFANITY_WORDS:
+        if re.search(r'\b' + re.escape(word) + r'\b', text_lower):
+            return True
+        spaced_pattern = r'\b' + r'[\s\.\-_]*'.join(re.escape(c) for c in word) + r'\b'
+        if re.search(spaced_pattern, text_lower):
+            return True
+    return False
+
+
+def legacy_filter_profanity(text):
+    if not text:
+        return text
+    filtered_text = text
+    text_lower = text.lower()
+    for word in PROFANITY_WORDS:
+        for match in reversed(list(re.finditer(r'\b' + re.escape(word) + r'\b', text_lower))):
+            start, end = match.span()
+            original = filtered_text[start:end]
+            filtered_text = filtered_text[:start] + original[0] + '*' * (len(original) - 1) + filtered_text[end:]
+    return filtered_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of the profanity filter: compiled single-pass matcher vs. the "
+        "previous per-word regex implementation, reported as latency per comment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=2000, help='Number of generated comments.')
+        parser.add_argument('--words', type=int, default=40, help='Words per generated comment.')
+        parser.add_argument(
+            '--profane-ratio',
+            type=float,
+            default=0.1,
+            help='Share of comments that contain one profanity word.',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        comments = []
+        for _ in range(options['comments']):
+            words = [rng.choice(SAMPLE_WORDS) for _ in range(options['words'])]
+            if rng.random() < options['profane_ratio']:
+                words.insert(rng.randrange(len(words)), rng.choice(PROFANITY_WORDS))
+            comments.append(' '.join(words))
+
+        results = [
+            ('contains (legacy)', legacy_contains_profanity),
+            ('contains (compiled)', contains_profanity),
+            ('filter (legacy)', legacy_filter_profanity),
+            ('filter (compiled)', filter_profanity),
+        ]
+        for label, func in results:
+            start = time.perf_counter()
+            for comment in comments:
+                func(comment)
+            elapsed = time.perf_counter() - start
+            per_comment_us = elapsed / len(comments) * 1_000_000
+            self.stdout.write(f'{label:<22} {per_comment_us:9.1f} µs/comment')
+
+        mismatches = sum(1 for comment in comments if legacy_contains_profanity(comment) != contains_profanity(comment))
+        self.stdout.write(self.style.SUCCESS(f'Verdict mismatches: {mismatches}/{len(comments)}'))
@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import resource
+import statistics
+import textwrap
+import time
+import zlib
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageChops, ImageDraw
+
+from twochoice_app import story_card
+
+# Önbellekte olmayan bir kartın istek içindeki hedef süresi
+TARGET_MS = 50
+
+SAMPLE_TITLE = 'Hafta sonu için hangisi: sahilde kahvaltı mı, evde film maratonu mu?'
+SAMPLE_OPTIONS = [
+    (1, 'Sahilde kahvaltı', 1843),
+    (2, 'Film maratonu', 1290),
+    (3, 'İkisi de olur', 402),
+]
+
+
+def legacy_gradient():
+    """Önceki uygulama: satır başına yarı saydam bir dikdörtgen (karşılaştırma için)."""
+    img = Image.new('RGB', (story_card.WIDTH, story_card.HEIGHT), story_card.BG_COLOR)
+    draw = ImageDraw.Draw(img, 'RGBA')
+    for y in range(story_card.HEIGHT):
+        ratio = y / story_card.HEIGHT
+        r = int(story_card.PRIMARY_COLOR[0] * (1 - ratio) + story_card.SECONDARY_COLOR[0] * ratio)
+        g = int(story_card.PRIMARY_COLOR[1] * (1 - ratio) + story_card.SECONDARY_COLOR[1] * ratio)
+        b = int(story_card.PRIMARY_COLOR[2] * (1 - ratio) + story_card.SECONDARY_COLOR[2] * ratio)
+        alpha = int(20 * (1 - abs(ratio - 0.5) * 2))
+        draw.rectangle([(0, y), (story_card.WIDTH, y + 1)], fill=(r, g, b, alpha))
+    return img
+
+
+def legacy_card(img, title, options, total_votes, highlighted_option_id=None):
+    """Önceki uygulama: seçenek kutuları her kartta tuvale doğrudan çizilir."""
+    fonts = story_card.get_fonts()
+    draw = ImageDraw.Draw(img, 'RGBA')
+    for i, line in enumerate(textwrap.wrap(title[:80], width=22)[:2]):
+        draw.text((story_card.WIDTH // 2, story_card.TITLE_Y + i * 85), line, font=fonts['title'], fill=story_card.TEXT_COLOR, anchor="mm")
+
+    for idx, (option_id, option_text, vote_count) in enumerate(options[:4]):
+        y_pos = story_card.DIVIDER_Y + 100 + idx * 240
+        percent = int((vote_count / total_votes) * 100) if total_votes > 0 else 0
+        is_user_choice = (highlighted_option_id and option_id == highlighted_option_id)
+        card_x, card_width, card_height, card_y = 120, story_card.WIDTH - 240, 180, y_pos - 90
+        draw.rounded_rectangle(
+            [(card_x, card_y), (card_x + card_width, card_y + card_height)],
+            radius=25,
+            fill=story_card.LIGHT_GRAY if is_user_choice else (255, 255, 255),
+            outline=story_card.PRIMARY_COLOR if is_user_choice else story_card.LIGHT_GRAY,
+            width=4 if is_user_choice else 2
+        )
+        if percent > 0:
+            bar_color = [story_card.PRIMARY_COLOR, story_card.SECONDARY_COLOR, story_card.ACCENT_COLOR][idx % 3]
+            progress_width = int(card_width * (percent / 100))
+            draw.rounded_rectangle([(card_x, card_y), (card_x + progress_width, card_y + card_height)], radius=25, fill=(*bar_color, 40))
+            draw.rounded_rectangle([(card_x, card_y), (card_x + 12, card_y + card_height)], radius=25, fill=bar_color)
+        text_x, text_y = card_x + 50, y_pos - 20
+        draw.text((text_x, text_y), option_text[:28], font=fonts['option'], fill=story_card.TEXT_COLOR, anchor="lm")
+        draw.text((text_x, text_y + 60), f"{vote_count} oy", font=fonts['tiny'], fill=story_card.GRAY_COLOR, anchor="lm")
+        draw.text(
+            (card_x + card_width - 50, y_pos), f"{percent}%", font=fonts['percent'],
+            fill=story_card.PRIMARY_COLOR if is_user_choice else story_card.GRAY_COLOR, anchor="rm",
+        )
+
+    draw.text(
+        (story_card.WIDTH // 2, story_card.FOOTER_Y + 30), f"📊 {total_votes} kişi oy verdi",
+        font=fonts['small'], fill=story_card.GRAY_COLOR, anchor="mm",
+    )
+    return img
+
+
+def legacy_image():
+    img = story_card.draw_frame(legacy_gradient())
+    return legacy_card(img, SAMPLE_TITLE, SAMPLE_OPTIONS, 3535, highlighted_option_id=1)
+
+
+def legacy_render():
+    """Önceki istek başı maliyet: arka plan her seferinde çizilir, PNG varsayılan ayarlarla sıkıştırılır."""
+    return story_card.encode(legacy_image(), compress_level=6, compress_type=zlib.Z_DEFAULT_STRATEGY)
+
+
+def cold_background():
+    story_card.get_background.cache_clear()
+    return story_card.get_background()
+
+
+def warm_render():
+    return story_card.render_story_card(SAMPLE_TITLE, SAMPLE_OPTIONS, 3535, highlighted_option_id=1)
+
+
+VARIANTS = {
+    'legacy (per request)': legacy_render,
+    'background (once per process)': cold_background,
+    'card (cached background)': warm_render,
+}
+
+
+def _measure(name, iterations):
+    # Taze bir süreçte çalışır; ru_maxrss artışı varyantın tepe belleğidir
+    story_card.get_fonts()
+    if name == 'card (cached background)':
+        warm_render()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        VARIANTS[name]()
+        timings.append(time.perf_counter() - start)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    return timings, peak_kb
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of story card rendering: the previous per-request background loop vs. "
+        "the precomputed gradient, cached background and option layers, reported as time and peak memory per card."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Renders per variant.')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        context = multiprocessing.get_context('fork')
+        medians = {}
+        for name in VARIANTS:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                timings, peak_kb = pool.submit(_measure, name, iterations).result()
+            medians[name] = statistics.median(timings) * 1000
+            self.stdout.write(f'{name:<32} {medians[name]:8.1f} ms/card  peak +{peak_kb / 1024:6.1f} MB')
+
+        size_legacy = len(legacy_render())
+        size_new = len(warm_render())
+        self.stdout.write(f'PNG size: legacy {size_legacy / 1024:.0f} KB, new {size_new / 1024:.0f} KB')
+
+        new_image = story_card.draw_card(
+            story_card.get_background().copy(), SAMPLE_TITLE, SAMPLE_OPTIONS, 3535, highlighted_option_id=1,
+        )
+        diff = ImageChops.difference(legacy_image(), new_image).getbbox()
+        self.stdout.write(self.style.SUCCESS(f'Pixel differences vs legacy: {"none" if diff is None else diff}'))
+
+        card_ms = medians['card (cached background)']
+        style = self.style.SUCCESS if card_ms < TARGET_MS else self.style.WARNING
+        self.stdout.write(style(f'Target {TARGET_MS} ms/card: {"met" if card_ms < TARGET_MS else "not met"} ({card_ms:.1f} ms)'))
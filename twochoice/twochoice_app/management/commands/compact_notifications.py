@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+
+from twochoice_app.notification_retention import compact_after_days, retention_days, run_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold old read vote/comment notifications into their inbox group rows and delete "
+        "notifications past the retention age in batches. Meant to run periodically, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compact-after-days',
+            type=int,
+            default=None,
+            help=f'Compact read vote/comment notifications older than this (default: {compact_after_days()}).',
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help=f'Delete notifications older than this (default: {retention_days()}).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per delete batch.',
+        )
+        parser.add_argument(
+            '--archive',
+            help='Append expired notifications to this file as JSON lines before deleting them.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Do not write changes, only report rows that would be reclaimed.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = bool(options.get('dry_run'))
+        kwargs = {
+            'compact_days': options.get('compact_after_days'),
+            'retention': options.get('retention_days'),
+            'batch_size': options['batch_size'],
+            'dry_run': dry_run,
+        }
+        if options.get('archive') and not dry_run:
+            with open(options['archive'], 'a', encoding='utf-8') as archive:
+                report = run_retention(archive=archive, **kwargs)
+        else:
+            report = run_retention(**kwargs)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted: {report['compacted']}, expired notifications: {report['expired']}, "
+            f"expired groups: {report['groups_expired']}"
+        ))
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Dry run enabled; no changes were written.'))
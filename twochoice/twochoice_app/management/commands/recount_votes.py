@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from twochoice_app.poll_tallies import recount_votes
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile denormalized vote counters (PollOption.vote_count, Post.vote_count) "
+        "with the PollVote table. Only drifted rows are rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post',
+            type=int,
+            action='append',
+            dest='post_ids',
+            help='Limit to the given post id (can be repeated).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk_update batch.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Do not write changes, only report drifted rows.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = bool(options.get('dry_run'))
+        options_fixed, posts_fixed = recount_votes(
+            post_ids=options.get('post_ids'),
+            batch_size=options['batch_size'],
+            dry_run=dry_run,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Drifted options: {options_fixed}, drifted posts: {posts_fixed}'))
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Dry run enabled; no changes were written.'))
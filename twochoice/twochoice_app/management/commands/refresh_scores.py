@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from twochoice_app.ranking import refresh_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute PostScore rows (hot score, last 24h votes/comments, comment totals) "
+        "from the vote and comment tables. Meant to run periodically, e.g. every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post',
+            type=int,
+            action='append',
+            dest='post_ids',
+            help='Limit to the given post id (can be repeated).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Posts per aggregation batch.',
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_scores(
+            post_ids=options.get('post_ids'),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Refreshed scores: {written}'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from twochoice_app import site_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the landing/home site stats snapshot (published posts, votes, active users, "
+        "posts per topic). Meant to run periodically so visitors are served from the cache."
+    )
+
+    def handle(self, *args, **options):
+        snap = site_stats.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f"Site stats: posts={snap['total_posts']} votes={snap['total_votes']} active_users={snap['active_users']}"
+        ))
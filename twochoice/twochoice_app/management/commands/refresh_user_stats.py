@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from twochoice_app.user_stats import refresh_user_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute UserStats rows (posts, votes cast/received, comments made/received, "
+        "max votes on a post) from the source tables. Run once after deploying and then "
+        "periodically to fix drift left by cascade deletes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Limit to the given user id (can be repeated).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Users per aggregation batch.',
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_user_stats(
+            user_ids=options.get('user_ids'),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Refreshed user stats: {written}'))
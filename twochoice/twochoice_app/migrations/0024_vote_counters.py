@@ -0,0 +1,48 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counters(apps, schema_editor):
+    Post = apps.get_model('twochoice_app', 'Post')
+    PollOption = apps.get_model('twochoice_app', 'PollOption')
+    PollVote = apps.get_model('twochoice_app', 'PollVote')
+
+    option_counts = (
+        PollVote.objects.filter(option=OuterRef('pk'))
+        .order_by()
+        .values('option')
+        .annotate(c=Count('pk'))
+        .values('c')
+    )
+    post_counts = (
+        PollVote.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(c=Count('pk'))
+        .values('c')
+    )
+
+    PollOption.objects.update(vote_count=Coalesce(Subquery(option_counts), Value(0)))
+    Post.objects.update(vote_count=Coalesce(Subquery(post_counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0023_notification_extra_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='vote_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='polloption',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0024_vote_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='twochoice_app.post')),
+                ('hot_score', models.FloatField(db_index=True, default=0)),
+                ('recent_votes', models.PositiveIntegerField(default=0)),
+                ('recent_comments', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Gönderi Skoru',
+                'verbose_name_plural': 'Gönderi Skorları',
+                'indexes': [models.Index(fields=['-hot_score', '-post'], name='postscore_hot_idx')],
+            },
+        ),
+    ]
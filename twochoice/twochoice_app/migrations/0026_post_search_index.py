@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'twochoice_app_post_fts'
+PG_INDEX = 'post_search_gin'
+PG_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, ''))"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                    f"USING fts5(title, content, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+            except OperationalError:
+                # FTS5 derlenmemiş SQLite: arama icontains'e düşer
+                return
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, content) "
+                f"SELECT id, title, content FROM twochoice_app_post WHERE status = 'p' AND is_deleted = 0"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON twochoice_app_post USING GIN ({PG_DOCUMENT})")
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0025_postscore'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,124 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'twochoice_app_post_fts'
+PG_INDEX = 'post_search_gin'
+
+# Normalizasyon bu migration yazıldığı haliyle kopyalanır; text_normalize.py
+# ileride değişse de backfill aynı sonucu üretir
+_TURKISH_CASE_MAP = str.maketrans({'I': 'ı', 'İ': 'i'})
+_DIACRITIC_MAP = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+_TOKEN_RE = re.compile(r'\w+')
+SUFFIXES = sorted([
+    'larindan', 'lerinden', 'larinda', 'lerinde', 'larini', 'lerini',
+    'lari', 'leri', 'larin', 'lerin', 'lar', 'ler',
+    'nin', 'nun', 'dan', 'den', 'tan', 'ten',
+    'da', 'de', 'ta', 'te', 'yi', 'yu', 'ya', 'ye',
+], key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+
+def fold_diacritics(text):
+    text = text.translate(_DIACRITIC_MAP)
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(token):
+    for _ in range(2):
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+
+def normalize_text(text):
+    lowered = (text or '').translate(_TURKISH_CASE_MAP).lower()
+    return ' '.join(stem(token) for token in _TOKEN_RE.findall(fold_diacritics(lowered)))
+
+
+def backfill_normalized_text(apps, schema_editor):
+    Post = apps.get_model('twochoice_app', 'Post')
+
+    batch = []
+    for post in Post.objects.only('id', 'title', 'content').iterator(chunk_size=500):
+        post.normalized_title = normalize_text(post.title)[:200]
+        post.normalized_content = normalize_text(post.content)
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['normalized_title', 'normalized_content'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['normalized_title', 'normalized_content'])
+
+
+def index_normalized_text(apps, schema_editor):
+    # Arama index'i artık normalize edilmiş sütunlardan beslenir
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            except OperationalError:
+                return
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, content) "
+                f"SELECT id, normalized_title, normalized_content FROM twochoice_app_post "
+                f"WHERE status = 'p' AND is_deleted = 0"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+            cursor.execute(
+                f"CREATE INDEX {PG_INDEX} ON twochoice_app_post USING GIN "
+                f"(to_tsvector('simple', coalesce(normalized_title, '') || ' ' || coalesce(normalized_content, '')))"
+            )
+
+
+def index_raw_text(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            except OperationalError:
+                return
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, content) "
+                f"SELECT id, title, content FROM twochoice_app_post WHERE status = 'p' AND is_deleted = 0"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+            cursor.execute(
+                f"CREATE INDEX {PG_INDEX} ON twochoice_app_post USING GIN "
+                f"(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(content, '')))"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0026_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='normalized_title',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='normalized_content',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_normalized_text, migrations.RunPython.noop),
+        migrations.RunPython(index_normalized_text, index_raw_text),
+    ]
@@ -0,0 +1,109 @@
+import re
+from collections import Counter
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+from twochoice_app.text_normalize import turkish_lower
+
+HASHTAG_RE = re.compile(r'#(\w+)')
+
+
+def backfill_hashtags(apps, schema_editor):
+    Post = apps.get_model('twochoice_app', 'Post')
+    Hashtag = apps.get_model('twochoice_app', 'Hashtag')
+    PostHashtag = apps.get_model('twochoice_app', 'PostHashtag')
+    HashtagDailyCount = apps.get_model('twochoice_app', 'HashtagDailyCount')
+
+    links = []
+    for post_id, title, content, created_at in (
+        Post.objects.filter(status='p', is_deleted=False)
+        .values_list('id', 'title', 'content', 'created_at')
+        .iterator(chunk_size=500)
+    ):
+        tags = {turkish_lower(tag)[:100] for tag in HASHTAG_RE.findall(f"{title} {content}")}
+        day = django.utils.timezone.localdate(created_at)
+        links.extend((post_id, tag, day) for tag in tags)
+
+    if not links:
+        return
+
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in {tag for _, tag, _ in links}],
+        ignore_conflicts=True,
+    )
+    hashtag_ids = dict(Hashtag.objects.values_list('name', 'id'))
+
+    PostHashtag.objects.bulk_create(
+        [PostHashtag(post_id=post_id, hashtag_id=hashtag_ids[tag], day=day) for post_id, tag, day in links],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+    daily = Counter((hashtag_ids[tag], day) for _, tag, day in links)
+    HashtagDailyCount.objects.bulk_create(
+        [HashtagDailyCount(hashtag_id=hashtag_id, day=day, count=count) for (hashtag_id, day), count in daily.items()],
+        batch_size=500,
+    )
+
+    totals = Counter(hashtag_ids[tag] for _, tag, _ in links)
+    Hashtag.objects.bulk_update(
+        [Hashtag(id=hashtag_id, post_count=count) for hashtag_id, count in totals.items()],
+        ['post_count'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0027_post_normalized_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Hashtag',
+                'verbose_name_plural': 'Hashtagler',
+                'ordering': ['-post_count'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(default=django.utils.timezone.localdate)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='twochoice_app.hashtag')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='twochoice_app.post')),
+            ],
+            options={
+                'verbose_name': 'Gönderi Hashtag',
+                'verbose_name_plural': 'Gönderi Hashtagleri',
+                'indexes': [models.Index(fields=['hashtag', 'post'], name='posthashtag_tag_post_idx')],
+                'unique_together': {('post', 'hashtag')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HashtagDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_counts', to='twochoice_app.hashtag')),
+            ],
+            options={
+                'verbose_name': 'Günlük Hashtag Sayısı',
+                'verbose_name_plural': 'Günlük Hashtag Sayıları',
+                'unique_together': {('hashtag', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_hashtags, migrations.RunPython.noop),
+    ]
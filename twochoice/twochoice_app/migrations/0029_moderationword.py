@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+from twochoice_app.text_normalize import turkish_lower
+
+# Listelerin migration anındaki hali (profanity_filter.PROFANITY_WORDS, content_filter.OFFENSIVE_WORDS)
+PROFANITY_WORDS = [
+    'amk', 'amq', 'aq', 'mk', 'mq', 'oç', 'orospu', 'piç', 'sik', 'yarrak',
+    'göt', 'am', 'amcık', 'taşak', 'siktir', 'bok', 'kaka', 'pezevenk',
+    'kahpe', 'sürtük', 'fahişe', 'ibne', 'top', 'eşek', 'salak', 'gerizekalı',
+    'mal', 'aptal', 'ahmak', 'dangalak', 'geri zekalı', 'beyinsiz',
+]
+SPAM_WORDS = ['spam', 'reklam', 'link', 'tıkla', 'kazanç', 'para kazan']
+
+
+def seed_words(apps, schema_editor):
+    ModerationWord = apps.get_model('twochoice_app', 'ModerationWord')
+    words = [(word, 'profanity') for word in PROFANITY_WORDS] + [(word, 'spam') for word in SPAM_WORDS]
+    ModerationWord.objects.bulk_create(
+        [ModerationWord(word=turkish_lower(word), kind=kind) for word, kind in words],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0028_hashtag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('profanity', 'Küfür/Argo'), ('spam', 'Reklam/Spam')], max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Moderasyon Kelimesi',
+                'verbose_name_plural': 'Moderasyon Kelimeleri',
+                'ordering': ['kind', 'word'],
+                'unique_together': {('word', 'kind')},
+            },
+        ),
+        migrations.RunPython(seed_words, migrations.RunPython.noop),
+    ]
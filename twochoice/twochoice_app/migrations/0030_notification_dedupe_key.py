@@ -0,0 +1,55 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def make_dedupe_key(user_id, actor_id, post_id, feedback_id, verb):
+    raw = f"{user_id}:{actor_id or ''}:{post_id or ''}:{feedback_id or ''}:{verb}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def backfill_dedupe_keys(apps, schema_editor):
+    Notification = apps.get_model('twochoice_app', 'Notification')
+
+    # Aynı anahtara sahip eski kopyalardan sadece en yenisi anahtar alır;
+    # diğerleri NULL kalır ve unique index'i bozmaz.
+    seen = set()
+    batch = []
+    rows = (
+        Notification.objects.filter(user__isnull=False)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'user_id', 'actor_id', 'post_id', 'feedback_id', 'verb')
+        .iterator(chunk_size=2000)
+    )
+    for notif_id, user_id, actor_id, post_id, feedback_id, verb in rows:
+        key = make_dedupe_key(user_id, actor_id, post_id, feedback_id, verb)
+        if key in seen:
+            continue
+        seen.add(key)
+        batch.append(Notification(id=notif_id, dedupe_key=key))
+        if len(batch) >= 1000:
+            Notification.objects.bulk_update(batch, ['dedupe_key'])
+            batch = []
+    if batch:
+        Notification.objects.bulk_update(batch, ['dedupe_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0029_moderationword'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True),
+        ),
+        migrations.RunPython(backfill_dedupe_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='notification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,114 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+GROUPED_VERBS = {
+    'anketine oy verdi': 'vote',
+    'gönderine yorum yaptı': 'comment',
+    'anketine yorum yaptı': 'comment',
+}
+LATEST_ACTORS = 3
+
+
+def backfill_groups(apps, schema_editor):
+    Notification = apps.get_model('twochoice_app', 'Notification')
+    NotificationGroup = apps.get_model('twochoice_app', 'NotificationGroup')
+
+    grouped = {}
+    singles = []
+    rows = (
+        Notification.objects.filter(user__isnull=False)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'user_id', 'actor_id', 'post_id', 'verb', 'is_read', 'created_at')
+        .iterator(chunk_size=2000)
+    )
+    for notif_id, user_id, actor_id, post_id, verb, is_read, created_at in rows:
+        action = GROUPED_VERBS.get(verb) if post_id else None
+        if not action:
+            singles.append(NotificationGroup(
+                user_id=user_id,
+                group_key=f"{user_id}:n:{notif_id}",
+                action='single',
+                post_id=post_id,
+                notification_id=notif_id,
+                actor_count=1,
+                latest_actor_ids=[actor_id] if actor_id else [],
+                is_read=is_read,
+                updated_at=created_at,
+            ))
+            if len(singles) >= 1000:
+                NotificationGroup.objects.bulk_create(singles)
+                singles = []
+            continue
+
+        key = f"{user_id}:p:{post_id}:{action}"
+        group = grouped.get(key)
+        if group is None:
+            # Satırlar yeniden eskiye geldiği için ilk satır grubun zamanıdır
+            group = grouped[key] = {
+                'user_id': user_id,
+                'post_id': post_id,
+                'action': action,
+                'actors': [],
+                'is_read': True,
+                'updated_at': created_at,
+            }
+        if actor_id and actor_id not in group['actors']:
+            group['actors'].append(actor_id)
+        group['is_read'] = group['is_read'] and is_read
+    if singles:
+        NotificationGroup.objects.bulk_create(singles)
+
+    NotificationGroup.objects.bulk_create(
+        [
+            NotificationGroup(
+                user_id=group['user_id'],
+                group_key=key,
+                action=group['action'],
+                post_id=group['post_id'],
+                actor_count=max(len(group['actors']), 1),
+                latest_actor_ids=group['actors'][:LATEST_ACTORS],
+                is_read=group['is_read'],
+                updated_at=group['updated_at'],
+            )
+            for key, group in grouped.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('twochoice_app', '0030_notification_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'post', 'verb', '-created_at'], name='notif_user_post_verb_idx'),
+        ),
+        migrations.CreateModel(
+            name='NotificationGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_key', models.CharField(max_length=64, unique=True)),
+                ('action', models.CharField(choices=[('vote', 'Oy'), ('comment', 'Yorum'), ('single', 'Tekil')], max_length=10)),
+                ('actor_count', models.PositiveIntegerField(default=1)),
+                ('latest_actor_ids', models.JSONField(blank=True, default=list)),
+                ('is_read', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='groups', to='twochoice_app.notification')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_groups', to='twochoice_app.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_groups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Bildirim Grubu',
+                'verbose_name_plural': 'Bildirim Grupları',
+                'indexes': [models.Index(fields=['user', '-updated_at', '-id'], name='notifgroup_inbox_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_groups, migrations.RunPython.noop),
+    ]
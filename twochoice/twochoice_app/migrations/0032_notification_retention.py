@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0031_notificationgroup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationgroup',
+            name='archived_actor_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
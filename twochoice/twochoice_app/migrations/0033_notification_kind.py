@@ -0,0 +1,208 @@
+import hashlib
+import re
+from string import Formatter
+
+from django.db import migrations, models
+from django.db.models import F
+
+BATCH_SIZE = 1000
+
+# Şablonlar ve sınıflandırma bu migration yazıldığı haliyle kopyalanır;
+# notification_kinds.py / Notification.MESSAGE_TEMPLATES ileride değişse de
+# migration aynı sonucu üretir
+GENERIC = 0
+MESSAGE_TEMPLATES = {
+    1: 'anketine oy verdi',
+    2: 'anketine yorum yaptı',
+    3: 'yeni kayıt oldu (Kullanıcı adı: {actor})',
+    4: 'yeni bir anket oluşturdu: "{post_short}" (Onay bekliyor)',
+    5: 'anketini güncelledi: "{post_short}" (Tekrar onay bekliyor)',
+    6: '"{post}" isimli {post_noun} onaylandı ve yayınlandı',
+    7: '"{post}" isimli {post_noun} reddedildi ve yayınlanmadı',
+    8: '"{feedback}" geri bildirimi gönderdi',
+    9: '"{feedback}" geri bildiriminize ek mesaj gönderdi',
+    10: '"{feedback}" geri bildiriminizi çözüldü olarak işaretledi',
+    11: '"{feedback}" geri bildiriminize yanıt verdi',
+}
+POST_KINDS = {1, 2, 4, 5, 6, 7}
+FEEDBACK_KINDS = {8, 9, 10, 11}
+ACTOR_KINDS = {3}
+LEGACY_VERBS = {'gönderine yorum yaptı': 2}
+PLACEHOLDER_PATTERNS = {'post_noun': '(?:anketiniz|gönderiniz)'}
+
+
+def _template_pattern(template):
+    parts = []
+    for literal, field, _, _ in Formatter().parse(template):
+        parts.append(re.escape(literal))
+        if field is not None:
+            parts.append(PLACEHOLDER_PATTERNS.get(field, '.*'))
+    return re.compile('^' + ''.join(parts) + '$', re.DOTALL)
+
+
+VERB_PATTERNS = [(kind, _template_pattern(template)) for kind, template in MESSAGE_TEMPLATES.items()]
+
+
+def make_dedupe_key(user_id, actor_id, post_id, feedback_id, kind, verb):
+    raw = f"{user_id}:{actor_id or ''}:{post_id or ''}:{feedback_id or ''}:{kind}:{verb}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def make_legacy_dedupe_key(user_id, actor_id, post_id, feedback_id, kind, verb):
+    # 0030'daki biçim
+    raw = f"{user_id}:{actor_id or ''}:{post_id or ''}:{feedback_id or ''}:{verb}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def classify(verb, post_id, feedback_id, actor_id):
+    kind = LEGACY_VERBS.get(verb)
+    if kind is None:
+        kind = next((kind for kind, pattern in VERB_PATTERNS if pattern.match(verb)), GENERIC)
+    if kind in POST_KINDS and not post_id:
+        return GENERIC
+    if kind in FEEDBACK_KINDS and not feedback_id:
+        return GENERIC
+    if kind in ACTOR_KINDS and not actor_id:
+        return GENERIC
+    return kind
+
+
+def render(notif):
+    title = notif.post.title if notif.post_id else ''
+    return MESSAGE_TEMPLATES[notif.kind].format(
+        actor=notif.actor.username if notif.actor_id else '',
+        post=title,
+        post_short=title[:50],
+        post_noun='anketiniz' if notif.post_id and notif.post.post_type in {'poll_only', 'both'} else 'gönderiniz',
+        feedback=notif.feedback.subject if notif.feedback_id else '',
+    )
+
+
+def rewrite_dedupe_keys(Notification, make_key):
+    # Aynı anahtara düşen kopyalardan sadece en yenisi anahtar alır (0030'daki gibi)
+    seen = set()
+    batch = []
+    rows = (
+        Notification.objects.filter(dedupe_key__isnull=False)
+        .order_by('-created_at', '-id')
+        .only('id', 'user_id', 'actor_id', 'post_id', 'feedback_id', 'kind', 'verb', 'dedupe_key')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    for notif in rows:
+        key = make_key(notif.user_id, notif.actor_id, notif.post_id, notif.feedback_id, notif.kind, notif.verb)
+        notif.dedupe_key = None if key in seen else key
+        seen.add(key)
+        batch.append(notif)
+        if len(batch) >= BATCH_SIZE:
+            Notification.objects.bulk_update(batch, ['dedupe_key'])
+            batch = []
+    if batch:
+        Notification.objects.bulk_update(batch, ['dedupe_key'])
+
+
+def merge_new_fields(apps, schema_editor):
+    # recipient/sender/message sadece user/actor/verb boşsa taşınır
+    Notification = apps.get_model('twochoice_app', 'Notification')
+    Notification.objects.filter(user__isnull=True, recipient__isnull=False).update(user=F('recipient'))
+    Notification.objects.filter(actor__isnull=True, sender__isnull=False).update(actor=F('sender'))
+    Notification.objects.filter(verb='').exclude(message='').update(verb=F('message'))
+
+
+def classify_kinds(apps, schema_editor):
+    # Şablondan üretilebilen metinler kind koduna çevrilir, dedupe_key yeni biçimle
+    # hesaplanır; backfill_notification_kinds komutu sadece tekrar çalıştırmak içindir
+    Notification = apps.get_model('twochoice_app', 'Notification')
+    rows = Notification.objects.filter(kind=GENERIC).only('id', 'actor_id', 'post_id', 'feedback_id', 'verb')
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        changed = []
+        for notif in batch:
+            kind = classify(notif.verb, notif.post_id, notif.feedback_id, notif.actor_id)
+            if kind != GENERIC:
+                notif.kind, notif.verb = kind, ''
+                changed.append(notif)
+        if changed:
+            Notification.objects.bulk_update(changed, ['kind', 'verb'])
+    rewrite_dedupe_keys(Notification, make_dedupe_key)
+
+
+def unclassify_kinds(apps, schema_editor):
+    # Geri alma: metin şablondan yeniden üretilir, anahtarlar eski biçime döner
+    Notification = apps.get_model('twochoice_app', 'Notification')
+    rows = (
+        Notification.objects.exclude(kind=GENERIC)
+        .select_related('actor', 'post', 'feedback')
+        .only('id', 'kind', 'verb', 'actor__username', 'post__title', 'post__post_type', 'feedback__subject')
+    )
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for notif in batch:
+            notif.verb = render(notif)[:255]
+            notif.kind = GENERIC
+        Notification.objects.bulk_update(batch, ['kind', 'verb'])
+    rewrite_dedupe_keys(Notification, make_legacy_dedupe_key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0032_notification_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, 'Serbest metin'),
+                    (1, 'Oy'),
+                    (2, 'Yorum'),
+                    (3, 'Yeni kayıt'),
+                    (4, 'Yeni gönderi (onay bekliyor)'),
+                    (5, 'Gönderi güncellendi (onay bekliyor)'),
+                    (6, 'Gönderi onaylandı'),
+                    (7, 'Gönderi reddedildi'),
+                    (8, 'Yeni geri bildirim'),
+                    (9, 'Geri bildirime ek mesaj'),
+                    (10, 'Geri bildirim çözüldü'),
+                    (11, 'Geri bildirim yanıtlandı'),
+                ],
+                default=0,
+            ),
+        ),
+        migrations.RunPython(merge_new_fields, migrations.RunPython.noop),
+        migrations.RunPython(classify_kinds, unclassify_kinds),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_user_post_verb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'post', 'kind', '-created_at'], name='notif_user_post_kind_idx'),
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='recipient',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='sender',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='notification_type',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='message',
+        ),
+    ]
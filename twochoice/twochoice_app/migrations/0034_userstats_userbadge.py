@@ -0,0 +1,48 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('twochoice_app', '0033_notification_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_created', models.PositiveIntegerField(default=0)),
+                ('posts_published', models.PositiveIntegerField(default=0)),
+                ('night_posts', models.PositiveIntegerField(default=0)),
+                ('votes_cast', models.PositiveIntegerField(default=0)),
+                ('votes_received', models.PositiveIntegerField(default=0)),
+                ('comments_made', models.PositiveIntegerField(default=0)),
+                ('comments_received', models.PositiveIntegerField(default=0)),
+                ('max_post_votes', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Kullanıcı İstatistiği',
+                'verbose_name_plural': 'Kullanıcı İstatistikleri',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserBadge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('badge', models.CharField(max_length=50)),
+                ('awarded_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='badges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Kullanıcı Rozeti',
+                'verbose_name_plural': 'Kullanıcı Rozetleri',
+                'unique_together': {('user', 'badge')},
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twochoice_app', '0034_userstats_userbadge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationgroup',
+            name='archived_actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -1,29 +1,69 @@
+import hashlib
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
+from .text_normalize import normalize_text, turkish_lower
+
 
 class Notification(models.Model):
-    """Bildirim sistemi - Birleştirilmiş model"""
-    NOTIFICATION_TYPES = [
-        ('comment', 'Yeni Yorum'),
-        ('reply', 'Yoruma Cevap'),
-        ('vote', 'Oy Kullanımı'),
-        ('mention', 'Bahsetme'),
+    """Bildirim sistemi
+
+    Metin satırda saklanmaz; ``kind`` küçük bir tamsayı koddur ve mesaj gösterim
+    anında MESSAGE_TEMPLATES'ten ilişkili gönderi/geri bildirim ile üretilir.
+    ``verb`` sadece şablonu olmayan (KIND_GENERIC) bildirimler içindir.
+    """
+    KIND_GENERIC = 0
+    KIND_VOTE = 1
+    KIND_COMMENT = 2
+    KIND_USER_REGISTERED = 3
+    KIND_POST_CREATED = 4
+    KIND_POST_UPDATED = 5
+    KIND_POST_APPROVED = 6
+    KIND_POST_REJECTED = 7
+    KIND_FEEDBACK_CREATED = 8
+    KIND_FEEDBACK_MESSAGE = 9
+    KIND_FEEDBACK_RESOLVED = 10
+    KIND_FEEDBACK_REPLIED = 11
+
+    KIND_CHOICES = [
+        (KIND_GENERIC, 'Serbest metin'),
+        (KIND_VOTE, 'Oy'),
+        (KIND_COMMENT, 'Yorum'),
+        (KIND_USER_REGISTERED, 'Yeni kayıt'),
+        (KIND_POST_CREATED, 'Yeni gönderi (onay bekliyor)'),
+        (KIND_POST_UPDATED, 'Gönderi güncellendi (onay bekliyor)'),
+        (KIND_POST_APPROVED, 'Gönderi onaylandı'),
+        (KIND_POST_REJECTED, 'Gönderi reddedildi'),
+        (KIND_FEEDBACK_CREATED, 'Yeni geri bildirim'),
+        (KIND_FEEDBACK_MESSAGE, 'Geri bildirime ek mesaj'),
+        (KIND_FEEDBACK_RESOLVED, 'Geri bildirim çözüldü'),
+        (KIND_FEEDBACK_REPLIED, 'Geri bildirim yanıtlandı'),
     ]
-    
-    # Eski field'lar (geriye dönük uyumluluk için)
+
+    # {actor}: aktörün kullanıcı adı, {post}/{post_short}: gönderi başlığı (tam / ilk 50 karakter),
+    # {post_noun}: anketiniz/gönderiniz, {feedback}: geri bildirim konusu
+    MESSAGE_TEMPLATES = {
+        KIND_VOTE: 'anketine oy verdi',
+        KIND_COMMENT: 'anketine yorum yaptı',
+        KIND_USER_REGISTERED: 'yeni kayıt oldu (Kullanıcı adı: {actor})',
+        KIND_POST_CREATED: 'yeni bir anket oluşturdu: "{post_short}" (Onay bekliyor)',
+        KIND_POST_UPDATED: 'anketini güncelledi: "{post_short}" (Tekrar onay bekliyor)',
+        KIND_POST_APPROVED: '"{post}" isimli {post_noun} onaylandı ve yayınlandı',
+        KIND_POST_REJECTED: '"{post}" isimli {post_noun} reddedildi ve yayınlanmadı',
+        KIND_FEEDBACK_CREATED: '"{feedback}" geri bildirimi gönderdi',
+        KIND_FEEDBACK_MESSAGE: '"{feedback}" geri bildiriminize ek mesaj gönderdi',
+        KIND_FEEDBACK_RESOLVED: '"{feedback}" geri bildiriminizi çözüldü olarak işaretledi',
+        KIND_FEEDBACK_REPLIED: '"{feedback}" geri bildiriminize yanıt verdi',
+    }
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
     actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications_sent')
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES, default=KIND_GENERIC)
     verb = models.CharField(max_length=255, blank=True, default='')
     
-    # Yeni field'lar
-    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_notifications', null=True, blank=True)
-    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_notifications_new', null=True, blank=True)
-    notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, blank=True, default='')
-    message = models.CharField(max_length=255, blank=True, default='')
-    
     # İlişkili objeler
     post = models.ForeignKey('Post', on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
     comment = models.ForeignKey('Comment', on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
@@ -31,20 +71,88 @@ class Notification(models.Model):
     
     is_read = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # (user, actor, post, feedback, kind, verb) özeti; aynı bildirim tek satırda güncellenir (bkz. notify_or_bump)
+    dedupe_key = models.CharField(max_length=40, unique=True, null=True, blank=True, editable=False)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Bildirim'
         verbose_name_plural = 'Bildirimler'
+        indexes = [
+            # Bildirim grubunun aktör sayısı ve son aktörleri bu index üzerinden okunur
+            models.Index(fields=['user', 'post', 'kind', '-created_at'], name='notif_user_post_kind_idx'),
+            # Okunmamış sayısı, bildirim listesi ve saklama süresi temizliği
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+        ]
+
+    @staticmethod
+    def make_dedupe_key(user_id, actor_id=None, post_id=None, feedback_id=None, kind=0, verb=''):
+        raw = f"{user_id}:{actor_id or ''}:{post_id or ''}:{feedback_id or ''}:{kind}:{verb}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @property
+    def message(self):
+        """Bildirim metni (aktör adı hariç), gösterim anında üretilir."""
+        template = self.MESSAGE_TEMPLATES.get(self.kind)
+        if template is None:
+            return self.verb
+        post = self.post if self.post_id else None
+        title = post.title if post else ''
+        return template.format(
+            actor=self.actor.username if self.actor_id else '',
+            post=title,
+            post_short=title[:50],
+            post_noun='anketiniz' if post and post.post_type in {'poll_only', 'both'} else 'gönderiniz',
+            feedback=self.feedback.subject if self.feedback_id else '',
+        )
     
     def __str__(self):
-        if self.recipient:
-            return f"{self.recipient.username} - {self.notification_type or self.message}"
-        if self.user:
-            return f"{self.user.username} - {self.verb}"
+        if self.user_id:
+            return f"{self.user.username} - {self.get_kind_display() if self.kind else self.verb}"
         return f"Notification #{self.pk}"
 
 
+class NotificationGroup(models.Model):
+    """Bildirim kutusunun bir satırı; yazım sırasında güncellenir (bkz. notification_groups.py).
+
+    Oy/yorum bildirimleri (kullanıcı, gönderi, eylem) başına tek satırda toplanır,
+    diğer bildirimler kendi satırlarını alır.
+    """
+    ACTION_CHOICES = [
+        ('vote', 'Oy'),
+        ('comment', 'Yorum'),
+        ('single', 'Tekil'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_groups')
+    group_key = models.CharField(max_length=64, unique=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, null=True, blank=True, related_name='notification_groups')
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, null=True, blank=True, related_name='groups')
+    actor_count = models.PositiveIntegerField(default=1)
+    # Sıkıştırılıp silinen eski bildirimlerin aktörleri (bkz. notification_retention.py);
+    # id'ler ARCHIVED_ACTOR_IDS_LIMIT kadar tutulur, tekrar gelen aktör iki kez sayılmaz
+    archived_actor_count = models.PositiveIntegerField(default=0)
+    archived_actor_ids = models.JSONField(default=list, blank=True)
+    latest_actor_ids = models.JSONField(default=list, blank=True)
+    is_read = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    @property
+    def total_actor_count(self):
+        return self.actor_count + self.archived_actor_count
+
+    def __str__(self):
+        return f"{self.user_id} - {self.action} - {self.post_id or self.notification_id}"
+
+    class Meta:
+        verbose_name = 'Bildirim Grubu'
+        verbose_name_plural = 'Bildirim Grupları'
+        indexes = [
+            models.Index(fields=['user', '-updated_at', '-id'], name='notifgroup_inbox_idx'),
+        ]
+
+
 class Bookmark(models.Model):
     """User bookmarks for posts"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookmarks')
@@ -163,10 +271,22 @@ class Post(models.Model):
     moderation_note = models.TextField(blank=True, default='')
     is_deleted = models.BooleanField(default=False, db_index=True)
     view_count = models.IntegerField(default=0, db_index=True)
+    vote_count = models.PositiveIntegerField(default=0, db_index=True)
+    # Arama için önceden normalize edilmiş metin (bkz. text_normalize.py)
+    normalized_title = models.CharField(max_length=200, blank=True, default='', editable=False)
+    normalized_content = models.TextField(blank=True, default='', editable=False)
 
     def __str__(self):
         return f"{self.title} - {self.author.username}"
 
+    def save(self, *args, **kwargs):
+        self.normalized_title = normalize_text(self.title)[:200]
+        self.normalized_content = normalize_text(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'content'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'normalized_title', 'normalized_content'}
+        super().save(*args, **kwargs)
+
     def can_view(self, user):
         if self.status == 'p':
             return True
@@ -207,14 +327,12 @@ class PostImage(models.Model):
 class PollOption(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='poll_options')
     option_text = models.CharField(max_length=200)
+    vote_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.option_text} - {self.post.title}"
 
-    def vote_count(self):
-        return self.votes.count()
-
     class Meta:
         verbose_name = 'Anket Seçeneği'
         verbose_name_plural = 'Anket Seçenekleri'
@@ -254,6 +372,135 @@ class Comment(models.Model):
         ordering = ['-created_at']
 
 
+class Hashtag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    post_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+    class Meta:
+        verbose_name = 'Hashtag'
+        verbose_name_plural = 'Hashtagler'
+        ordering = ['-post_count']
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='hashtag_links')
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='post_links')
+    # Günlük sayaç kovası; bağlantı kaldırılırken aynı gün azaltılır
+    day = models.DateField(default=timezone.localdate)
+
+    def __str__(self):
+        return f"#{self.hashtag.name} - {self.post_id}"
+
+    class Meta:
+        verbose_name = 'Gönderi Hashtag'
+        verbose_name_plural = 'Gönderi Hashtagleri'
+        unique_together = ['post', 'hashtag']
+        indexes = [
+            models.Index(fields=['hashtag', 'post'], name='posthashtag_tag_post_idx'),
+        ]
+
+
+class HashtagDailyCount(models.Model):
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='daily_counts')
+    day = models.DateField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"#{self.hashtag.name} {self.day}: {self.count}"
+
+    class Meta:
+        verbose_name = 'Günlük Hashtag Sayısı'
+        verbose_name_plural = 'Günlük Hashtag Sayıları'
+        unique_together = ['hashtag', 'day']
+
+
+class PostScore(models.Model):
+    """Trend/popüler sıralaması için önceden hesaplanmış skorlar (bkz. ranking.py)."""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    hot_score = models.FloatField(default=0, db_index=True)
+    recent_votes = models.PositiveIntegerField(default=0)
+    recent_comments = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Score {self.hot_score:.3f} - {self.post_id}"
+
+    class Meta:
+        verbose_name = 'Gönderi Skoru'
+        verbose_name_plural = 'Gönderi Skorları'
+        indexes = [
+            models.Index(fields=['-hot_score', '-post'], name='postscore_hot_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """Profil ve rozetler için kullanıcı başına önceden hesaplanmış sayaçlar (bkz. user_stats.py)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    posts_created = models.PositiveIntegerField(default=0)
+    posts_published = models.PositiveIntegerField(default=0)
+    night_posts = models.PositiveIntegerField(default=0)
+    votes_cast = models.PositiveIntegerField(default=0)
+    votes_received = models.PositiveIntegerField(default=0)
+    comments_made = models.PositiveIntegerField(default=0)
+    comments_received = models.PositiveIntegerField(default=0)
+    max_post_votes = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Stats - {self.user_id}"
+
+    class Meta:
+        verbose_name = 'Kullanıcı İstatistiği'
+        verbose_name_plural = 'Kullanıcı İstatistikleri'
+
+
+class UserBadge(models.Model):
+    """Kazanılmış rozetler; tanımlar badges.BADGES'tadır, bir kez kazanılan rozet kalır."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='badges')
+    badge = models.CharField(max_length=50)
+    awarded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.badge}"
+
+    class Meta:
+        verbose_name = 'Kullanıcı Rozeti'
+        verbose_name_plural = 'Kullanıcı Rozetleri'
+        unique_together = ['user', 'badge']
+
+
+class ModerationWord(models.Model):
+    """Küfür ve spam kelime listesi; derlenmiş hali moderation.py'de cache'lenir."""
+    KIND_CHOICES = [
+        ('profanity', 'Küfür/Argo'),
+        ('spam', 'Reklam/Spam'),
+    ]
+
+    word = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        self.word = turkish_lower(self.word.strip())
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.word} ({self.kind})"
+
+    class Meta:
+        verbose_name = 'Moderasyon Kelimesi'
+        verbose_name_plural = 'Moderasyon Kelimeleri'
+        ordering = ['kind', 'word']
+        unique_together = ['word', 'kind']
+
+
 class Report(models.Model):
     REPORT_TYPE_CHOICES = [
         ('profanity', 'Küfür İçerikli'),
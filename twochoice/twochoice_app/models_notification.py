@@ -1,37 +0,0 @@
-from django.db import models
-from django.contrib.auth.models import User
-from django.utils import timezone
-
-
-class Notification(models.Model):
-    """Bildirim sistemi"""
-    NOTIFICATION_TYPES = [
-        ('comment', 'Yeni Yorum'),
-        ('reply', 'Yoruma Cevap'),
-        ('vote', 'Oy Kullanımı'),
-        ('mention', 'Bahsetme'),
-    ]
-    
-    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
-    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_notifications', null=True, blank=True)
-    notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
-    
-    # Generic relations
-    post = models.ForeignKey('Post', on_delete=models.CASCADE, null=True, blank=True)
-    comment = models.ForeignKey('Comment', on_delete=models.CASCADE, null=True, blank=True)
-    
-    message = models.CharField(max_length=255)
-    is_read = models.BooleanField(default=False, db_index=True)
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
-    
-    class Meta:
-        ordering = ['-created_at']
-        verbose_name = 'Bildirim'
-        verbose_name_plural = 'Bildirimler'
-        indexes = [
-            models.Index(fields=['recipient', '-created_at']),
-            models.Index(fields=['recipient', 'is_read']),
-        ]
-    
-    def __str__(self):
-        return f"{self.recipient.username} - {self.notification_type}"
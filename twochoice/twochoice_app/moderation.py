@@ -0,0 +1,217 @@
+"""
+İçerik moderasyonu
+
+Metin tek geçişte analiz edilir: küfür ve spam kelimeleri derlenmiş
+regex'lerle, URL sayısı, büyük harf oranı ve tekrar eden karakterler aynı
+küçük harfe çevrilmiş metin üzerinden hesaplanır. Sonuç ModerationVerdict
+olarak döner; content_filter ve profanity_filter bu modülü kullanır.
+
+Kelime listesi ModerationWord tablosundadır. Listenin sürümü (kayıt sayısı ve
+son güncelleme zamanı) her worker'da en fazla MODERATION_RELOAD_INTERVAL
+saniyede bir kontrol edilir; sürüm değiştiyse matcher yeniden derlenir.
+Değişikliği yapan worker'da sinyal ile hemen geçersiz olur.
+"""
+import logging
+import re
+import time
+
+from django.db import DatabaseError
+from django.db.models import Count, Max
+
+from .constants import MODERATION_RELOAD_INTERVAL
+from .models import ModerationWord
+from .profanity_filter import PROFANITY_WORDS, ProfanityMatcher
+from .text_normalize import turkish_lower
+
+logger = logging.getLogger(__name__)
+
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+REPEATED_CHARS_PATTERN = re.compile(r'(.)\1{5,}')
+
+# Tablo henüz oluşturulmadıysa (migrate öncesi) kullanılan varsayılan spam listesi
+DEFAULT_SPAM_WORDS = ['spam', 'reklam', 'link', 'tıkla', 'kazanç', 'para kazan']
+
+SPAM_FLAG_SCORE = 60
+CAPS_MIN_LENGTH = 20
+CAPS_RATIO_LIMIT = 0.7
+MAX_URLS = 2
+
+
+class SpamMatcher:
+    """Spam words compiled into one regex; like the old ``word in text`` check, matches inside words too."""
+
+    def __init__(self, words):
+        self.words = tuple(sorted({turkish_lower(word) for word in words}, key=len, reverse=True))
+        self.pattern = None
+        if self.words:
+            # Lookahead ile her konumdan eşleşme aranır, böylece iç içe geçen kelimeler de bulunur
+            self.pattern = re.compile('(?=(' + '|'.join(re.escape(word) for word in self.words) + '))')
+        # Aynı konumda başlayan kısa kelimeler (ör. 'para' / 'para kazan') de sayılmalı
+        self._prefixes = {
+            word: [other for other in self.words if word.startswith(other)]
+            for word in self.words
+        }
+
+    def find_lowered(self, lowered):
+        if self.pattern is None:
+            return []
+        found = set()
+        for match in self.pattern.finditer(lowered):
+            found.update(self._prefixes[match.group(1)])
+        return sorted(found)
+
+
+class ModerationVerdict:
+    def __init__(self, score=0, profanity_terms=(), spam_terms=(), url_count=0, caps_ratio=0.0, repeated_chars=False):
+        self.score = score
+        self.profanity_terms = list(profanity_terms)
+        self.spam_terms = list(spam_terms)
+        self.url_count = url_count
+        self.caps_ratio = caps_ratio
+        self.repeated_chars = repeated_chars
+
+    @property
+    def has_profanity(self):
+        return bool(self.profanity_terms)
+
+    @property
+    def is_spam(self):
+        return bool(
+            self.spam_terms
+            or self.url_count > MAX_URLS
+            or self.caps_ratio > CAPS_RATIO_LIMIT
+            or self.repeated_chars
+        )
+
+    @property
+    def flagged(self):
+        return self.score >= SPAM_FLAG_SCORE
+
+    def as_dict(self):
+        return {
+            'score': self.score,
+            'profanity_terms': self.profanity_terms,
+            'spam_terms': self.spam_terms,
+            'url_count': self.url_count,
+            'caps_ratio': round(self.caps_ratio, 3),
+            'repeated_chars': self.repeated_chars,
+            'flagged': self.flagged,
+        }
+
+
+class ModerationPipeline:
+    def __init__(self, profanity_words, spam_words, version=None):
+        self.version = version
+        self.profanity = ProfanityMatcher(profanity_words)
+        self.spam = SpamMatcher(spam_words)
+
+    def analyze(self, text):
+        """Scan ``text`` once and return a ModerationVerdict."""
+        if not text:
+            return ModerationVerdict()
+
+        lowered = turkish_lower(text)
+        profanity_terms = []
+        if self.profanity.pattern is not None:
+            profanity_terms = [text[start:end] for start, end in (m.span() for m in self.profanity.pattern.finditer(lowered))]
+        spam_terms = self.spam.find_lowered(lowered)
+        url_count = len(URL_PATTERN.findall(text))
+        caps_ratio = 0.0
+        if len(text) > CAPS_MIN_LENGTH:
+            caps_ratio = sum(1 for c in text if c.isupper()) / len(text)
+        repeated_chars = REPEATED_CHARS_PATTERN.search(text) is not None
+
+        # Skor: kelime başına +20, URL başına +10 (en fazla 30), büyük harf +15,
+        # tekrar eden karakter +10, çok kısa içerik +5
+        score = 20 * len(spam_terms) + min(url_count * 10, 30)
+        if caps_ratio > CAPS_RATIO_LIMIT:
+            score += 15
+        if repeated_chars:
+            score += 10
+        if len(text.strip()) < 10:
+            score += 5
+
+        return ModerationVerdict(
+            score=min(score, 100),
+            profanity_terms=profanity_terms,
+            spam_terms=spam_terms,
+            url_count=url_count,
+            caps_ratio=caps_ratio,
+            repeated_chars=repeated_chars,
+        )
+
+
+_pipeline = None
+_checked_at = 0.0
+
+
+def word_list_version():
+    """Cheap signature of the word list; changes on every insert, update or delete."""
+    stats = ModerationWord.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    updated = stats['updated']
+    return f"{stats['count']}:{updated.timestamp() if updated else 0}"
+
+
+def _load_pipeline(version):
+    words = {'profanity': [], 'spam': []}
+    for word, kind in ModerationWord.objects.filter(is_active=True).values_list('word', 'kind'):
+        words.setdefault(kind, []).append(word)
+    logger.info('moderation word list loaded version=%s', version)
+    return ModerationPipeline(words['profanity'], words['spam'], version=version)
+
+
+def get_pipeline():
+    """Return the compiled pipeline, reloading it when the stored word list changed."""
+    global _pipeline, _checked_at
+    now = time.monotonic()
+    if _pipeline is not None and now - _checked_at < MODERATION_RELOAD_INTERVAL:
+        return _pipeline
+
+    try:
+        version = word_list_version()
+        if _pipeline is None or _pipeline.version != version:
+            _pipeline = _load_pipeline(version)
+    except DatabaseError:
+        logger.warning('moderation word list unavailable, using defaults', exc_info=True)
+        if _pipeline is None:
+            _pipeline = ModerationPipeline(PROFANITY_WORDS, DEFAULT_SPAM_WORDS)
+    _checked_at = now
+    return _pipeline
+
+
+def invalidate():
+    """Force a version check on the next ``get_pipeline()`` call."""
+    global _checked_at
+    _checked_at = 0.0
+
+
+def analyze_text(text):
+    return get_pipeline().analyze(text)
+
+
+def get_words(kind):
+    return list(ModerationWord.objects.filter(kind=kind, is_active=True).values_list('word', flat=True))
+
+
+def add_word(word, kind):
+    """Add (or re-activate) ``word``; returns False if it was already active."""
+    word = turkish_lower((word or '').strip())
+    if not word:
+        return False
+    obj, created = ModerationWord.objects.get_or_create(word=word, kind=kind)
+    if not created and obj.is_active:
+        return False
+    if not created:
+        obj.is_active = True
+        obj.save(update_fields=['is_active', 'updated_at'])
+    return True
+
+
+def remove_word(word, kind):
+    word = turkish_lower((word or '').strip())
+    obj = ModerationWord.objects.filter(word=word, kind=kind, is_active=True).first()
+    if obj is None:
+        return False
+    obj.is_active = False
+    obj.save(update_fields=['is_active', 'updated_at'])
+    return True
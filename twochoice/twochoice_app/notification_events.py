@@ -0,0 +1,168 @@
+"""
+Notification events (pub/sub)
+
+Bildirim yazıldığında veya okundu işaretlendiğinde kullanıcının kanalına küçük
+bir olay yayınlanır; SSE endpoint'i (views_events.notifications_stream) bu
+kanala abone olur ve okunmamış sayısını/yeni bildirimi istemciye iter.
+
+Backend'ler:
+- memory: süreç içi, tek worker (veya geliştirme) için
+- redis: Redis pub/sub, birden çok worker/sunucu için (REDIS_URL gerekir)
+
+Olaylar sadece ipucudur (sayı abone tarafında yeniden okunur); kuyruk dolarsa
+olay atılır.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'notifications:events:'
+QUEUE_SIZE = 100
+
+
+class MemorySubscription:
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout):
+        """Next event, or ``None`` after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    name = 'memory'
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            # Yayıncı genelde senkron bir thread'dir; kuyruğa abonenin event loop'unda yaz
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    async def subscribe(self, user_id):
+        subscription = MemorySubscription(self, user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if not message:
+            return None
+        try:
+            return json.loads(message['data'])
+        except (TypeError, ValueError):
+            return None
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroker:
+    name = 'redis'
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImproperlyConfigured(
+                "NOTIFICATION_EVENTS_BACKEND='redis' requires the redis package (see requirements.txt)."
+            ) from exc
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, user_id, event):
+        self._client.publish(f'{CHANNEL_PREFIX}{user_id}', json.dumps(event))
+
+    async def subscribe(self, user_id):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(f'{CHANNEL_PREFIX}{user_id}')
+        return RedisSubscription(client, pubsub)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'NOTIFICATION_EVENTS_BACKEND', 'memory')
+                if backend == 'redis':
+                    _broker = RedisBroker(settings.REDIS_URL)
+                else:
+                    _broker = MemoryBroker()
+                logger.info('notification events backend: %s', _broker.name)
+    return _broker
+
+
+def publish(user_id, event):
+    """Publish ``event`` to ``user_id``'s channel once the current transaction commits."""
+    if not user_id:
+        return
+
+    def _send():
+        try:
+            get_broker().publish(user_id, event)
+        except Exception:
+            logger.exception('notification event publish failed user=%s', user_id)
+
+    transaction.on_commit(_send)
+
+
+async def subscribe(user_id):
+    return await get_broker().subscribe(user_id)
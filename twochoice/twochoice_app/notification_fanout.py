@@ -0,0 +1,131 @@
+"""
+Notification fan-out
+
+Moderatörlere/adminlere giden toplu bildirimler (yeni gönderi, düzenleme, geri
+bildirim) istek içinde kullanıcı başına sorgu atmak yerine burada toplu yazılır:
+alıcılar ve bildirim tercihleri tek sorguda çözülür, bildirimler dedupe_key
+üzerinden tek bir bulk upsert ile eklenir ya da öne alınır.
+
+NOTIFICATION_FANOUT_MODE='async' iken iş, transaction commit edildikten sonra
+süreç içi bir thread pool'da çalışır; böylece isteğin süresi moderatör
+sayısından bağımsız kalır. 'sync' modunda aynı iş istek içinde yapılır.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+
+from .models import Notification
+from . import notification_events, notification_groups
+
+logger = logging.getLogger(__name__)
+
+AUDIENCES = {
+    'staff': Q(is_staff=True) | Q(is_superuser=True),
+    'superusers': Q(is_superuser=True),
+}
+
+# can_send_notification ile aynı kategori → profil alanı eşlemesi
+PREFERENCE_FIELDS = {
+    'votes': 'notify_votes',
+    'comments': 'notify_comments',
+    'feedback': 'notify_feedback',
+    'moderation': 'notify_moderation',
+}
+
+BATCH_SIZE = 500
+DEFAULT_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def is_async():
+    return getattr(settings, 'NOTIFICATION_FANOUT_MODE', 'async') == 'async'
+
+
+def resolve_recipients(audience, category, exclude_user_id=None):
+    """Ids of ``audience`` users who accept ``category`` notifications, in one query."""
+    users = User.objects.filter(AUDIENCES[audience])
+    if exclude_user_id:
+        users = users.exclude(id=exclude_user_id)
+    field = PREFERENCE_FIELDS.get(category)
+    if field:
+        # Profili olmayan kullanıcılar varsayılan olarak bildirim alır
+        users = users.filter(Q(profile__isnull=True) | Q(**{f'profile__{field}': True}))
+    return list(users.order_by('id').values_list('id', flat=True))
+
+
+def fan_out(*, audience, category, kind=Notification.KIND_GENERIC, verb='', actor_id=None, post_id=None, feedback_id=None, exclude_user_id=None):
+    """Create or bump one notification per recipient; returns the recipient count."""
+    recipient_ids = resolve_recipients(audience, category, exclude_user_id=exclude_user_id)
+    if not recipient_ids:
+        return 0
+
+    notifications = [
+        Notification(
+            user_id=user_id,
+            actor_id=actor_id,
+            post_id=post_id,
+            feedback_id=feedback_id,
+            kind=kind,
+            verb=verb,
+            is_read=False,
+            dedupe_key=Notification.make_dedupe_key(user_id, actor_id, post_id, feedback_id, kind, verb),
+        )
+        for user_id in recipient_ids
+    ]
+    notifications = notification_groups.upsert(notifications, ['is_read', 'created_at'], batch_size=BATCH_SIZE)
+
+    cache.delete_many([f'notifications:unread_count:{user_id}' for user_id in recipient_ids])
+    for notif in notifications:
+        notification_events.publish(notif.user_id, {'type': 'notification', 'id': notif.pk})
+    logger.info('notification fan-out audience=%s recipients=%s kind=%s', audience, len(recipient_ids), kind)
+    return len(recipient_ids)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(getattr(settings, 'NOTIFICATION_FANOUT_WORKERS', DEFAULT_WORKERS))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='notification-fanout')
+    return _executor
+
+
+def _run(kwargs):
+    try:
+        fan_out(**kwargs)
+    except Exception:
+        logger.exception('notification fan-out failed kind=%s', kwargs.get('kind'))
+    finally:
+        close_old_connections()
+
+
+def broadcast(*, audience, category, kind=Notification.KIND_GENERIC, verb='', actor=None, post=None, feedback=None, exclude_actor=False):
+    """Notify every ``audience`` user; runs on the background pool in async mode."""
+    kwargs = {
+        'audience': audience,
+        'category': category,
+        'kind': kind,
+        'verb': verb,
+        'actor_id': getattr(actor, 'id', None),
+        'post_id': getattr(post, 'id', None),
+        'feedback_id': getattr(feedback, 'id', None),
+        'exclude_user_id': getattr(actor, 'id', None) if exclude_actor else None,
+    }
+    if not is_async():
+        try:
+            fan_out(**kwargs)
+        except Exception:
+            logger.exception('notification fan-out failed kind=%s', kind)
+        return
+
+    # Worker'ın gönderiyi/geri bildirimi görebilmesi için commit'ten sonra kuyruğa al
+    transaction.on_commit(lambda: _get_executor().submit(_run, kwargs))
@@ -0,0 +1,298 @@
+"""
+Notification inbox groups
+
+Bildirim kutusu NotificationGroup tablosundan okunur. Oy ve yorum bildirimleri
+(kullanıcı, gönderi, eylem) başına tek bir satırda toplanır; aktör sayısı ve
+son aktörler bildirim yazılırken (notify_or_bump, fan-out) güncellenir: yeni
+bir (kullanıcı, aktör, gönderi, eylem) bildirimi sayacı F() ile bir artırır,
+tekrarlanan bildirim sadece aktörü listenin başına alır. "Yeni mi" kararı,
+bildirim upsert'ü ve grup güncellemesi tek transaction'da, grup satırı
+select_for_update ile kilitliyken verilir (bkz. ``upsert``); aynı gruba
+eşzamanlı yazan istekler sırayla çalışır. Grup satırı yoksa sayılar bir kez
+bildirimlerden hesaplanır. Diğer
+bildirimler kendi satırlarını alır. Sayfalar (updated_at, id) üzerinden keyset
+pagination ile okunur ve sadece gösterilen satırlar okundu işaretlenir; böylece
+sayfa maliyeti geçmişin uzunluğuna değil sayfa boyutuna bağlıdır.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .constants import NOTIFICATION_COUNT_CACHE_TIMEOUT
+from .models import Notification, NotificationGroup
+from .pagination import CursorPaginator
+
+GROUPED_KINDS = {
+    Notification.KIND_VOTE: 'vote',
+    Notification.KIND_COMMENT: 'comment',
+}
+ACTION_KINDS = {action: kind for kind, action in GROUPED_KINDS.items()}
+
+# Şablon en fazla üç aktör adı gösterir ("ve diğer N kişi")
+LATEST_ACTORS = 3
+# Sıkıştırılan aktörlerden id'si saklananların üst sınırı; bunun ötesindeki
+# aktörler tekrar gelirse yeniden sayılabilir
+ARCHIVED_ACTOR_IDS_LIMIT = 1000
+INBOX_PAGE_SIZE = 25
+INBOX_CURSOR_KEYS = ('updated_at', 'id')
+GROUP_UPDATE_FIELDS = ['notification', 'actor_count', 'latest_actor_ids', 'is_read', 'updated_at']
+
+
+def group_key(user_id, action, post_id=None, notification_id=None):
+    if action == 'single':
+        return f"{user_id}:n:{notification_id}"
+    return f"{user_id}:p:{post_id}:{action}"
+
+
+def action_for(notification):
+    if notification.post_id and notification.kind in GROUPED_KINDS:
+        return GROUPED_KINDS[notification.kind]
+    return 'single'
+
+
+def _fill_missing_pks(notifications):
+    # Upsert'ün id döndürmediği veritabanlarında id'leri dedupe_key ile bul
+    missing = {n.dedupe_key: n for n in notifications if n.pk is None and n.dedupe_key}
+    if missing:
+        for pk, key in Notification.objects.filter(dedupe_key__in=list(missing)).values_list('pk', 'dedupe_key'):
+            missing[key].pk = pk
+
+
+def existing_keys(notifications):
+    """Dedupe keys of grouped ``notifications`` that are already stored; read before their upsert."""
+    keys = [n.dedupe_key for n in notifications if n.dedupe_key and action_for(n) != 'single']
+    if not keys:
+        return set()
+    return set(Notification.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+
+
+def _lock_groups(notifications):
+    keys = sorted({
+        group_key(n.user_id, action_for(n), post_id=n.post_id)
+        for n in notifications
+        if action_for(n) != 'single'
+    })
+    if keys:
+        # Sabit sırada kilitle; aynı grupları güncelleyen batch'ler birbirini kilitlemesin
+        list(NotificationGroup.objects.select_for_update().filter(group_key__in=keys).order_by('group_key').values_list('pk', flat=True))
+
+
+def upsert(notifications, update_fields, batch_size=None):
+    """Insert or bump ``notifications`` by dedupe_key and update their inbox rows atomically.
+
+    Grup satırları kilitlendikten sonra okunan dedupe anahtarları "yeni" kararını
+    verir; eşzamanlı iki ilk bildirim aynı aktörü iki kez sayamaz. Grup henüz
+    yoksa sayılar bildirimlerden yeniden hesaplandığı için sonuç yine doğrudur.
+    Returns the written notifications.
+    """
+    notifications = list(notifications)
+    with transaction.atomic():
+        _lock_groups(notifications)
+        existing = existing_keys(notifications)
+        notifications = Notification.objects.bulk_create(
+            notifications,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['dedupe_key'],
+            update_fields=update_fields,
+        )
+        record(notifications, existing)
+    return notifications
+
+
+def _grouped_row(user_id, post_id, action, now):
+    rows = Notification.objects.filter(user_id=user_id, post_id=post_id, kind=ACTION_KINDS[action])
+    # Sıkıştırılmış eski aktörler archived_actor_count'ta ayrıca tutulur
+    actor_count = rows.aggregate(actors=Count('actor', distinct=True))['actors']
+
+    latest = []
+    recent = rows.exclude(actor=None).order_by('-created_at').values_list('actor_id', flat=True)
+    for actor_id in recent[:LATEST_ACTORS * 2]:
+        if actor_id not in latest:
+            latest.append(actor_id)
+    return NotificationGroup(
+        user_id=user_id,
+        group_key=group_key(user_id, action, post_id=post_id),
+        action=action,
+        post_id=post_id,
+        actor_count=actor_count,
+        latest_actor_ids=latest[:LATEST_ACTORS],
+        is_read=False,
+        updated_at=now,
+    )
+
+
+def _bump_grouped(grouped, existing, now):
+    stored = NotificationGroup.objects.in_bulk(list(grouped), field_name='group_key')
+    created = []
+    for key, notifs in grouped.items():
+        group = stored.get(key)
+        if group is None:
+            # İlk bildirim ya da temizlenmiş grup: sayıları bir kez kaynaktan hesapla
+            created.append(_grouped_row(notifs[0].user_id, notifs[0].post_id, GROUPED_KINDS[notifs[0].kind], now))
+            continue
+
+        latest = list(group.latest_actor_ids)
+        archived = list(group.archived_actor_ids)
+        new_actors = returning = 0
+        for notif in notifs:
+            if not notif.actor_id:
+                continue
+            if notif.dedupe_key not in existing:
+                new_actors += 1
+                if notif.actor_id in archived:
+                    # Sıkıştırılmış aktör tekrar geldi: arşivden canlı sayıya geçer, toplam değişmez
+                    archived.remove(notif.actor_id)
+                    returning += 1
+            if notif.actor_id in latest:
+                latest.remove(notif.actor_id)
+            latest.insert(0, notif.actor_id)
+
+        fields = {}
+        if returning:
+            fields = {
+                'archived_actor_count': F('archived_actor_count') - returning,
+                'archived_actor_ids': archived,
+            }
+        NotificationGroup.objects.filter(pk=group.pk).update(
+            actor_count=F('actor_count') + new_actors,
+            latest_actor_ids=latest[:LATEST_ACTORS],
+            is_read=False,
+            updated_at=now,
+            **fields,
+        )
+    return created
+
+
+def record(notifications, existing=()):
+    """Upsert the inbox rows of freshly written (or bumped) ``notifications``.
+
+    ``existing`` holds the dedupe keys that were already stored before the
+    upsert (see ``existing_keys``); only the other grouped notifications add
+    an actor to their group.
+    """
+    notifications = list(notifications)
+    _fill_missing_pks(notifications)
+    now = timezone.now()
+
+    groups = {}
+    grouped = {}
+    for notif in notifications:
+        action = action_for(notif)
+        if action == 'single':
+            key = group_key(notif.user_id, action, notification_id=notif.pk)
+            groups[key] = NotificationGroup(
+                user_id=notif.user_id,
+                group_key=key,
+                action=action,
+                post_id=notif.post_id,
+                notification_id=notif.pk,
+                actor_count=1,
+                latest_actor_ids=[notif.actor_id] if notif.actor_id else [],
+                is_read=False,
+                updated_at=now,
+            )
+        else:
+            grouped.setdefault(group_key(notif.user_id, action, post_id=notif.post_id), []).append(notif)
+
+    if grouped:
+        for group in _bump_grouped(grouped, set(existing), now):
+            groups[group.group_key] = group
+
+    if groups:
+        NotificationGroup.objects.bulk_create(
+            list(groups.values()),
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['group_key'],
+            update_fields=GROUP_UPDATE_FIELDS,
+        )
+
+
+def _as_item(group, actors):
+    if group.action == 'single':
+        return {
+            'type': 'single',
+            'notification': group.notification,
+            'is_read': group.is_read,
+            'created_at': group.updated_at,
+        }
+    return {
+        'type': 'grouped',
+        'action': group.action,
+        'post': group.post,
+        'actors': [actors[actor_id] for actor_id in group.latest_actor_ids if actor_id in actors],
+        'count': group.total_actor_count,
+        'is_read': group.is_read,
+        'created_at': group.updated_at,
+    }
+
+
+def inbox_page(user, cursor=None, per_page=None):
+    """Return a CursorPage of template items plus the NotificationGroup rows behind it."""
+    groups = NotificationGroup.objects.filter(user=user).select_related(
+        'post', 'notification__actor', 'notification__post', 'notification__feedback',
+    )
+    page = CursorPaginator(groups, INBOX_CURSOR_KEYS, per_page or INBOX_PAGE_SIZE).get_page(cursor)
+    rows = page.object_list
+
+    actor_ids = {actor_id for group in rows for actor_id in group.latest_actor_ids}
+    actors = User.objects.in_bulk(list(actor_ids)) if actor_ids else {}
+    page.object_list = [_as_item(group, actors) for group in rows]
+    return page, rows
+
+
+def _notifications_of(groups):
+    condition = Q()
+    for group in groups:
+        if group.action == 'single':
+            condition |= Q(pk=group.notification_id)
+        else:
+            condition |= Q(post_id=group.post_id, kind=ACTION_KINDS[group.action])
+    return condition
+
+
+def unread_count(user_id):
+    # Bildirim yazımı ve okundu işaretleme cache'i sildiği için uzun tutulabilir
+    return cache.get_or_set(
+        f'notifications:unread_count:{user_id}',
+        lambda: Notification.objects.filter(user_id=user_id, is_read=False).count(),
+        NOTIFICATION_COUNT_CACHE_TIMEOUT,
+    )
+
+
+def mark_groups_read(user, groups):
+    """Mark ``groups`` and the notifications behind them read; returns the groups updated."""
+    unread = [group for group in groups if not group.is_read]
+    if not unread:
+        return 0
+    Notification.objects.filter(_notifications_of(unread), user=user, is_read=False).update(is_read=True)
+    return NotificationGroup.objects.filter(pk__in=[group.pk for group in unread]).update(is_read=True)
+
+
+def mark_notifications_read(user, notification_ids):
+    notifs = list(Notification.objects.filter(user=user, pk__in=notification_ids).values_list('pk', 'post_id', 'kind'))
+    if not notifs:
+        return 0
+    Notification.objects.filter(pk__in=[pk for pk, _, _ in notifs]).update(is_read=True)
+
+    keys = set()
+    for pk, post_id, kind in notifs:
+        action = GROUPED_KINDS.get(kind) if post_id else None
+        if action:
+            keys.add(group_key(user.id, action, post_id=post_id))
+        else:
+            keys.add(group_key(user.id, 'single', notification_id=pk))
+    return NotificationGroup.objects.filter(user=user, group_key__in=keys).update(is_read=True)
+
+
+def mark_all_read(user):
+    Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    return NotificationGroup.objects.filter(user=user, is_read=False).update(is_read=True)
+
+
+def clear_read(user):
+    Notification.objects.filter(user=user, is_read=True).delete()
+    NotificationGroup.objects.filter(user=user, is_read=True).delete()
@@ -0,0 +1,141 @@
+"""
+Notification kinds backfill
+
+Eski bildirimler mesajı serbest metin olarak ``verb``'de tutuyordu. Bu modül
+bu metinleri Notification.MESSAGE_TEMPLATES'ten üretilen kalıplarla eşleyip
+``kind`` koduna çevirir (metin silinir, gösterimde şablondan üretilir) ve
+dedupe_key'i yeni biçimle yeniden hesaplar. Eşleşmeyen metinler KIND_GENERIC
+olarak kalır. Mevcut satırlar 0033 migration'ında çevrilir;
+``backfill_notification_kinds`` komutu sonradan eklenen eski biçimli satırlar
+için aynı işlemi id sırasıyla batch'ler halinde tekrar çalıştırır.
+"""
+import logging
+import re
+from string import Formatter
+
+from django.db import transaction
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+POST_KINDS = {
+    Notification.KIND_VOTE,
+    Notification.KIND_COMMENT,
+    Notification.KIND_POST_CREATED,
+    Notification.KIND_POST_UPDATED,
+    Notification.KIND_POST_APPROVED,
+    Notification.KIND_POST_REJECTED,
+}
+FEEDBACK_KINDS = {
+    Notification.KIND_FEEDBACK_CREATED,
+    Notification.KIND_FEEDBACK_MESSAGE,
+    Notification.KIND_FEEDBACK_RESOLVED,
+    Notification.KIND_FEEDBACK_REPLIED,
+}
+ACTOR_KINDS = {Notification.KIND_USER_REGISTERED}
+
+# Şablonu değişmiş, hâlâ veritabanında olabilecek eski metinler
+LEGACY_VERBS = {
+    'gönderine yorum yaptı': Notification.KIND_COMMENT,
+}
+
+PLACEHOLDER_PATTERNS = {
+    'post_noun': '(?:anketiniz|gönderiniz)',
+}
+
+
+def _template_pattern(template):
+    parts = []
+    for literal, field, _, _ in Formatter().parse(template):
+        parts.append(re.escape(literal))
+        if field is not None:
+            parts.append(PLACEHOLDER_PATTERNS.get(field, '.*'))
+    return re.compile('^' + ''.join(parts) + '$', re.DOTALL)
+
+
+VERB_PATTERNS = [
+    (kind, _template_pattern(template))
+    for kind, template in Notification.MESSAGE_TEMPLATES.items()
+]
+
+
+def classify(verb, post_id=None, feedback_id=None, actor_id=None):
+    """Kind code for a legacy ``verb`` string, or KIND_GENERIC if it cannot be rendered from a template."""
+    kind = LEGACY_VERBS.get(verb)
+    if kind is None:
+        kind = next((kind for kind, pattern in VERB_PATTERNS if pattern.match(verb)), Notification.KIND_GENERIC)
+
+    # Şablon ilişkili objeden üretilemiyorsa metin korunur
+    if kind in POST_KINDS and not post_id:
+        return Notification.KIND_GENERIC
+    if kind in FEEDBACK_KINDS and not feedback_id:
+        return Notification.KIND_GENERIC
+    if kind in ACTOR_KINDS and not actor_id:
+        return Notification.KIND_GENERIC
+    return kind
+
+
+def _rekey(batch):
+    """Recompute dedupe keys; the newest row keeps a key, older duplicates lose theirs (as in 0030)."""
+    winners = {}
+    for notif in batch:
+        if not notif.dedupe_key:
+            continue
+        notif.dedupe_key = Notification.make_dedupe_key(
+            notif.user_id, notif.actor_id, notif.post_id, notif.feedback_id, notif.kind, notif.verb,
+        )
+        current = winners.get(notif.dedupe_key)
+        if current is None or (notif.created_at, notif.id) > (current.created_at, current.id):
+            winners[notif.dedupe_key] = notif
+
+    stale = []
+    existing = (
+        Notification.objects.filter(dedupe_key__in=list(winners))
+        .exclude(id__in=[notif.id for notif in batch])
+        .values_list('id', 'dedupe_key', 'created_at')
+    )
+    for pk, key, created_at in existing:
+        if (created_at, pk) > (winners[key].created_at, winners[key].id):
+            winners[key] = None
+        else:
+            stale.append(pk)
+
+    for notif in batch:
+        if notif.dedupe_key and winners.get(notif.dedupe_key) is not notif:
+            notif.dedupe_key = None
+    return stale
+
+
+def backfill(batch_size=1000, dry_run=False):
+    """Convert KIND_GENERIC rows to kind codes; returns ``{'classified', 'generic'}`` counts."""
+    rows = Notification.objects.filter(kind=Notification.KIND_GENERIC).only(
+        'id', 'user_id', 'actor_id', 'post_id', 'feedback_id', 'verb', 'dedupe_key', 'created_at',
+    )
+    classified = generic = 0
+    last_id = 0
+    while True:
+        batch = list(rows.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        for notif in batch:
+            kind = classify(notif.verb, notif.post_id, notif.feedback_id, notif.actor_id)
+            if kind == Notification.KIND_GENERIC:
+                generic += 1
+                continue
+            notif.kind = kind
+            notif.verb = ''
+            classified += 1
+        if dry_run:
+            continue
+
+        with transaction.atomic():
+            stale = _rekey(batch)
+            if stale:
+                Notification.objects.filter(id__in=stale).update(dedupe_key=None)
+            Notification.objects.bulk_update(batch, ['kind', 'verb', 'dedupe_key'])
+
+    logger.info('notification kind backfill dry_run=%s classified=%s generic=%s', dry_run, classified, generic)
+    return {'classified': classified, 'generic': generic}
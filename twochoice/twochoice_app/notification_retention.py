@@ -0,0 +1,154 @@
+"""
+Notification retention
+
+Bildirim tablosu sürekli büyür; `compact_notifications` komutu periyodik olarak:
+1. NOTIFICATION_COMPACT_AFTER_DAYS'ten eski, okunmuş oy/yorum bildirimlerini
+   gönderi başına bildirim grubu satırına katlar (aktör sayısı
+   actor_count'tan archived_actor_count'a taşınır, aktör id'leri
+   archived_actor_ids'de tutulur) ve tekil satırları siler,
+2. NOTIFICATION_RETENTION_DAYS'ten eski tüm bildirimleri ve grup satırlarını
+   (isteğe bağlı olarak JSON Lines dosyasına arşivleyerek) siler.
+Silmeler batch_size'lık parçalar halinde yapılır, uzun kilit tutulmaz.
+"""
+from collections import defaultdict
+from datetime import timedelta
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationGroup
+from .notification_groups import ARCHIVED_ACTOR_IDS_LIMIT, GROUPED_KINDS, group_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPACT_AFTER_DAYS = 30
+DEFAULT_RETENTION_DAYS = 180
+NOTIFICATION_LABEL = Notification._meta.label
+ARCHIVE_FIELDS = ('id', 'user_id', 'actor_id', 'post_id', 'comment_id', 'feedback_id', 'kind', 'verb', 'is_read', 'created_at')
+
+
+def compact_after_days():
+    return int(getattr(settings, 'NOTIFICATION_COMPACT_AFTER_DAYS', DEFAULT_COMPACT_AFTER_DAYS))
+
+
+def retention_days():
+    return int(getattr(settings, 'NOTIFICATION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+
+
+def compact_read_notifications(older_than, batch_size=1000, dry_run=False):
+    """Fold old read vote/comment notifications into their group rows; returns rows removed."""
+    candidates = Notification.objects.filter(
+        user__isnull=False,
+        post__isnull=False,
+        is_read=True,
+        created_at__lt=older_than,
+        kind__in=list(GROUPED_KINDS),
+    )
+    if dry_run:
+        return candidates.count()
+
+    removed = 0
+    while True:
+        rows = list(candidates.order_by('id').values_list('id', 'user_id', 'post_id', 'kind', 'actor_id')[:batch_size])
+        if not rows:
+            break
+
+        actors = defaultdict(set)
+        for _, user_id, post_id, kind, actor_id in rows:
+            key = group_key(user_id, GROUPED_KINDS[kind], post_id=post_id)
+            if actor_id:
+                actors[key].add(actor_id)
+
+        row_ids = [row[0] for row in rows]
+        with transaction.atomic():
+            groups = list(NotificationGroup.objects.select_for_update().filter(group_key__in=list(actors)))
+            live = _live_actors(rows, row_ids)
+            for group in groups:
+                # actor_count artımlı tutulduğu için silinen aktörler arşive taşınır, toplam değişmez;
+                # hâlâ canlı satırı olan ya da zaten arşivde olan aktör tekrar sayılmaz
+                archived = list(group.archived_actor_ids)
+                leaving = actors[group.group_key] - live[group.group_key] - set(archived)
+                moved = min(len(leaving), group.actor_count)
+                group.actor_count -= moved
+                group.archived_actor_count += moved
+                group.archived_actor_ids = (archived + sorted(leaving))[:ARCHIVED_ACTOR_IDS_LIMIT]
+            NotificationGroup.objects.bulk_update(groups, ['actor_count', 'archived_actor_count', 'archived_actor_ids'])
+            _, deleted = Notification.objects.filter(id__in=row_ids).delete()
+
+        removed += deleted.get(NOTIFICATION_LABEL, 0)
+    return removed
+
+
+def _live_actors(rows, row_ids):
+    """Actors of the batch's groups that keep another notification row, by group key."""
+    live = defaultdict(set)
+    others = Notification.objects.filter(
+        user_id__in={row[1] for row in rows},
+        post_id__in={row[2] for row in rows},
+        kind__in={row[3] for row in rows},
+        actor_id__in={row[4] for row in rows if row[4]},
+    ).exclude(id__in=row_ids).values_list('user_id', 'post_id', 'kind', 'actor_id')
+    for user_id, post_id, kind, actor_id in others:
+        live[group_key(user_id, GROUPED_KINDS[kind], post_id=post_id)].add(actor_id)
+    return live
+
+
+def _archive(rows, archive):
+    for row in rows:
+        row = dict(row)
+        row['created_at'] = row['created_at'].isoformat()
+        archive.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def purge_expired(older_than, batch_size=1000, dry_run=False, archive=None):
+    """Delete notifications and inbox groups older than ``older_than``.
+
+    ``archive`` is an optional text file; expired notifications are written to
+    it as JSON lines before they are deleted. Returns ``(notifications, groups)``.
+    """
+    expired = Notification.objects.filter(created_at__lt=older_than)
+    expired_groups = NotificationGroup.objects.filter(updated_at__lt=older_than)
+    if dry_run:
+        return expired.count(), expired_groups.count()
+
+    removed = 0
+    while True:
+        rows = list(expired.order_by('id').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            break
+        if archive is not None:
+            _archive(rows, archive)
+        _, deleted = Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        removed += deleted.get(NOTIFICATION_LABEL, 0)
+        # Okunmamış bildirimler de silinmiş olabilir
+        cache.delete_many({f"notifications:unread_count:{row['user_id']}" for row in rows if row['user_id']})
+
+    groups_removed = 0
+    while True:
+        ids = list(expired_groups.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted, _ = NotificationGroup.objects.filter(id__in=ids).delete()
+        groups_removed += deleted
+    return removed, groups_removed
+
+
+def run_retention(compact_days=None, retention=None, batch_size=1000, dry_run=False, archive=None, now=None):
+    """Compaction followed by expiry; returns a report of rows reclaimed."""
+    now = now or timezone.now()
+    compact_days = compact_after_days() if compact_days is None else compact_days
+    retention = retention_days() if retention is None else retention
+
+    compacted = compact_read_notifications(now - timedelta(days=compact_days), batch_size=batch_size, dry_run=dry_run)
+    expired, groups = purge_expired(now - timedelta(days=retention), batch_size=batch_size, dry_run=dry_run, archive=archive)
+    report = {
+        'compacted': compacted,
+        'expired': expired,
+        'groups_expired': groups,
+    }
+    logger.info('notification retention dry_run=%s %s', dry_run, report)
+    return report
@@ -0,0 +1,148 @@
+"""
+Keyset (cursor) pagination
+
+Paginator her sayfada COUNT(*) ve büyüyen bir OFFSET taraması yapar. Burada
+sayfa, bir önceki sayfanın son satırının sıralama anahtarlarından sonrası
+olarak okunur; derin sayfalar da sayfa boyutu kadar maliyetlidir. Cursor
+değerleri anahtarın alan tipine göre çözülür; bozuk ya da elle üretilmiş bir
+cursor ilk sayfaya düşer.
+"""
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+
+from django.db import models
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class CursorPage:
+    """A page of results plus the opaque cursor of the next page (``None`` at the end)."""
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(values):
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_datetime(value):
+    # Sadece tarih alanları metin olarak saklanır
+    if not isinstance(value, str):
+        raise TypeError(value)
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+def _decode_int(value):
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(value)
+    return value
+
+
+def _decode_float(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise TypeError(value)
+    if not math.isfinite(value):
+        raise ValueError(value)
+    return float(value)
+
+
+def _decode_any(value):
+    if isinstance(value, str):
+        return _decode_datetime(value)
+    return _decode_float(value) if isinstance(value, float) else _decode_int(value)
+
+
+def key_types(queryset, keys):
+    """Decoder of each key's cursor value, from the model field or annotation behind it."""
+    decoders = []
+    for key in keys:
+        annotation = queryset.query.annotations.get(key)
+        field = annotation.output_field if annotation is not None else queryset.model._meta.get_field(key)
+        if isinstance(field, models.DateTimeField):
+            decoders.append(_decode_datetime)
+        elif isinstance(field, (models.FloatField, models.DecimalField)):
+            decoders.append(_decode_float)
+        elif isinstance(field, (models.IntegerField, models.AutoField)):
+            decoders.append(_decode_int)
+        else:
+            decoders.append(_decode_any)
+    return decoders
+
+
+def decode_cursor(token, types=None):
+    """Return the key values stored in ``token``, or ``None`` if it is malformed.
+
+    ``types`` (see ``key_types``) decodes each value by its key's field; without
+    it values are only checked to be dates or numbers.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(payload, list):
+        return None
+    if types is not None and len(payload) != len(types):
+        return None
+
+    try:
+        return [
+            (types[i] if types is not None else _decode_any)(value)
+            for i, value in enumerate(payload)
+        ]
+    except (TypeError, ValueError):
+        return None
+
+
+class CursorPaginator:
+    """Paginate ``queryset`` in descending order of ``keys`` (the last key must be unique)."""
+
+    def __init__(self, queryset, keys, per_page):
+        self.queryset = queryset.order_by(*[f'-{key}' for key in keys])
+        self.keys = list(keys)
+        self.types = key_types(queryset, self.keys)
+        self.per_page = per_page
+
+    def _after(self, values):
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            step = Q(**{f'{key}__lt': values[i]})
+            for prev_key, prev_value in zip(self.keys[:i], values[:i]):
+                step &= Q(**{prev_key: prev_value})
+            condition |= step
+        return condition
+
+    def get_page(self, cursor=None):
+        """Return the page after ``cursor``; a missing or invalid cursor yields the first page."""
+        queryset = self.queryset
+        values = decode_cursor(cursor, self.types)
+        if values is not None:
+            queryset = queryset.filter(self._after(values))
+
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = encode_cursor([getattr(rows[-1], key) for key in self.keys])
+        return CursorPage(rows, next_cursor)
@@ -0,0 +1,131 @@
+"""
+Poll tally helpers
+
+PollOption.vote_count ve Post.vote_count alanları oy sayılarının denormalize
+kopyasıdır. Okuma tarafı bu alanları kullanır, yazma tarafı (vote_poll) sayaçları
+F() ifadeleriyle aynı transaction içinde günceller.
+"""
+from collections import defaultdict
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import Post, PollOption, PollVote
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def apply_vote_change(post_id, removed_option_ids, added_option_ids):
+    """Adjust option/post counters after a voter's selection changed.
+
+    Must be called inside the same transaction that deleted/created the votes.
+    """
+    removed = set(removed_option_ids) - set(added_option_ids)
+    added = set(added_option_ids) - set(removed_option_ids)
+
+    if removed:
+        PollOption.objects.filter(pk__in=removed).update(vote_count=Greatest(F('vote_count') - 1, Value(0)))
+    if added:
+        PollOption.objects.filter(pk__in=added).update(vote_count=F('vote_count') + 1)
+
+    delta = len(added) - len(removed)
+    if delta > 0:
+        Post.objects.filter(pk=post_id).update(vote_count=F('vote_count') + delta)
+    elif delta < 0:
+        Post.objects.filter(pk=post_id).update(vote_count=Greatest(F('vote_count') + delta, Value(0)))
+
+
+def _drifted(queryset, counted_subquery):
+    return (
+        queryset.annotate(actual=Coalesce(Subquery(counted_subquery), Value(0)))
+        .exclude(vote_count=F('actual'))
+        .values_list('pk', 'actual')
+    )
+
+
+def recount_votes(post_ids=None, batch_size=500, dry_run=False):
+    """Reconcile vote counters with the PollVote table.
+
+    Only rows whose stored counter differs from the real count are written.
+    Returns a ``(options_fixed, posts_fixed)`` tuple.
+    """
+    option_counts = (
+        PollVote.objects.filter(option=OuterRef('pk'))
+        .order_by()
+        .values('option')
+        .annotate(c=Count('pk'))
+        .values('c')
+    )
+    post_counts = (
+        PollVote.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(c=Count('pk'))
+        .values('c')
+    )
+
+    options = PollOption.objects.all()
+    posts = Post.objects.all()
+    if post_ids is not None:
+        options = options.filter(post_id__in=post_ids)
+        posts = posts.filter(pk__in=post_ids)
+
+    fixed = []
+    for model, qs, subquery in (
+        (PollOption, options, option_counts),
+        (Post, posts, post_counts),
+    ):
+        rows = [model(pk=pk, vote_count=actual) for pk, actual in _drifted(qs, subquery)]
+        if rows and not dry_run:
+            model.objects.bulk_update(rows, ['vote_count'], batch_size=batch_size)
+        fixed.append(len(rows))
+
+    if any(fixed):
+        logger.info('recount_votes fixed options=%s posts=%s dry_run=%s', fixed[0], fixed[1], dry_run)
+    return tuple(fixed)
+
+
+def attach_results(posts, user=None):
+    """Attach poll results to every post of a feed page in a constant number of queries.
+
+    Sets ``home_poll_options``, ``home_poll_total_votes`` and ``home_poll_more_count``
+    (the attributes ``partials/poll_card.html`` expects). Options come from one
+    query over the page, the viewer's selections from one more; counts are read
+    from the denormalized counters, so no per-option COUNT is issued.
+    """
+    posts = list(posts)
+    poll_post_ids = [post.id for post in posts if post.post_type != 'comment_only']
+
+    options_by_post = defaultdict(list)
+    selected_by_post = defaultdict(set)
+    if poll_post_ids:
+        for option in PollOption.objects.filter(post_id__in=poll_post_ids).order_by('id'):
+            options_by_post[option.post_id].append(option)
+
+        if user is not None and getattr(user, 'is_authenticated', False):
+            votes_qs = PollVote.objects.filter(user=user, post_id__in=poll_post_ids).values_list('post_id', 'option_id')
+            for post_id, option_id in votes_qs:
+                selected_by_post[post_id].add(option_id)
+
+    for post in posts:
+        if post.post_type == 'comment_only':
+            post.home_poll_options = []
+            post.home_poll_total_votes = 0
+            post.home_poll_more_count = 0
+            continue
+
+        total_votes = post.vote_count
+        options = options_by_post.get(post.id, [])
+        selected_options = selected_by_post.get(post.id, set())
+        post.home_poll_options = [
+            {
+                'option': option,
+                'vote_count': option.vote_count,
+                'percent': int(round((option.vote_count / total_votes) * 100)) if total_votes > 0 else 0,
+                'is_selected': option.id in selected_options,
+            }
+            for option in options
+        ]
+        post.home_poll_total_votes = total_votes
+        post.home_poll_more_count = max(len(options) - 2, 0)
+
+    return posts
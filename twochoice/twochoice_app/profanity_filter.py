@@ -1,7 +1,10 @@
 """Küfür ve argo filtresi"""
 import re
 
-# Türkçe küfür ve argo kelimeler listesi
+from .text_normalize import turkish_lower
+
+# Türkçe küfür ve argo kelimeler listesi; güncel liste ModerationWord tablosundadır,
+# bu liste yalnızca tablo yokken (migrate öncesi) kullanılır
 PROFANITY_WORDS = [
     'amk', 'amq', 'aq', 'mk', 'mq', 'oç', 'orospu', 'piç', 'sik', 'yarrak',
     'göt', 'am', 'amcık', 'taşak', 'siktir', 'bok', 'kaka', 'pezevenk',
@@ -9,48 +12,93 @@ PROFANITY_WORDS = [
     'mal', 'aptal', 'ahmak', 'dangalak', 'geri zekalı', 'beyinsiz', 'salak',
 ]
 
+# Harfler arasına konabilecek ayraçlar (a.m.k, a m k gibi)
+SEPARATOR = r'[\s\.\-_]*'
+_END = ''
+
+
+class ProfanityMatcher:
+    """All profanity words compiled into one trie-shaped regex.
+
+    Every word also matches its spaced/dotted variant, so a text is scanned
+    once regardless of the list size. Spans refer to the original text since
+    turkish_lower keeps the length.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        self.pattern = re.compile(self._build_pattern(self.words)) if self.words else None
+
+    @classmethod
+    def _build_pattern(cls, words):
+        trie = {}
+        for word in words:
+            node = trie
+            for char in turkish_lower(word):
+                node = node.setdefault(char, {})
+            node[_END] = {}
+        return r'\b(?:' + '|'.join(cls._branches(trie)) + r')\b'
+
+    @classmethod
+    def _branches(cls, node):
+        return [re.escape(char) + cls._tail(child) for char, child in sorted(node.items()) if char != _END]
+
+    @classmethod
+    def _tail(cls, node):
+        branches = cls._branches(node)
+        if not branches:
+            return ''
+        body = SEPARATOR + (branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')')
+        # Kelime burada da bitebiliyorsa devamı opsiyonel (greedy: önce uzun eşleşme denenir)
+        return f'(?:{body})?' if _END in node else body
+
+    def find(self, text):
+        """Return ``(start, end)`` spans of every match in ``text``."""
+        if not text or self.pattern is None:
+            return []
+        return [match.span() for match in self.pattern.finditer(turkish_lower(text))]
+
+    def contains(self, text):
+        if not text or self.pattern is None:
+            return False
+        return self.pattern.search(turkish_lower(text)) is not None
+
+    def mask(self, text):
+        """Replace every match with its first letter followed by asterisks, in one join."""
+        spans = self.find(text)
+        if not spans:
+            return text
+        parts = []
+        last = 0
+        for start, end in spans:
+            parts.append(text[last:start])
+            parts.append(text[start] + '*' * (end - start - 1))
+            last = end
+        parts.append(text[last:])
+        return ''.join(parts)
+
+
+def get_matcher():
+    """Return the compiled matcher of the stored word list (see moderation.py)."""
+    from .moderation import get_pipeline
+    return get_pipeline().profanity
+
+
+def find_profanity(text):
+    """Küfürlü kısımların (start, end) aralıkları"""
+    return get_matcher().find(text)
+
+
 def contains_profanity(text):
     """Metinde küfür var mı kontrol et"""
-    if not text:
-        return False
-    
-    text_lower = text.lower()
-    
-    # Kelime bazlı kontrol
-    for word in PROFANITY_WORDS:
-        # Tam kelime eşleşmesi
-        pattern = r'\b' + re.escape(word) + r'\b'
-        if re.search(pattern, text_lower):
-            return True
-        
-        # Karakterler arası boşluk/nokta ile yazılmış (a.m.k, a m k gibi)
-        spaced_pattern = r'\b' + r'[\s\.\-_]*'.join(re.escape(c) for c in word) + r'\b'
-        if re.search(spaced_pattern, text_lower):
-            return True
-    
-    return False
+    return get_matcher().contains(text)
 
 
 def filter_profanity(text):
     """Küfürlü kelimeleri yıldızla değiştir"""
     if not text:
         return text
-    
-    filtered_text = text
-    text_lower = text.lower()
-    
-    for word in PROFANITY_WORDS:
-        # Tam kelime eşleşmesi
-        pattern = r'\b' + re.escape(word) + r'\b'
-        matches = list(re.finditer(pattern, text_lower))
-        
-        for match in reversed(matches):
-            start, end = match.span()
-            original = filtered_text[start:end]
-            replacement = original[0] + '*' * (len(original) - 1)
-            filtered_text = filtered_text[:start] + replacement + filtered_text[end:]
-    
-    return filtered_text
+    return get_matcher().mask(text)
 
 
 def get_profanity_warning():
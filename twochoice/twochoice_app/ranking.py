@@ -0,0 +1,143 @@
+"""
+Post ranking
+
+PostScore tablosu trend/popüler sıralamasının önceden hesaplanmış halidir.
+Oy ve yorum olayları skoru F() ifadeleriyle artırır; son 24 saat penceresinden
+çıkan etkileşimler ve zamanla azalan skor, periyodik `refresh_scores` komutu ile
+kaynak tablolardan yeniden hesaplanır.
+"""
+from datetime import timedelta
+import logging
+
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .constants import TREND_CUTOFF_HOURS
+from . import feed_cache
+from .models import Comment, PollVote, Post, PostScore
+
+logger = logging.getLogger(__name__)
+
+COMMENT_WEIGHT = 2.0
+LIFETIME_WEIGHT = 0.1
+HOT_GRAVITY = 1.5
+
+
+def _decay(created_at, now):
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    return (age_hours + 2) ** HOT_GRAVITY
+
+
+def hot_score(recent_votes, recent_comments, vote_count, comment_count, created_at, now=None):
+    """Time-decayed score: recent activity dominates, lifetime totals break ties."""
+    now = now or timezone.now()
+    activity = (
+        recent_votes
+        + COMMENT_WEIGHT * recent_comments
+        + LIFETIME_WEIGHT * (vote_count + comment_count)
+    )
+    return activity / _decay(created_at, now)
+
+
+def _bump(post, votes=0, recent_comments=0, comments=0):
+    increment = (
+        votes * (1 + LIFETIME_WEIGHT)
+        + recent_comments * COMMENT_WEIGHT
+        + comments * LIFETIME_WEIGHT
+    ) / _decay(post.created_at, timezone.now())
+
+    updated = PostScore.objects.filter(post_id=post.id).update(
+        hot_score=Greatest(F('hot_score') + increment, Value(0.0)),
+        recent_votes=Greatest(F('recent_votes') + votes, Value(0)),
+        recent_comments=Greatest(F('recent_comments') + recent_comments, Value(0)),
+        comment_count=Greatest(F('comment_count') + comments, Value(0)),
+    )
+    if not updated:
+        # Skor satırı henüz yoksa (ör. yeni yayınlanan gönderi) kaynaktan hesapla
+        refresh_scores(post_ids=[post.id])
+
+
+def record_vote(post, delta):
+    """Apply a net change of ``delta`` votes on ``post`` to its score."""
+    if delta:
+        _bump(post, votes=delta)
+
+
+def record_comment(post, delta=1, created_at=None):
+    """Apply a comment added (``delta=1``) or removed (``delta=-1``) on ``post``."""
+    if not delta:
+        return
+    cutoff = timezone.now() - timedelta(hours=TREND_CUTOFF_HOURS)
+    recent = created_at is None or created_at >= cutoff
+    _bump(post, recent_comments=delta if recent else 0, comments=delta)
+
+
+def _counts_by_post(queryset, post_ids):
+    return dict(
+        queryset.filter(post_id__in=post_ids)
+        .order_by()
+        .values('post')
+        .annotate(c=Count('pk'))
+        .values_list('post', 'c')
+    )
+
+
+def refresh_scores(post_ids=None, batch_size=500, now=None):
+    """Recompute PostScore rows for published posts from the vote/comment tables.
+
+    Works in chunks of ``batch_size`` posts with three grouped queries per chunk.
+    Returns the number of score rows written.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(hours=TREND_CUTOFF_HOURS)
+
+    posts = Post.objects.filter(status='p', is_deleted=False).order_by('id')
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    rows = list(posts.values_list('id', 'created_at', 'vote_count'))
+
+    comments = Comment.objects.filter(is_deleted=False)
+    written = 0
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        chunk_ids = [post_id for post_id, _, _ in chunk]
+
+        recent_votes = _counts_by_post(PollVote.objects.filter(voted_at__gte=cutoff), chunk_ids)
+        recent_comments = _counts_by_post(comments.filter(created_at__gte=cutoff), chunk_ids)
+        comment_counts = _counts_by_post(comments, chunk_ids)
+
+        scores = []
+        for post_id, created_at, vote_count in chunk:
+            score = PostScore(
+                post_id=post_id,
+                recent_votes=recent_votes.get(post_id, 0),
+                recent_comments=recent_comments.get(post_id, 0),
+                comment_count=comment_counts.get(post_id, 0),
+                refreshed_at=now,
+            )
+            score.hot_score = hot_score(
+                score.recent_votes, score.recent_comments, vote_count, score.comment_count, created_at, now
+            )
+            scores.append(score)
+
+        PostScore.objects.bulk_create(
+            scores,
+            update_conflicts=True,
+            unique_fields=['post'],
+            update_fields=['hot_score', 'recent_votes', 'recent_comments', 'comment_count', 'refreshed_at'],
+        )
+        written += len(scores)
+
+    # Yayından kalkan veya silinen gönderilerin skorları sıralamada yer almasın
+    stale = PostScore.objects.exclude(post__status='p', post__is_deleted=False)
+    if post_ids is not None:
+        stale = stale.filter(post_id__in=post_ids)
+    removed, _ = stale.delete()
+
+    if post_ids is None:
+        # Periyodik yenileme sıralamayı değiştirir
+        feed_cache.bump(sorts=('popular', 'trend'))
+    if written or removed:
+        logger.info('refresh_scores written=%s removed=%s', written, removed)
+    return written
@@ -0,0 +1,142 @@
+"""
+Post full-text search
+
+Arama, veritabanına göre seçilen bir backend üzerinden yapılır:
+- SQLite: FTS5 sanal tablosu (twochoice_app_post_fts), bm25 ile sıralama
+- PostgreSQL: to_tsvector ifadesi üzerinde GIN index, ts_rank ile sıralama
+- Diğer / FTS5 yoksa: normalize sütunlarda LIKE araması
+
+Tablolar ve index 0026_post_search_index migration'ı ile oluşturulur. SQLite
+tablosu yayınlanan gönderilerle post_save sinyali üzerinden senkron tutulur;
+Postgres index'i ifade üzerinde olduğu için ayrıca senkronizasyon gerekmez.
+
+Index ve sorgu, Post.normalized_title/normalized_content alanlarındaki Türkçe
+normalize edilmiş metni kullanır (bkz. text_normalize.py); sorgu da aynı
+fonksiyondan geçirilir.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .text_normalize import normalize_text
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'twochoice_app_post_fts'
+POST_TABLE = Post._meta.db_table
+
+# Postgres index ifadesi ile sorgudaki ifade aynı olmalı, yoksa index kullanılmaz
+PG_CONFIG = 'simple'
+PG_DOCUMENT = "to_tsvector('{config}', coalesce({table}normalized_title, '') || ' ' || coalesce({table}normalized_content, ''))"
+
+
+def _pg_document():
+    return PG_DOCUMENT.format(config=PG_CONFIG, table=f'"{POST_TABLE}".')
+
+
+def fts_query(query):
+    """Turn free text into a safe FTS5 MATCH expression (every word, prefix match)."""
+    terms = re.findall(r'\w+', query or '')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+class LikeSearchBackend:
+    name = 'like'
+
+    def filter(self, queryset, query):
+        # Normalize sütunlar zaten küçük harf, büyük/küçük harf duyarsız LIKE gerekmez
+        query = normalize_text(query)
+        return queryset.filter(
+            Q(normalized_title__contains=query) | Q(normalized_content__contains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def index_posts(self, posts):
+        pass
+
+    def remove_posts(self, post_ids):
+        pass
+
+
+class SQLiteFTSBackend(LikeSearchBackend):
+    name = 'sqlite_fts5'
+
+    def filter(self, queryset, query):
+        match = fts_query(normalize_text(query))
+        if not match:
+            return super().filter(queryset.none(), query)
+
+        matches = RawSQL(
+            f'"{POST_TABLE}"."id" IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+            [match],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = "{POST_TABLE}"."id"',
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+    def index_posts(self, posts):
+        rows = [
+            (post.id, post.normalized_title, post.normalized_content)
+            for post in posts
+            if post.status == 'p' and not post.is_deleted
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(post.id,) for post in posts])
+            if rows:
+                cursor.executemany(f'INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (%s, %s, %s)', rows)
+
+    def remove_posts(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(post_id,) for post_id in post_ids])
+
+
+class PostgresSearchBackend(LikeSearchBackend):
+    name = 'postgres'
+
+    def filter(self, queryset, query):
+        query = normalize_text(query)
+        document = _pg_document()
+        matches = RawSQL(
+            f"{document} @@ plainto_tsquery('{PG_CONFIG}', %s)",
+            [query],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({document}, plainto_tsquery('{PG_CONFIG}', %s))",
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        elif connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = LikeSearchBackend()
+        logger.info('search backend: %s', _backend.name)
+    return _backend
+
+
+def search_posts(queryset, query):
+    """Filter ``queryset`` to posts matching ``query``, annotated with ``search_rank``."""
+    return get_backend().filter(queryset, query)
+
+
+def reindex_posts(post_ids):
+    """Sync the index for ``post_ids`` after bulk updates that bypass post_save."""
+    get_backend().index_posts(list(Post.objects.filter(pk__in=post_ids)))
@@ -1,7 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import ModerationWord, PollOption, Post, UserProfile
 
 
 @receiver(post_save, sender=User)
@@ -14,3 +14,53 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+# Arama index'ini ve hashtag bağlantılarını etkileyen alanlar
+POST_INDEXED_FIELDS = {'title', 'content', 'status', 'is_deleted'}
+
+
+@receiver(post_save, sender=Post)
+def sync_post_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not POST_INDEXED_FIELDS & set(update_fields):
+        return
+    from .search_index import get_backend
+    get_backend().index_posts([instance])
+
+
+@receiver(post_save, sender=Post)
+def sync_post_hashtag_links(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not POST_INDEXED_FIELDS & set(update_fields):
+        return
+    from .hashtags import sync_post_hashtags
+    sync_post_hashtags(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_search_index(sender, instance, **kwargs):
+    from .search_index import get_backend
+    get_backend().remove_posts([instance.pk])
+
+
+# Embed, story kartı ve canlı sonuç cache'leri tally sürümüyle anahtarlanır;
+# oyların yanında gönderi ve seçenek değişiklikleri de sürümü ilerletir
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_tally_version(sender, instance, **kwargs):
+    from . import live_results
+    live_results.bump(instance.pk)
+
+
+@receiver(post_save, sender=PollOption)
+@receiver(post_delete, sender=PollOption)
+def bump_option_tally_version(sender, instance, **kwargs):
+    from . import live_results
+    live_results.bump(instance.post_id)
+
+
+@receiver(post_save, sender=ModerationWord)
+@receiver(post_delete, sender=ModerationWord)
+def reload_moderation_words(sender, **kwargs):
+    # Diğer worker'lar sürüm kontrolü ile (MODERATION_RELOAD_INTERVAL) yeniler
+    from .moderation import invalidate
+    invalidate()
@@ -0,0 +1,65 @@
+"""
+Site stats
+
+Landing sayfası ve ana sayfa kenar çubuğundaki genel sayılar (yayındaki
+gönderi, oy, aktif kullanıcı, konu başına gönderi) tek bir cache girdisinde
+snapshot olarak tutulur. Snapshot SITE_STATS_MAX_AGE saniyeden eskiyse kilidi
+alan tek istek yeniden hesaplar, diğerleri eski snapshot'ı döndürür
+(stale-while-revalidate). Zamanlanmış `refresh_site_stats` komutu snapshot'ı
+istek gelmeden tazeler. Konu sayıları tek bir GROUP BY sorgusuyla okunur.
+"""
+import logging
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+
+from .constants import SITE_STATS_MAX_AGE, SITE_STATS_TIMEOUT
+from .models import PollVote, Post
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'site_stats:snapshot'
+LOCK_TIMEOUT = 30
+
+
+def compute():
+    topics = dict(
+        Post.objects.filter(status='p', is_deleted=False)
+        .order_by()
+        .values('topic')
+        .annotate(c=Count('pk'))
+        .values_list('topic', 'c')
+    )
+    return {
+        'at': time.time(),
+        'total_posts': sum(topics.values()),
+        'total_votes': PollVote.objects.count(),
+        'active_users': User.objects.filter(is_active=True).count(),
+        'topics': topics,
+    }
+
+
+def refresh():
+    """Recompute the snapshot and store it; returns the new snapshot."""
+    snap = compute()
+    cache.set(SNAPSHOT_KEY, snap, timeout=SITE_STATS_TIMEOUT)
+    return snap
+
+
+def snapshot():
+    """Site-wide counters, recomputed by at most one request once they are older than SITE_STATS_MAX_AGE."""
+    current = cache.get(SNAPSHOT_KEY)
+    if current is not None:
+        if time.time() - current['at'] < SITE_STATS_MAX_AGE:
+            return current
+        # Yenilemeyi kilidi alan istek yapar; diğerleri beklemeden eski snapshot'ı kullanır
+        if not cache.add(f'{SNAPSHOT_KEY}:lock', 1, timeout=LOCK_TIMEOUT):
+            return current
+    return refresh()
+
+
+def topic_counts(snap):
+    """``{topic: published post count}`` for every topic, including empty ones."""
+    return {topic: snap['topics'].get(topic, 0) for topic, _ in Post.TOPIC_CHOICES}
@@ -1,89 +1,128 @@
 """
 Story formatında paylaşım kartı oluşturma modülü (1080x1920)
 PIL ile dinamik görsel oluşturur
+
+Fontlar ve karta göre değişmeyen katman (arka plan, kart, logo, alt bilgi) süreç
+başına bir kez hazırlanır; seçenek kutuları da (vurgu ve renk başına) hazır RGBA
+katmanlar olarak tutulup kopyalanır. Her kartta sadece başlık, ilerleme
+çubukları ve metinler çizilir.
+render_story_card sadece basit veri alır, böylece süreç havuzunda çalışabilir
+(bkz. story_card_cache.py).
 """
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
 import io
 import textwrap
-from django.conf import settings
-import os
+import zlib
 
 
-def create_story_card(post, user_vote_option_id=None):
-    """
-    Story formatında paylaşım kartı oluşturur (1080x1920)
-    
-    Args:
-        post: Post objesi
-        user_vote_option_id: Kullanıcının seçtiği option ID (highlight için)
-    
-    Returns:
-        BytesIO: PNG görsel
-    """
-    # Canvas boyutları (Instagram Story format)
-    WIDTH = 1080
-    HEIGHT = 1920
-    
-    # Premium Color Palette
-    BG_COLOR = (250, 250, 252)  # Soft white
-    PRIMARY_COLOR = (139, 92, 246)  # Purple
-    SECONDARY_COLOR = (236, 72, 153)  # Pink
-    ACCENT_COLOR = (59, 130, 246)  # Blue
-    TEXT_COLOR = (15, 23, 42)  # Slate-900
-    GRAY_COLOR = (100, 116, 139)  # Slate-500
-    LIGHT_GRAY = (241, 245, 249)  # Slate-100
-    
-    # Canvas oluştur
-    img = Image.new('RGB', (WIDTH, HEIGHT), BG_COLOR)
-    draw = ImageDraw.Draw(img, 'RGBA')
-    
+# Canvas boyutları (Instagram Story format)
+WIDTH = 1080
+HEIGHT = 1920
+
+# Premium Color Palette
+BG_COLOR = (250, 250, 252)  # Soft white
+PRIMARY_COLOR = (139, 92, 246)  # Purple
+SECONDARY_COLOR = (236, 72, 153)  # Pink
+ACCENT_COLOR = (59, 130, 246)  # Blue
+TEXT_COLOR = (15, 23, 42)  # Slate-900
+GRAY_COLOR = (100, 116, 139)  # Slate-500
+LIGHT_GRAY = (241, 245, 249)  # Slate-100
+
+# Yerleşim
+CARD_MARGIN = 60
+CARD_Y_START = 140
+CARD_Y_END = HEIGHT - 140
+TITLE_Y = 280
+DIVIDER_Y = TITLE_Y + 180
+FOOTER_Y = CARD_Y_END - 120
+OPTION_START_Y = DIVIDER_Y + 100
+OPTION_SPACING = 240
+OPTION_X = 120
+OPTION_WIDTH = WIDTH - 240
+OPTION_HEIGHT = 180
+OPTION_RADIUS = 25
+BAR_COLORS = [PRIMARY_COLOR, SECONDARY_COLOR, ACCENT_COLOR]
+
+# PNG kodlama render süresinin çoğunu oluşturur. Kartın büyük kısmı düz renk
+# satırlardan oluştuğu için Z_RLE hızlı seviyede de varsayılan seviyeye yakın
+# boyut verir (bkz. benchmark_story_card)
+PNG_COMPRESS_LEVEL = 1
+PNG_COMPRESS_TYPE = zlib.Z_RLE
+
+
+@lru_cache(maxsize=1)
+def get_fonts():
     # Font yükleme (fallback ile)
     try:
-        title_font = ImageFont.truetype("arial.ttf", 68)
-        option_font = ImageFont.truetype("arial.ttf", 52)
-        percent_font = ImageFont.truetype("arialbd.ttf", 80)
-        small_font = ImageFont.truetype("arial.ttf", 38)
-        logo_font = ImageFont.truetype("arialbd.ttf", 52)
-        tiny_font = ImageFont.truetype("arial.ttf", 32)
-    except:
-        title_font = ImageFont.load_default()
-        option_font = ImageFont.load_default()
-        percent_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
-        logo_font = ImageFont.load_default()
-        tiny_font = ImageFont.load_default()
-    
-    # Premium gradient background (diagonal)
+        return {
+            'title': ImageFont.truetype("arial.ttf", 68),
+            'option': ImageFont.truetype("arial.ttf", 52),
+            'percent': ImageFont.truetype("arialbd.ttf", 80),
+            'small': ImageFont.truetype("arial.ttf", 38),
+            'logo': ImageFont.truetype("arialbd.ttf", 52),
+            'tiny': ImageFont.truetype("arial.ttf", 32),
+        }
+    except OSError:
+        default = ImageFont.load_default()
+        return {name: default for name in ('title', 'option', 'percent', 'small', 'logo', 'tiny')}
+
+
+def _blend(dst, src, alpha):
+    # ImageDraw'ın RGBA mürekkep karışımıyla aynı yuvarlama
+    tmp = dst * (255 - alpha) + src * alpha + 128
+    return ((tmp >> 8) + tmp) >> 8
+
+
+def gradient_background():
+    """Premium gradient background; satır renkleri tek sütunda hesaplanıp genişliğe yayılır.
+
+    Eski çizim her satıra 2 px yüksekliğinde yarı saydam bir dikdörtgen çiziyordu
+    (her satır iki kez karışıyordu); sütun aynı karışımı piksel piksel üretir.
+    """
+    (pr, pg, pb), (sr, sg, sb) = PRIMARY_COLOR, SECONDARY_COLOR
+    strip = bytearray()
+    previous = None
     for y in range(HEIGHT):
         # Purple to Pink gradient
         ratio = y / HEIGHT
-        r = int(PRIMARY_COLOR[0] * (1 - ratio) + SECONDARY_COLOR[0] * ratio)
-        g = int(PRIMARY_COLOR[1] * (1 - ratio) + SECONDARY_COLOR[1] * ratio)
-        b = int(PRIMARY_COLOR[2] * (1 - ratio) + SECONDARY_COLOR[2] * ratio)
-        alpha = int(20 * (1 - abs(ratio - 0.5) * 2))  # Fade in middle
-        draw.rectangle([(0, y), (WIDTH, y + 1)], fill=(r, g, b, alpha))
-    
+        ink = (
+            int(pr * (1 - ratio) + sr * ratio),
+            int(pg * (1 - ratio) + sg * ratio),
+            int(pb * (1 - ratio) + sb * ratio),
+            int(20 * (1 - abs(ratio - 0.5) * 2)),  # Fade in middle
+        )
+        pixel = list(BG_COLOR)
+        for r, g, b, alpha in ((previous, ink) if previous else (ink,)):
+            pixel = [_blend(pixel[0], r, alpha), _blend(pixel[1], g, alpha), _blend(pixel[2], b, alpha)]
+        strip.extend(pixel)
+        previous = ink
+    return Image.frombytes('RGB', (1, HEIGHT), bytes(strip)).resize((WIDTH, HEIGHT), Image.NEAREST)
+
+
+def draw_frame(img):
+    """Kart, gölge, logo, ayraç ve alt bilgi; karta göre değişmez."""
+    fonts = get_fonts()
+    draw = ImageDraw.Draw(img, 'RGBA')
+
     # White content card (rounded)
-    card_margin = 60
-    card_y_start = 140
-    card_y_end = HEIGHT - 140
     draw.rounded_rectangle(
-        [(card_margin, card_y_start), (WIDTH - card_margin, card_y_end)],
+        [(CARD_MARGIN, CARD_Y_START), (WIDTH - CARD_MARGIN, CARD_Y_END)],
         radius=40,
         fill=(255, 255, 255)
     )
-    
+
     # Subtle shadow effect
     shadow_offset = 8
     for i in range(shadow_offset):
         alpha = int(10 * (1 - i / shadow_offset))
         draw.rounded_rectangle(
-            [(card_margin + i, card_y_start + i), (WIDTH - card_margin + i, card_y_end + i)],
+            [(CARD_MARGIN + i, CARD_Y_START + i), (WIDTH - CARD_MARGIN + i, CARD_Y_END + i)],
             radius=40,
             outline=(0, 0, 0, alpha),
             width=2
         )
-    
+
     # Logo badge (top)
     badge_y = 100
     badge_width = 280
@@ -94,114 +133,163 @@ def create_story_card(post, user_vote_option_id=None):
         radius=35,
         fill=PRIMARY_COLOR
     )
-    draw.text((WIDTH // 2, badge_y + 35), "bilemedilema", font=logo_font, fill=(255, 255, 255), anchor="mm")
-    
-    # Başlık (wrapped) - centered in card
-    title_y = 280
-    title_text = post.title[:80]  # Max 80 karakter
-    wrapped_title = textwrap.wrap(title_text, width=22)
-    
-    for i, line in enumerate(wrapped_title[:2]):  # Max 2 satır
-        draw.text((WIDTH // 2, title_y + i * 85), line, font=title_font, fill=TEXT_COLOR, anchor="mm")
-    
+    draw.text((WIDTH // 2, badge_y + 35), "bilemedilema", font=fonts['logo'], fill=(255, 255, 255), anchor="mm")
+
     # Divider line
-    divider_y = title_y + 180
     divider_margin = 180
     draw.line(
-        [(divider_margin, divider_y), (WIDTH - divider_margin, divider_y)],
+        [(divider_margin, DIVIDER_Y), (WIDTH - divider_margin, DIVIDER_Y)],
         fill=LIGHT_GRAY,
         width=3
     )
-    
+
+    # Total votes badge (metni kartta çizilir)
+    badge_width = 300
+    badge_height = 60
+    badge_x = (WIDTH - badge_width) // 2
+    draw.rounded_rectangle(
+        [(badge_x, FOOTER_Y), (badge_x + badge_width, FOOTER_Y + badge_height)],
+        radius=30,
+        fill=LIGHT_GRAY
+    )
+
+    # Bottom branding (outside card)
+    url_y = HEIGHT - 80
+    draw.text((WIDTH // 2, url_y), "bilemedilema.com", font=fonts['logo'], fill=PRIMARY_COLOR, anchor="mm")
+    return img
+
+
+@lru_cache(maxsize=1)
+def get_background():
+    """Karta göre değişmeyen katman; süreç başına bir kez çizilir, kopyası kullanılır."""
+    return draw_frame(gradient_background())
+
+
+@lru_cache(maxsize=None)
+def get_option_layer(highlighted, edge_color=None):
+    """Seçenek kutusu (ve varsa renkli sol kenar) hazır RGBA katman olarak; süreç başına bir kez çizilir.
+
+    Katmandaki pikseller ya tamamen opak ya da tamamen saydamdır, bu yüzden
+    maskeyle yapıştırmak kutuyu tuvale doğrudan çizmekle aynı sonucu verir.
+    """
+    layer = Image.new('RGBA', (OPTION_WIDTH + 1, OPTION_HEIGHT + 1), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer, 'RGBA')
+    draw.rounded_rectangle(
+        [(0, 0), (OPTION_WIDTH, OPTION_HEIGHT)],
+        radius=OPTION_RADIUS,
+        fill=LIGHT_GRAY if highlighted else (255, 255, 255),
+        outline=PRIMARY_COLOR if highlighted else LIGHT_GRAY,
+        width=4 if highlighted else 2
+    )
+    if edge_color:
+        # Colored left edge; ilerleme çubuğu aynı renkte olduğu için üstüne karışması rengi değiştirmez
+        draw.rounded_rectangle(
+            [(0, 0), (12, OPTION_HEIGHT)],
+            radius=OPTION_RADIUS,
+            fill=edge_color
+        )
+    return layer
+
+
+def render_story_card(title, options, total_votes, highlighted_option_id=None):
+    """
+    Story kartını PNG olarak çizer.
+
+    Args:
+        title: Gönderi başlığı
+        options: (option_id, option_text, vote_count) listesi
+        total_votes: Toplam oy
+        highlighted_option_id: Kullanıcının seçtiği option ID (highlight için)
+
+    Returns:
+        bytes: PNG görsel
+    """
+    img = get_background().copy()
+    draw_card(img, title, options, total_votes, highlighted_option_id)
+    return encode(img)
+
+
+def draw_card(img, title, options, total_votes, highlighted_option_id=None):
+    """Başlık, seçenekler ve toplam oy; arka planın üzerine çizilir."""
+    fonts = get_fonts()
+    draw = ImageDraw.Draw(img, 'RGBA')
+
+    # Başlık (wrapped) - centered in card
+    wrapped_title = textwrap.wrap(title[:80], width=22)  # Max 80 karakter
+    for i, line in enumerate(wrapped_title[:2]):  # Max 2 satır
+        draw.text((WIDTH // 2, TITLE_Y + i * 85), line, font=fonts['title'], fill=TEXT_COLOR, anchor="mm")
+
     # Seçenekler ve yüzdeler
-    options = list(post.poll_options.all())
-    total_votes = post.votes.count()
-    
-    option_start_y = divider_y + 100
-    option_spacing = 240
-    
-    for idx, option in enumerate(options[:4]):  # Max 4 seçenek göster
-        y_pos = option_start_y + idx * option_spacing
-        
-        vote_count = option.votes.count()
+    for idx, (option_id, option_text, vote_count) in enumerate(options[:4]):  # Max 4 seçenek göster
+        y_pos = OPTION_START_Y + idx * OPTION_SPACING
         percent = int((vote_count / total_votes) * 100) if total_votes > 0 else 0
-        
+
         # Kullanıcının seçimi mi?
-        is_user_choice = (user_vote_option_id and option.id == user_vote_option_id)
-        
-        # Modern card design for each option
-        card_x = 120
-        card_width = WIDTH - 240
-        card_height = 180
+        is_user_choice = bool(highlighted_option_id and option_id == highlighted_option_id)
+
+        card_x = OPTION_X
+        card_width = OPTION_WIDTH
         card_y = y_pos - 90
-        
-        # Option card background
-        card_color = (255, 255, 255) if not is_user_choice else LIGHT_GRAY
-        draw.rounded_rectangle(
-            [(card_x, card_y), (card_x + card_width, card_y + card_height)],
-            radius=25,
-            fill=card_color,
-            outline=LIGHT_GRAY if not is_user_choice else PRIMARY_COLOR,
-            width=4 if is_user_choice else 2
-        )
-        
+        bar_color = BAR_COLORS[idx % 3] if percent > 0 else None
+
+        # Option card background (hazır katman)
+        layer = get_option_layer(is_user_choice, bar_color)
+        img.paste(layer, (card_x, card_y), layer)
+
         # Progress indicator (left side colored bar)
         if percent > 0:
             progress_width = int(card_width * (percent / 100))
-            gradient_colors = [PRIMARY_COLOR, SECONDARY_COLOR, ACCENT_COLOR]
-            bar_color = gradient_colors[idx % 3]
-            
             draw.rounded_rectangle(
-                [(card_x, card_y), (card_x + progress_width, card_y + card_height)],
-                radius=25,
+                [(card_x, card_y), (card_x + progress_width, card_y + OPTION_HEIGHT)],
+                radius=OPTION_RADIUS,
                 fill=(*bar_color, 40)  # Semi-transparent
             )
-            
-            # Colored left edge
-            draw.rounded_rectangle(
-                [(card_x, card_y), (card_x + 12, card_y + card_height)],
-                radius=25,
-                fill=bar_color
-            )
-        
+
         # Seçenek metni
-        option_text = option.option_text[:28]  # Max 28 karakter
         text_x = card_x + 50
         text_y = y_pos - 20
-        draw.text((text_x, text_y), option_text, font=option_font, fill=TEXT_COLOR, anchor="lm")
-        
+        draw.text((text_x, text_y), option_text[:28], font=fonts['option'], fill=TEXT_COLOR, anchor="lm")  # Max 28 karakter
+
         # Vote count (small)
-        vote_text = f"{vote_count} oy"
-        draw.text((text_x, text_y + 60), vote_text, font=tiny_font, fill=GRAY_COLOR, anchor="lm")
-        
+        draw.text((text_x, text_y + 60), f"{vote_count} oy", font=fonts['tiny'], fill=GRAY_COLOR, anchor="lm")
+
         # Yüzde (büyük, sağda)
-        percent_text = f"{percent}%"
         percent_x = card_x + card_width - 50
-        draw.text((percent_x, y_pos), percent_text, font=percent_font, fill=PRIMARY_COLOR if is_user_choice else GRAY_COLOR, anchor="rm")
-    
-    # Footer section (in card)
-    footer_y = card_y_end - 120
-    
-    # Total votes badge
-    badge_width = 300
-    badge_height = 60
-    badge_x = (WIDTH - badge_width) // 2
-    draw.rounded_rectangle(
-        [(badge_x, footer_y), (badge_x + badge_width, footer_y + badge_height)],
-        radius=30,
-        fill=LIGHT_GRAY
-    )
-    
+        draw.text((percent_x, y_pos), f"{percent}%", font=fonts['percent'], fill=PRIMARY_COLOR if is_user_choice else GRAY_COLOR, anchor="rm")
+
+    # Footer text (in card)
     footer_text = f"📊 {total_votes} kişi oy verdi"
-    draw.text((WIDTH // 2, footer_y + 30), footer_text, font=small_font, fill=GRAY_COLOR, anchor="mm")
-    
-    # Bottom branding (outside card)
-    url_y = HEIGHT - 80
-    draw.text((WIDTH // 2, url_y), "bilemedilema.com", font=logo_font, fill=PRIMARY_COLOR, anchor="mm")
-    
-    # BytesIO'ya kaydet
+    draw.text((WIDTH // 2, FOOTER_Y + 30), footer_text, font=fonts['small'], fill=GRAY_COLOR, anchor="mm")
+    return img
+
+
+def encode(img, compress_level=PNG_COMPRESS_LEVEL, compress_type=PNG_COMPRESS_TYPE):
     output = io.BytesIO()
-    img.save(output, format='PNG', quality=95)
-    output.seek(0)
-    
-    return output
+    img.save(output, format='PNG', compress_level=compress_level, compress_type=compress_type)
+    return output.getvalue()
+
+
+def card_data(post):
+    """Basit veri (süreç havuzuna gönderilebilir); seçenekler tek sorguda okunur."""
+    return {
+        'title': post.title,
+        'options': [
+            (option.id, option.option_text, option.vote_count)
+            for option in post.poll_options.order_by('id')
+        ],
+        'total_votes': post.vote_count,
+    }
+
+
+def create_story_card(post, user_vote_option_id=None):
+    """
+    Story formatında paylaşım kartı oluşturur (1080x1920)
+
+    Args:
+        post: Post objesi
+        user_vote_option_id: Kullanıcının seçtiği option ID (highlight için)
+
+    Returns:
+        BytesIO: PNG görsel
+    """
+    return io.BytesIO(render_story_card(highlighted_option_id=user_vote_option_id, **card_data(post)))
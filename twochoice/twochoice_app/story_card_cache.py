@@ -0,0 +1,141 @@
+"""
+Story card cache
+
+Story kartları (gönderi, tally sürümü, gönderi güncellenme zamanı, vurgulanan
+seçenek) ile anahtarlanıp PNG olarak cache'te tutulur; oy geldiğinde tally
+sürümü (bkz. live_results.py) değiştiği için eski kartlar silinmeden geçersiz
+olur. Render'lar STORY_CARD_RENDER_WORKERS süreçlik havuzda yapılır (0: istek
+içinde). Havuz süreçleri forkserver (yoksa spawn) ile başlatılır; çok thread'li
+uygulama sunucusundan fork edilip kilitli bir mutex devralmazlar. Aynı kart için
+eşzamanlı istekler birleştirilir: süreç içinde tek bir render beklenir, süreçler
+arasında da cache kilidini alamayan istek kısa bir süre diğerinin sonucunu
+bekler. Havuz zamanında cevap vermezse kart istek içinde çizilir.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .constants import STORY_CARD_CACHE_TIMEOUT, STORY_CARD_RENDER_TIMEOUT
+from . import live_results
+from .story_card import card_data, render_story_card
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+LOCK_WAIT_STEP = 0.05
+
+_executor = None
+_executor_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def card_key(post, highlighted_option_id=None):
+    version = live_results.tally_version(post.id)
+    edited = int(post.updated_at.timestamp())
+    return f"story_card:{post.id}:{version}:{edited}:{highlighted_option_id or 0}"
+
+
+def _workers():
+    return int(getattr(settings, 'STORY_CARD_RENDER_WORKERS', DEFAULT_WORKERS))
+
+
+def _mp_context():
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=_workers(), mp_context=_mp_context())
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _render(data, highlighted_option_id):
+    if _workers() <= 0:
+        return render_story_card(highlighted_option_id=highlighted_option_id, **data)
+    try:
+        future = _get_executor().submit(render_story_card, highlighted_option_id=highlighted_option_id, **data)
+        return future.result(timeout=STORY_CARD_RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        # Havuz süreci öldüyse bir sonraki istek için yeniden kurulur
+        logger.exception('story card render pool broken, rendering inline')
+        _reset_executor()
+        return render_story_card(highlighted_option_id=highlighted_option_id, **data)
+    except TimeoutError:
+        # Havuz dolu ya da takılı; isteği 500 ile bitirmek yerine kartı burada çiz
+        logger.warning('story card render timed out in pool, rendering inline')
+        return render_story_card(highlighted_option_id=highlighted_option_id, **data)
+
+
+def _wait_for(key, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_WAIT_STEP)
+        png = cache.get(key)
+        if png is not None:
+            return png
+    return None
+
+
+def coalesce(key, produce):
+    """Run ``produce()`` once for concurrent callers of the same ``key`` in this process."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        try:
+            return future.result(timeout=STORY_CARD_RENDER_TIMEOUT)
+        except TimeoutError:
+            # Sahip istek hâlâ çalışıyor; beklemeyi bırakıp sonucu kendisi üretir
+            logger.warning('coalesced wait timed out key=%s', key)
+            return produce()
+
+    try:
+        result = produce()
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def get_card(post, highlighted_option_id=None, key=None):
+    """PNG bytes of ``post``'s story card, rendered at most once per key."""
+    key = key or card_key(post, highlighted_option_id)
+    png = cache.get(key)
+    if png is not None:
+        return png
+
+    def produce():
+        # Başka bir süreç aynı kartı çiziyorsa onun sonucunu bekle
+        if not cache.add(f"{key}:lock", 1, timeout=STORY_CARD_RENDER_TIMEOUT):
+            png = _wait_for(key, STORY_CARD_RENDER_TIMEOUT)
+            if png is not None:
+                return png
+        png = _render(card_data(post), highlighted_option_id)
+        cache.set(key, png, timeout=STORY_CARD_CACHE_TIMEOUT)
+        return png
+
+    return coalesce(key, produce)
@@ -7,32 +7,28 @@ register = template.Library()
 
 @register.simple_tag
 def poll_total_votes(post):
-    return post.votes.count()
+    return post.vote_count
 
 
 @register.simple_tag
 def poll_option_votes(option):
-    return option.votes.count()
+    return option.vote_count
 
 
 @register.simple_tag
 def poll_percent(option, post):
-    total = post.votes.count()
+    total = post.vote_count
     if total <= 0:
         return 0
-    votes = option.votes.count()
-    return int(round((votes / total) * 100))
+    return int(round((option.vote_count / total) * 100))
 
 
 @register.simple_tag
 def poll_max_percent(post):
-    total = post.votes.count()
+    total = post.vote_count
     if total <= 0:
         return 0
 
-    percents = []
-    for option in post.poll_options.all():
-        votes = option.votes.count()
-        percents.append((votes / total) * 100)
+    percents = [(option.vote_count / total) * 100 for option in post.poll_options.all()]
 
     return int(round(max(percents))) if percents else 0
@@ -0,0 +1,67 @@
+"""
+Türkçe metin normalizasyonu
+
+Python'un str.lower() fonksiyonu Türkçe'ye uygun değildir: 'I' → 'i' (doğrusu 'ı'),
+'İ' → 'i̇' (iki karakter). Arama, küfür filtresi ve hashtag'ler bu modüldeki
+yardımcıları kullanır; gönderilerin normalize edilmiş halleri Post.normalized_title
+ve Post.normalized_content alanlarında saklanır, böylece her istekte yeniden
+hesaplanmaz.
+"""
+from functools import lru_cache
+import re
+import unicodedata
+
+_TURKISH_CASE_MAP = str.maketrans({'I': 'ı', 'İ': 'i'})
+_DIACRITIC_MAP = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+_TOKEN_RE = re.compile(r'\w+')
+
+# Sık kullanılan çekim ekleri (aksansız halleri); uzun olan önce denenir
+SUFFIXES = sorted([
+    'larindan', 'lerinden', 'larinda', 'lerinde', 'larini', 'lerini',
+    'lari', 'leri', 'larin', 'lerin', 'lar', 'ler',
+    'nin', 'nun', 'dan', 'den', 'tan', 'ten',
+    'da', 'de', 'ta', 'te', 'yi', 'yu', 'ya', 'ye',
+], key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+
+def turkish_lower(text):
+    """Turkish-aware lower(); keeps the string length so match spans stay valid."""
+    if not text:
+        return ''
+    return text.translate(_TURKISH_CASE_MAP).lower()
+
+
+def fold_diacritics(text):
+    """Map Turkish letters (and other accents) to their ASCII base letters."""
+    text = text.translate(_DIACRITIC_MAP)
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=8192)
+def stem(token):
+    """Strip up to two common inflection suffixes, keeping at least MIN_STEM_LENGTH characters."""
+    for _ in range(2):
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+
+def tokenize(text, stem_words=False):
+    tokens = _TOKEN_RE.findall(fold_diacritics(turkish_lower(text)))
+    if stem_words:
+        tokens = [stem(token) for token in tokens]
+    return tokens
+
+
+@lru_cache(maxsize=1024)
+def normalize_text(text, stem_words=True):
+    """Case-folded, diacritic-folded (and by default stemmed) tokens joined by single spaces."""
+    return ' '.join(tokenize(text or '', stem_words=stem_words))
@@ -7,6 +7,7 @@ from . import views_api
 from . import views_analytics
 from . import views_embed
 from . import views_story
+from . import views_events
 
 urlpatterns = [
     path('', LandingView.as_view(), name='home'),
@@ -49,6 +50,7 @@ urlpatterns = [
     path('notifications/', views.notifications, name='notifications'),
     path('notifications/unread-count/', views.notifications_unread_count_api, name='notifications_unread_count_api'),
     path('notifications/latest-unread/', views.notifications_latest_unread_api, name='notifications_latest_unread_api'),
+    path('notifications/stream/', views_events.notifications_stream, name='notifications_stream'),
     path('notifications/<int:pk>/read/', views.mark_notification_read, name='mark_notification_read'),
     path('notifications/read-all/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
     path('notifications/clear-read/', views.clear_read_notifications, name='clear_read_notifications'),
@@ -71,12 +73,15 @@ urlpatterns = [
     # API
     path('api/search-users/', views_api.search_users_api, name='search_users_api'),
     path('api/post/<int:pk>/share-data/', views_api.post_share_data_api, name='post_share_data_api'),
+    path('api/posts/share-data/', views_api.posts_share_data_api, name='posts_share_data_api'),
+    path('api/post/<int:pk>/results/', views_api.poll_results_api, name='poll_results_api'),
     
     # Analytics
     path('post/<int:pk>/analytics/', views_analytics.post_analytics, name='post_analytics'),
     
     # Embed
     path('embed/post/<int:pk>/', views_embed.post_embed, name='post_embed'),
+    path('embed/post/<int:pk>/json/', views_embed.post_embed_json, name='post_embed_json'),
     path('post/<int:pk>/embed-code/', views_embed.embed_code_generator, name='embed_code_generator'),
     
     # Story Card
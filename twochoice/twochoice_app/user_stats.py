@@ -0,0 +1,155 @@
+"""
+User stats
+
+UserStats tablosu profil sayfası ve rozetler için kullanıcı başına önceden
+hesaplanmış sayaçlardır. Oy ve yorum olayları sayaçları F() ifadeleriyle
+artırır; gönderi oluşturma, düzenleme, moderasyon ve silme gibi seyrek olaylar
+yazarın satırını kaynak tablolardan yeniden hesaplar. Kaskad silmelerin (ör.
+rapor üzerine silinen gönderinin oyları ve yorumları) bıraktığı sapmalar
+periyodik `refresh_user_stats` komutu ile düzelir.
+"""
+import logging
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Max, Q, Subquery, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Comment, PollVote, Post, UserStats
+
+logger = logging.getLogger(__name__)
+
+# Gece Kuşu rozeti: 00:00-06:00 arasında yayınlanan gönderiler
+NIGHT_HOURS_END = 6
+
+COUNTER_FIELDS = [
+    'posts_created',
+    'posts_published',
+    'night_posts',
+    'votes_cast',
+    'votes_received',
+    'comments_made',
+    'comments_received',
+    'max_post_votes',
+]
+
+
+def _is_published(post):
+    return post.status == 'p' and not post.is_deleted
+
+
+def _bump(user_id, **updates):
+    updated = UserStats.objects.filter(user_id=user_id).update(**updates)
+    if not updated:
+        # Satır henüz yoksa kaynaktan hesapla (yeni kullanıcı ya da backfill öncesi)
+        refresh_user_stats(user_ids=[user_id])
+
+
+def _delta(field, delta):
+    return Greatest(F(field) + delta, Value(0))
+
+
+def record_vote(post, voter_id, delta):
+    """Apply a net change of ``delta`` PollVote rows by ``voter_id`` on ``post``."""
+    if not delta:
+        return
+    _bump(voter_id, votes_cast=_delta('votes_cast', delta))
+    if _is_published(post):
+        _bump(
+            post.author_id,
+            votes_received=_delta('votes_received', delta),
+            # Oy geri alınınca en yüksek değer düşürülmez; periyodik yenileme düzeltir
+            max_post_votes=Greatest(F('max_post_votes'), Subquery(Post.objects.filter(pk=post.pk).values('vote_count')[:1])),
+        )
+
+
+def record_comment(comment, delta=1):
+    """Apply a comment added (``delta=1``) or removed (``delta=-1``) by ``comment.author``."""
+    if not delta:
+        return
+    _bump(comment.author_id, comments_made=_delta('comments_made', delta))
+    if _is_published(comment.post):
+        _bump(comment.post.author_id, comments_received=_delta('comments_received', delta))
+
+
+def record_post(post):
+    """Recompute the author's row after ``post`` was created, edited, moderated or deleted."""
+    refresh_user_stats(user_ids=[post.author_id])
+
+
+def get_user_stats(user):
+    """``user``'s stats row; built from the source tables on first access."""
+    try:
+        return UserStats.objects.get(user=user)
+    except UserStats.DoesNotExist:
+        refresh_user_stats(user_ids=[user.pk])
+        return UserStats.objects.get(user=user)
+
+
+def _grouped(queryset, field, user_ids, **aggregates):
+    rows = (
+        queryset.filter(**{f'{field}__in': user_ids})
+        .order_by()
+        .values(field)
+        .annotate(**aggregates)
+    )
+    return {row[field]: row for row in rows}
+
+
+def refresh_user_stats(user_ids=None, batch_size=500):
+    """Recompute UserStats rows from the post, vote and comment tables.
+
+    Works in chunks of ``batch_size`` users with five grouped queries per chunk.
+    Returns the number of rows written.
+    """
+    now = timezone.now()
+    users = User.objects.order_by('id')
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    ids = list(users.values_list('id', flat=True))
+
+    published_post = Q(post__status='p', post__is_deleted=False)
+    comments = Comment.objects.filter(is_deleted=False)
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+
+        posts = _grouped(
+            Post.objects.filter(is_deleted=False), 'author', chunk,
+            created=Count('pk'),
+            published=Count('pk', filter=Q(status='p')),
+            night=Count('pk', filter=Q(status='p', created_at__hour__lt=NIGHT_HOURS_END)),
+            max_votes=Max('vote_count', filter=Q(status='p')),
+        )
+        votes_cast = _grouped(PollVote.objects.all(), 'user', chunk, c=Count('pk'))
+        votes_received = _grouped(PollVote.objects.filter(published_post), 'post__author', chunk, c=Count('pk'))
+        comments_made = _grouped(comments, 'author', chunk, c=Count('pk'))
+        comments_received = _grouped(comments.filter(published_post), 'post__author', chunk, c=Count('pk'))
+
+        rows = []
+        for user_id in chunk:
+            post_row = posts.get(user_id, {})
+            rows.append(UserStats(
+                user_id=user_id,
+                posts_created=post_row.get('created', 0),
+                posts_published=post_row.get('published', 0),
+                night_posts=post_row.get('night', 0),
+                max_post_votes=post_row.get('max_votes') or 0,
+                votes_cast=votes_cast.get(user_id, {}).get('c', 0),
+                votes_received=votes_received.get(user_id, {}).get('c', 0),
+                comments_made=comments_made.get(user_id, {}).get('c', 0),
+                comments_received=comments_received.get(user_id, {}).get('c', 0),
+                refreshed_at=now,
+            ))
+
+        UserStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=COUNTER_FIELDS + ['refreshed_at'],
+        )
+        written += len(rows)
+
+    if user_ids is None and written:
+        logger.info('refresh_user_stats written=%s', written)
+    return written
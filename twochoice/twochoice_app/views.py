@@ -1,7 +1,8 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.core.paginator import Paginator
-from django.db.models import Count, Q, F, ExpressionWrapper, FloatField, Prefetch
+from django.db.models import Count, Q, F, Value, ExpressionWrapper, FloatField, Prefetch
+from django.db.models.functions import Coalesce
 
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
@@ -9,9 +10,11 @@ from django.contrib.auth.models import User
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
 from django.urls import reverse
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
 from django.db import IntegrityError, transaction
 from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.template.loader import render_to_string
 from django.views.decorators.http import require_POST
 from django.core.cache import cache
 from django.conf import settings
@@ -40,18 +43,31 @@ from .models import (
 from .forms import UserRegistrationForm, SetupAdminForm, PostForm, CommentForm, ReportForm, FeedbackForm, ProfileAvatarForm, UserProfileEditForm, NotificationSettingsForm
 from .avatar import render_avatar_svg_from_config, resolve_profile_avatar_config, sanitize_avatar_config
 from .decorators import rate_limit, login_required_json
+from .pagination import CursorPaginator, decode_cursor
+from .poll_tallies import apply_vote_change, attach_results, recount_votes
+from .ranking import record_comment, record_vote, refresh_scores
+from . import site_stats, user_stats
+from .moderation import analyze_text
+from . import feed_cache, live_results, notification_events, notification_fanout, notification_groups, vote_ingest
 from .constants import (
     POLL_DURATION_24H,
     POLL_DURATION_3D,
     MAX_IMAGE_SIZE_BYTES,
     ALLOWED_IMAGE_CONTENT_TYPES,
     VOTE_RATE_LIMIT_SECONDS,
-    TREND_CUTOFF_HOURS,
     POSTS_PER_PAGE,
+    LIVE_RESULTS_POLL_SECONDS,
 )
 
 logger = logging.getLogger(__name__)
 
+# Akış sıralamaları: hepsi azalan, son anahtar tekil (keyset pagination için)
+FEED_CURSOR_KEYS = {
+    'new': ('created_at', 'id'),
+    'popular': ('vote_count', 'rank_comments', 'created_at', 'id'),
+    'trend': ('rank_hot', 'created_at', 'id'),
+}
+
 
 def csrf_failure(request, reason=''):
     wants_json = (
@@ -230,61 +246,56 @@ def can_send_notification(receiver, category):
     return True
 
 
-def notify_or_bump(*, user, actor=None, verb, post=None, comment=None, feedback=None):
+def notify_or_bump(*, user, actor=None, kind=Notification.KIND_GENERIC, verb='', post=None, comment=None, feedback=None):
     """Idempotent notification creation.
 
     If the same notification already exists, reuse it and bump it to the top.
     This prevents duplicate notifications caused by refresh/double submits.
+    A single INSERT ... ON CONFLICT (dedupe_key) DO UPDATE, so concurrent
+    calls cannot create duplicates either; the inbox group is updated in the
+    same transaction with its row locked.
     """
     if not user:
         return None
 
     try:
-        existing = (
-            Notification.objects.filter(
-                user=user,
-                actor=actor,
-                post=post,
-                feedback=feedback,
-                verb=verb,
-            )
-            .order_by('-created_at')
-            .first()
-        )
-
-        if existing:
-            if comment is not None:
-                existing.comment = comment
-            existing.is_read = False
-            existing.created_at = timezone.now()
-            fields = ['is_read', 'created_at']
-            if comment is not None:
-                fields.append('comment')
-            existing.save(update_fields=fields)
-            _invalidate_notifications_unread_count_cache(user)
-            return existing
-
-        notif = Notification.objects.create(
+        notif = Notification(
             user=user,
             actor=actor,
             post=post,
             comment=comment,
             feedback=feedback,
+            kind=kind,
             verb=verb,
+            is_read=False,
+            dedupe_key=Notification.make_dedupe_key(
+                user.id,
+                getattr(actor, 'id', None),
+                getattr(post, 'id', None),
+                getattr(feedback, 'id', None),
+                kind,
+                verb,
+            ),
         )
-        _invalidate_notifications_unread_count_cache(user)
+        fields = ['is_read', 'created_at']
+        if comment is not None:
+            fields.append('comment')
+        notification_groups.upsert([notif], fields)
+        _invalidate_notifications_unread_count_cache(user, event={'type': 'notification', 'id': notif.pk})
         return notif
     except Exception:
-        logger.exception('notify_or_bump failed user=%s verb=%s', getattr(user, 'id', None), verb)
+        logger.exception('notify_or_bump failed user=%s kind=%s', getattr(user, 'id', None), kind)
         return None
 
 
-def _invalidate_notifications_unread_count_cache(user):
+def _invalidate_notifications_unread_count_cache(user, event=None):
     try:
         user_id = getattr(user, 'id', None)
         if not user_id:
             return
         cache.delete(f'notifications:unread_count:{user_id}')
+        # Açık SSE bağlantıları sayıyı yeniden okusun
+        notification_events.publish(user_id, event or {'type': 'count'})
     except Exception:
         return
 
@@ -308,26 +319,24 @@ class LandingView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Gerçek istatistikler
-        total_posts = Post.objects.filter(status='p', is_deleted=False).count()
-        total_votes = PollVote.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
+        # Gerçek istatistikler (bkz. site_stats.py)
+        stats = site_stats.snapshot()
+        topic_counts = site_stats.topic_counts(stats)
         
         # Kategorilere göre anket sayıları
         categories = []
         for topic_key, topic_label in Post.TOPIC_CHOICES:
-            count = Post.objects.filter(status='p', is_deleted=False, topic=topic_key).count()
             categories.append({
                 'key': topic_key,
                 'label': topic_label,
-                'count': format_count(count)
+                'count': format_count(topic_counts[topic_key])
             })
         
         context['body_class'] = 'landing-page'
         context['theme'] = 'light'
-        context['total_posts'] = format_count(total_posts)
-        context['total_votes'] = format_count(total_votes)
-        context['active_users'] = format_count(active_users)
+        context['total_posts'] = format_count(stats['total_posts'])
+        context['total_votes'] = format_count(stats['total_votes'])
+        context['active_users'] = format_count(stats['active_users'])
         context['categories'] = categories
         return context
 
@@ -342,110 +351,89 @@ def home(request):
     if selected_topic not in valid_topics:
         selected_topic = ''
 
-    # Cache key for performance
-    page_num = request.GET.get('page', 1)
-    cache_key = f"home_posts:{selected_sort}:{selected_topic}:page_{page_num}"
-    cache_timeout = 300  # 5 minutes
-    
-    if selected_sort in {'popular', 'trend'}:
-        cached_post_ids = cache.get(cache_key)
-        if cached_post_ids is not None:
-            posts = Post.objects.filter(id__in=cached_post_ids, status='p', is_deleted=False).select_related('author', 'author__profile').prefetch_related('poll_options__votes', 'votes', 'images', 'comments')
-            posts = sorted(posts, key=lambda p: cached_post_ids.index(p.id))
-        else:
-            posts = (
-                Post.objects.filter(status='p', is_deleted=False)
-                .select_related('author', 'author__profile')
-                .prefetch_related('poll_options__votes', 'votes', 'images', 'comments')
-            )
-            
-            if selected_topic:
-                posts = posts.filter(topic=selected_topic)
-
-            if selected_sort == 'popular':
-                posts = posts.annotate(
-                    vote_count=Count('votes', distinct=True),
-                    comment_count=Count('comments', distinct=True),
-                ).order_by('-vote_count', '-comment_count', '-created_at')
-            elif selected_sort == 'trend':
-                cutoff = timezone.now() - timedelta(hours=TREND_CUTOFF_HOURS)
-                posts = posts.annotate(
-                    trend_vote_count=Count('votes', filter=Q(votes__voted_at__gte=cutoff), distinct=True),
-                    trend_comment_count=Count('comments', filter=Q(comments__created_at__gte=cutoff, comments__is_deleted=False), distinct=True),
-                ).order_by('-trend_vote_count', '-trend_comment_count', '-created_at')
-    else:
+    # ?page=N eski bağlantılar için korunuyor; sonsuz kaydırma ?cursor= kullanır
+    legacy_page = request.GET.get('page')
+    cursor = request.GET.get('cursor') or ''
+    if decode_cursor(cursor) is None:
+        cursor = ''
+
+    # Render edilmiş akış parçası nesil sayacıyla cache'lenir (bkz. feed_cache.py)
+    fragment_key = None
+    fragment = None
+    if legacy_page is None:
+        fragment_key = feed_cache.fragment_key(selected_sort, selected_topic, cursor, request.user.is_authenticated)
+        fragment = feed_cache.get_fragment(fragment_key)
+
+    posts_page = None
+    if fragment is None:
         posts = (
             Post.objects.filter(status='p', is_deleted=False)
-            .select_related('author', 'author__profile')
-            .prefetch_related('poll_options__votes', 'votes', 'images', 'comments')
+            .select_related('author', 'author__profile', 'score')
+            .prefetch_related('images')
         )
-        
+
         if selected_topic:
             posts = posts.filter(topic=selected_topic)
-        
-        posts = posts.order_by('-created_at')
 
-    page = request.GET.get('page', 1)
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    posts_page = paginator.get_page(page)
+        # Sıralama PostScore tablosundan okunur (bkz. ranking.py, refresh_scores)
+        if selected_sort == 'popular':
+            posts = posts.annotate(rank_comments=Coalesce('score__comment_count', Value(0)))
+        elif selected_sort == 'trend':
+            posts = posts.annotate(rank_hot=Coalesce('score__hot_score', Value(0.0)))
+        cursor_keys = FEED_CURSOR_KEYS[selected_sort]
+
+        if legacy_page is not None:
+            paginator = Paginator(posts.order_by(*[f'-{key}' for key in cursor_keys]), POSTS_PER_PAGE)
+            posts_page = paginator.get_page(legacy_page)
+            next_cursor = None
+        else:
+            posts_page = CursorPaginator(posts, cursor_keys, POSTS_PER_PAGE).get_page(cursor)
+            next_cursor = posts_page.next_cursor
 
-    if selected_sort in {'popular', 'trend'} and cached_post_ids is None:
-        post_ids = [p.id for p in posts_page.object_list]
-        cache.set(cache_key, post_ids, timeout=300)
+        # Seçimler parçaya gömülmez; kullanıcıya özel katman aşağıda eklenir
+        attach_results(posts_page.object_list)
 
-    user_votes_by_post = {}
-    if request.user.is_authenticated:
-        votes_qs = PollVote.objects.filter(user=request.user, post__in=posts_page.object_list).values_list('post_id', 'option_id')
-        for post_id, option_id in votes_qs:
-            user_votes_by_post.setdefault(post_id, set()).add(option_id)
+        for post in posts_page.object_list:
+            if getattr(settings, 'FEATURE_POLL_STATUS_BADGE', False):
+                post.poll_status_meta = get_poll_status_meta(post)
+            else:
+                post.poll_status_meta = None
 
-    for post in posts_page.object_list:
-        if post.post_type == 'comment_only':
-            post.home_poll_options = []
-            post.home_poll_total_votes = 0
-            post.home_poll_more_count = 0
-        else:
-            total_votes = post.votes.count()
-            all_options = list(post.poll_options.all())
-            options = all_options
-            results = []
-
-            for option in options:
-                vote_count = option.votes.count()
-                pct = int(round((vote_count / total_votes) * 100)) if total_votes > 0 else 0
-                selected_options = user_votes_by_post.get(post.id, set())
-                results.append({
-                    'option': option,
-                    'vote_count': vote_count,
-                    'percent': pct,
-                    'is_selected': option.id in selected_options,
-                })
-
-            post.home_poll_total_votes = total_votes
-            post.home_poll_options = results
-            post.home_poll_more_count = max(len(all_options) - 2, 0)
+        html = render_to_string(
+            'twochoice_app/partials/post_list.html',
+            {'posts': posts_page, 'selected_sort': selected_sort},
+            request=request,
+        )
+        fragment = {
+            'html': html,
+            'post_ids': [post.id for post in posts_page.object_list],
+            'next_cursor': next_cursor,
+        }
+        if fragment_key is not None:
+            feed_cache.set_fragment(fragment_key, html, fragment['post_ids'], next_cursor)
+
+    selected_option_ids = feed_cache.selected_option_ids(request.user, fragment['post_ids'])
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = HttpResponse(fragment['html'])
+        response['X-Next-Cursor'] = fragment['next_cursor'] or ''
+        response['X-Selected-Options'] = ','.join(str(option_id) for option_id in selected_option_ids)
+        return response
 
-        if getattr(settings, 'FEATURE_POLL_STATUS_BADGE', False):
-            post.poll_status_meta = get_poll_status_meta(post)
-        else:
-            post.poll_status_meta = None
-    
     # Calculate topic counts for trending topics widget
-    topic_counts = {}
-    for topic_code, topic_name in Post.TOPIC_CHOICES:
-        topic_counts[topic_code] = Post.objects.filter(
-            topic=topic_code, 
-            status='p', 
-            is_deleted=False
-        ).count()
+    topic_counts = site_stats.topic_counts(site_stats.snapshot())
     
     # Get trending hashtags
-    from .hashtags import get_trending_hashtags
-    trending_hashtags = get_trending_hashtags(limit=8)
+    from .cache_utils import CACHE_TIMEOUT_SHORT, cache_trending_hashtags
+    trending_hashtags = cache_trending_hashtags(limit=8, timeout=CACHE_TIMEOUT_SHORT)
     
     context = {
+        # Parça cache'ten geldiyse sayfa nesnesi yoktur (None); sayfadaki gönderiler post_ids'tedir
         'posts': posts_page,
-        'is_ajax': request.headers.get('X-Requested-With') == 'XMLHttpRequest',
+        'post_ids': fragment['post_ids'],
+        'feed_html': mark_safe(fragment['html']),
+        'next_cursor': fragment['next_cursor'] or '',
+        'selected_option_ids': selected_option_ids,
         'topics': Post.TOPIC_CHOICES,
         'selected_topic': selected_topic,
         'selected_sort': selected_sort,
@@ -453,9 +441,6 @@ def home(request):
         'trending_hashtags': trending_hashtags,
     }
     
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return render(request, 'twochoice_app/partials/post_list.html', context)
-    
     return render(request, 'twochoice_app/home.html', context)
 
 
@@ -494,14 +479,12 @@ def register(request):
                     profile.save(update_fields=['age', 'email_verified', 'has_seen_welcome_popup'])
                 
                 # Notify admins about new user registration
-                admins = User.objects.filter(is_superuser=True)
-                for admin in admins:
-                    if can_send_notification(admin, 'moderation'):
-                        notify_or_bump(
-                            user=admin,
-                            actor=user,
-                            verb=f'yeni kayıt oldu (Kullanıcı adı: {username})'
-                        )
+                notification_fanout.broadcast(
+                    audience='superusers',
+                    category='moderation',
+                    actor=user,
+                    kind=Notification.KIND_USER_REGISTERED,
+                )
                 
                 # Otomatik giriş yap
                 login(request, user)
@@ -588,11 +571,14 @@ def create_feedback(request):
             feedback.user = request.user
             feedback.save()
 
-            staff_users = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True)).exclude(id=request.user.id)
-            verb = f'"{feedback.subject}" geri bildirimi gönderdi'
-            for staff_user in staff_users:
-                if can_send_notification(staff_user, 'feedback'):
-                    notify_or_bump(user=staff_user, actor=request.user, feedback=feedback, verb=verb)
+            notification_fanout.broadcast(
+                audience='staff',
+                category='feedback',
+                actor=request.user,
+                feedback=feedback,
+                kind=Notification.KIND_FEEDBACK_CREATED,
+                exclude_actor=True,
+            )
 
             messages.success(request, 'Geri bildiriminiz alındı. Teşekkürler!')
             return redirect('home')
@@ -654,11 +640,14 @@ def add_feedback_message(request, pk):
     )
 
     if not is_mod:
-        staff_users = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True)).exclude(id=request.user.id)
-        verb = f'"{feedback.subject}" geri bildiriminize ek mesaj gönderdi'
-        for staff_user in staff_users:
-            if can_send_notification(staff_user, 'feedback'):
-                notify_or_bump(user=staff_user, actor=request.user, feedback=feedback, verb=verb)
+        notification_fanout.broadcast(
+            audience='staff',
+            category='feedback',
+            actor=request.user,
+            feedback=feedback,
+            kind=Notification.KIND_FEEDBACK_MESSAGE,
+            exclude_actor=True,
+        )
 
     messages.success(request, 'Mesajınız gönderildi.')
     return redirect('feedback_detail', pk=pk)
@@ -719,6 +708,7 @@ def create_post(request):
             elif post.poll_close_mode == 'none':
                 post.poll_closes_at = None
             post.save()
+            user_stats.record_post(post)
             
             if post.post_type in ['poll_only', 'both']:
                 options = form.get_poll_options()
@@ -755,15 +745,13 @@ def create_post(request):
                 messages.warning(request, f'{failed_images} görsel yüklenemedi. Gönderi oluşturuldu ancak bazı görseller eklenmedi.')
             
             # Notify moderators and admins about new post
-            moderators = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True))
-            for moderator in moderators:
-                if can_send_notification(moderator, 'moderation'):
-                    notify_or_bump(
-                        user=moderator,
-                        actor=request.user,
-                        post=post,
-                        verb=f'yeni bir anket oluşturdu: "{post.title[:50]}" (Onay bekliyor)'
-                    )
+            notification_fanout.broadcast(
+                audience='staff',
+                category='moderation',
+                actor=request.user,
+                post=post,
+                kind=Notification.KIND_POST_CREATED,
+            )
             
             messages.success(request, 'Gönderiniz oluşturuldu ve moderatör onayı bekliyor.')
             return redirect('post_detail', pk=post.pk)
@@ -798,23 +786,27 @@ def edit_post(request, pk):
             elif post.poll_close_mode == 'none':
                 post.poll_closes_at = None
             post.save()
+            # Gönderi yeniden onaya düştü, konusu da değişmiş olabilir
+            feed_cache.bump()
+            user_stats.record_post(post)
             
             if post.post_type in ['poll_only', 'both']:
                 post.poll_options.all().delete()
                 options = form.get_poll_options()
                 for option_text in options:
                     PollOption.objects.create(post=post, option_text=option_text)
+                # Seçenekler silinince oylar da cascade ile gitti; sayaçları eşitle
+                recount_votes(post_ids=[post.pk])
+                refresh_scores(post_ids=[post.pk])
             
             # Notify moderators and admins about updated post
-            moderators = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True))
-            for moderator in moderators:
-                if can_send_notification(moderator, 'moderation'):
-                    notify_or_bump(
-                        user=moderator,
-                        actor=request.user,
-                        post=post,
-                        verb=f'anketini güncelledi: "{post.title[:50]}" (Tekrar onay bekliyor)'
-                    )
+            notification_fanout.broadcast(
+                audience='staff',
+                category='moderation',
+                actor=request.user,
+                post=post,
+                kind=Notification.KIND_POST_UPDATED,
+            )
             
             messages.success(request, 'Gönderiniz güncellendi ve tekrar moderatör onayına gönderildi.')
             return redirect('post_detail', pk=post.pk)
@@ -850,6 +842,8 @@ def delete_post(request, pk):
     if request.method == 'POST':
         post.is_deleted = True
         post.save(update_fields=['is_deleted'])
+        feed_cache.bump_for_post(post)
+        user_stats.record_post(post)
         logger.info('delete_post user=%s post=%s', request.user.username, post.id)
         messages.success(request, 'Gönderi silindi.')
         return redirect('home')
@@ -860,12 +854,8 @@ def delete_post(request, pk):
 def post_detail(request, pk):
     post = get_object_or_404(
         Post.objects.select_related('author', 'author__profile')
-        .annotate(vote_count=Count('votes', distinct=True))
         .prefetch_related(
-            Prefetch(
-                'poll_options',
-                queryset=PollOption.objects.annotate(vote_count=Count('votes', distinct=True)),
-            ),
+            'poll_options',
             'images',
             Prefetch(
                 'comments',
@@ -892,9 +882,9 @@ def post_detail(request, pk):
     total_votes = 0
     if post.post_type in ['poll_only', 'both']:
         poll_closed = post.is_poll_closed()
-        total_votes = getattr(post, 'vote_count', 0) or 0
+        total_votes = post.vote_count
         for option in post.poll_options.all():
-            vote_count = getattr(option, 'vote_count', 0) or 0
+            vote_count = option.vote_count
             percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
             poll_results.append({
                 'option': option,
@@ -948,6 +938,7 @@ def post_detail(request, pk):
         'poll_share_text': poll_share_text,
         'poll_results_json': json.dumps(poll_results_payload),
         'is_bookmarked': is_bookmarked,
+        'live_results_poll_seconds': LIVE_RESULTS_POLL_SECONDS,
     }
     
     return render(request, 'twochoice_app/post_detail.html', context)
@@ -957,7 +948,8 @@ def post_detail(request, pk):
 @require_POST
 @rate_limit('add_comment', timeout=2, max_requests=1)
 def add_comment(request, pk):
-    from .profanity_filter import contains_profanity, get_profanity_warning
+    from .profanity_filter import get_profanity_warning
+    from .content_filter import auto_moderate_content
     
     post = get_object_or_404(Post, pk=pk)
     
@@ -975,8 +967,9 @@ def add_comment(request, pk):
     
     content = form.cleaned_data.get('content', '')
     
-    # Küfür kontrolü
-    if contains_profanity(content):
+    # Küfür ve spam kontrolü tek geçişte
+    verdict = analyze_text(content)
+    if verdict.has_profanity:
         logger.warning('add_comment profanity detected user=%s post=%s', request.user.id, post.id)
         return JsonResponse({'success': False, 'error': get_profanity_warning()}, status=400)
     
@@ -985,13 +978,17 @@ def add_comment(request, pk):
     comment.author = request.user
 
     comment.save()
+    if verdict.flagged:
+        auto_moderate_content('comment', comment.id, content, request.user, verdict=verdict)
+    record_comment(post)
+    user_stats.record_comment(comment)
+    feed_cache.bump_for_post(post)
     logger.info('add_comment user=%s post=%s comment=%s', request.user.username, post.id, comment.id)
     
     # Bildirim gönder - hata olsa bile yorum kaydedilsin ve success dönelim
     try:
         if post.author != request.user and can_send_notification(post.author, 'comments'):
-            verb = 'anketine yorum yaptı'
-            notify_or_bump(user=post.author, actor=request.user, post=post, comment=comment, verb=verb)
+            notify_or_bump(user=post.author, actor=request.user, post=post, comment=comment, kind=Notification.KIND_COMMENT)
     except Exception as e:
         logger.exception(f'Error sending comment notification: {e}')
     
@@ -1033,21 +1030,36 @@ def vote_poll(request, pk):
     if not post.allow_multiple_choices and len(option_ids) > 1:
         return JsonResponse({'error': 'Sadece bir seçenek seçebilirsiniz.'}, status=400)
     
+    if request.user.is_authenticated and vote_ingest.is_buffered():
+        return _buffer_vote(request, post, option_ids)
+
     # Kayıtlı kullanıcı için DB'ye kaydet
     if request.user.is_authenticated:
-        PollVote.objects.filter(user=request.user, post=post).delete()
-        
-        for option_id in option_ids:
-            option = get_object_or_404(PollOption, pk=option_id, post=post)
-            PollVote.objects.create(user=request.user, option=option, post=post)
+        with transaction.atomic():
+            previous_option_ids = list(
+                PollVote.objects.filter(user=request.user, post=post).values_list('option_id', flat=True)
+            )
+            PollVote.objects.filter(user=request.user, post=post).delete()
+
+            selected_option_ids = []
+            for option_id in dict.fromkeys(option_ids):
+                option = get_object_or_404(PollOption, pk=option_id, post=post)
+                PollVote.objects.create(user=request.user, option=option, post=post)
+                selected_option_ids.append(option.id)
+
+            apply_vote_change(post.id, previous_option_ids, selected_option_ids)
+            vote_delta = len(set(selected_option_ids)) - len(set(previous_option_ids))
+            record_vote(post, vote_delta)
+            user_stats.record_vote(post, request.user.id, vote_delta)
+        feed_cache.bump_for_post(post)
+        live_results.bump(post.id)
 
         logger.info('vote_poll user=%s post=%s options=%s', request.user.username, post.id, option_ids)
 
         # Bildirim gönder - hata olsa bile oy kaydedilsin
         try:
             if post.author != request.user and can_send_notification(post.author, 'votes'):
-                verb = 'anketine oy verdi'
-                notify_or_bump(user=post.author, actor=request.user, post=post, verb=verb)
+                notify_or_bump(user=post.author, actor=request.user, post=post, kind=Notification.KIND_VOTE)
         except Exception as e:
             logger.exception(f'Error sending vote notification: {e}')
     else:
@@ -1058,27 +1070,71 @@ def vote_poll(request, pk):
         request.session.modified = True
         logger.info('vote_poll guest session=%s post=%s options=%s', user_id, post.id, option_ids)
     
-    total_votes = post.votes.count()
-    results = []
-    for option in post.poll_options.all():
-        vote_count = option.votes.count()
-        percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
-        results.append({
-            'option_id': option.id,
-            'vote_count': vote_count,
-            'percentage': percentage
-        })
+    post.refresh_from_db(fields=['vote_count'])
+    counts = {option.id: option.vote_count for option in post.poll_options.all()}
     
     # Kayıtsız kullanıcı için kayıt CTA'sı ekle
     show_register_cta = not request.user.is_authenticated
     
     return JsonResponse({
         'success': True, 
-        'results': results,
+        'results': _vote_results(counts, post.vote_count),
         'show_register_cta': show_register_cta
     })
 
 
+def _vote_results(counts, total_votes):
+    results = []
+    for option_id, vote_count in counts.items():
+        percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
+        results.append({
+            'option_id': option_id,
+            'vote_count': vote_count,
+            'percentage': percentage
+        })
+    return results
+
+
+def _buffer_vote(request, post, option_ids):
+    """Validate a vote, queue it for the write-behind worker and answer with an optimistic tally."""
+    try:
+        selected_option_ids = [int(option_id) for option_id in dict.fromkeys(option_ids)]
+    except (TypeError, ValueError):
+        raise Http404
+
+    counts = {option.id: option.vote_count for option in post.poll_options.all()}
+    if any(option_id not in counts for option_id in selected_option_ids):
+        raise Http404
+
+    previous_option_ids = set(
+        PollVote.objects.filter(user=request.user, post=post).values_list('option_id', flat=True)
+    )
+    vote_ingest.vote_buffer.submit(
+        user_id=request.user.id,
+        post_id=post.id,
+        option_ids=selected_option_ids,
+        notify=post.author_id != request.user.id,
+    )
+    logger.info('vote_poll buffered user=%s post=%s options=%s', request.user.username, post.id, selected_option_ids)
+
+    # Sayaçlar henüz bu oyu içermiyor; kullanıcının kendi değişikliğini üzerine ekle
+    total_votes = post.vote_count
+    for option_id in previous_option_ids - set(selected_option_ids):
+        if option_id in counts:
+            counts[option_id] = max(counts[option_id] - 1, 0)
+            total_votes -= 1
+    for option_id in set(selected_option_ids) - previous_option_ids:
+        counts[option_id] += 1
+        total_votes += 1
+
+    return JsonResponse({
+        'success': True,
+        'results': _vote_results(counts, max(total_votes, 0)),
+        'show_register_cta': False,
+        'queued': True,
+    })
+
+
 
 @login_required
 @rate_limit('create_report', timeout=10, max_requests=1)
@@ -1169,7 +1225,7 @@ def resolve_feedback(request, pk):
             user=feedback.user,
             actor=request.user,
             feedback=feedback,
-            verb=f'"{feedback.subject}" geri bildiriminizi çözüldü olarak işaretledi',
+            kind=Notification.KIND_FEEDBACK_RESOLVED,
         )
 
     messages.success(request, 'Geri bildirim çözüldü olarak işaretlendi.')
@@ -1209,7 +1265,7 @@ def reply_feedback(request, pk):
             user=feedback.user,
             actor=request.user,
             feedback=feedback,
-            verb=f'"{feedback.subject}" geri bildiriminize yanıt verdi',
+            kind=Notification.KIND_FEEDBACK_REPLIED,
         )
 
     messages.success(request, 'Geri bildirim yanıtı kaydedildi.')
@@ -1249,6 +1305,9 @@ def approve_post(request, pk):
     post.moderated_at = timezone.now()
     post.moderation_note = ''
     post.save(update_fields=['status', 'moderated_by', 'moderated_at', 'moderation_note'])
+    refresh_scores(post_ids=[post.pk])
+    user_stats.record_post(post)
+    feed_cache.bump_for_post(post)
 
     create_moderation_log(
         actor=request.user,
@@ -1260,9 +1319,7 @@ def approve_post(request, pk):
     )
 
     if post.author != request.user and can_send_notification(post.author, 'moderation'):
-        base = 'anketiniz onaylandı ve yayınlandı' if post.post_type in {'poll_only', 'both'} else 'gönderiniz onaylandı ve yayınlandı'
-        verb = f'"{post.title}" isimli {base}'
-        notify_or_bump(user=post.author, actor=request.user, post=post, verb=verb)
+        notify_or_bump(user=post.author, actor=request.user, post=post, kind=Notification.KIND_POST_APPROVED)
     
     messages.success(request, f'Gönderi "{post.title}" onaylandı.')
     return redirect('moderate_posts')
@@ -1278,6 +1335,8 @@ def reject_post(request, pk):
     post.moderated_at = timezone.now()
     post.moderation_note = (request.POST.get('moderation_note') or '').strip()
     post.save(update_fields=['status', 'moderated_by', 'moderated_at', 'moderation_note'])
+    user_stats.record_post(post)
+    feed_cache.bump_for_post(post)
 
     create_moderation_log(
         actor=request.user,
@@ -1289,9 +1348,7 @@ def reject_post(request, pk):
     )
 
     if post.author != request.user and can_send_notification(post.author, 'moderation'):
-        base = 'anketiniz reddedildi ve yayınlanmadı' if post.post_type in {'poll_only', 'both'} else 'gönderiniz reddedildi ve yayınlanmadı'
-        verb = f'"{post.title}" isimli {base}'
-        notify_or_bump(user=post.author, actor=request.user, post=post, verb=verb)
+        notify_or_bump(user=post.author, actor=request.user, post=post, kind=Notification.KIND_POST_REJECTED)
     
     messages.success(request, f'Gönderi "{post.title}" reddedildi.')
     return redirect(f"{reverse('moderate_posts')}?tab=rejected")
@@ -1430,9 +1487,15 @@ def handle_report(request, pk):
         
         elif action == 'delete_content':
             if report.reported_post:
-                report.reported_post.delete()
+                reported_post = report.reported_post
+                reported_post.delete()
+                # Oy verenlerin/yorum yapanların sayaçları periyodik refresh_user_stats ile düzelir
+                user_stats.record_post(reported_post)
             elif report.reported_comment:
-                report.reported_comment.delete()
+                reported_comment = report.reported_comment
+                reported_comment.delete()
+                if not reported_comment.is_deleted:
+                    user_stats.record_comment(reported_comment, -1)
             report.status = 'action_taken'
             report.save()
             messages.success(request, 'İçerik silindi.')
@@ -1463,59 +1526,55 @@ def user_profile(request, username):
     profile_user = get_object_or_404(User, username=username)
     UserProfile.objects.get_or_create(user=profile_user, defaults={'age': 13})
     
-    if request.user.is_authenticated and request.user == profile_user:
-        posts = profile_user.posts.all().order_by('-created_at')
+    is_own_profile = request.user.is_authenticated and request.user == profile_user
+    if is_own_profile:
+        posts = profile_user.posts.all()
     else:
-        posts = profile_user.posts.filter(status='p').order_by('-created_at')
-    
-    # Attach home_poll_options to each post, same as home view
-    for post in posts:
-        if post.post_type != 'comment_only':
-            total_votes = post.votes.count()
-            poll_opts = []
-            for opt in post.poll_options.all():
-                vote_count = opt.votes.count()
-                percent = (vote_count / total_votes * 100) if total_votes > 0 else 0
-                is_selected = False
-                if request.user.is_authenticated:
-                    is_selected = opt.votes.filter(user=request.user).exists()
-                poll_opts.append({
-                    'option': opt,
-                    'vote_count': vote_count,
-                    'percent': percent,
-                    'is_selected': is_selected,
-                })
-
-            post.home_poll_options = poll_opts
-            post.home_poll_total_votes = total_votes
-        else:
-            post.home_poll_options = []
-            post.home_poll_total_votes = 0
-            post.home_poll_more_count = 0
+        posts = profile_user.posts.filter(status='p')
+    posts = posts.prefetch_related('images').annotate(
+        comment_total=Count('comments', filter=Q(comments__is_deleted=False)),
+    )
 
+    # Akışla aynı keyset sayfalama; sonraki sayfalar kaydırdıkça parça olarak gelir
+    cursor = request.GET.get('cursor') or ''
+    posts_page = CursorPaginator(posts, FEED_CURSOR_KEYS['new'], POSTS_PER_PAGE).get_page(cursor)
+
+    # Attach home_poll_options to each post, same as home view
+    attach_results(posts_page.object_list, request.user)
+    for post in posts_page.object_list:
         if getattr(settings, 'FEATURE_POLL_STATUS_BADGE', False):
             post.poll_status_meta = get_poll_status_meta(post)
         else:
             post.poll_status_meta = None
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        response = render(request, 'twochoice_app/partials/profile_post_list.html', {
+            'posts': posts_page,
+            'is_own_profile': is_own_profile,
+        })
+        response['X-Next-Cursor'] = posts_page.next_cursor or ''
+        return response
     
-    # Calculate user statistics
-    from django.db.models import Count, Sum
+    # İstatistikler ve rozetler önceden hesaplanmış UserStats satırından (bkz. user_stats.py)
+    user_stats_row = user_stats.get_user_stats(profile_user)
     stats = {
-        'total_posts': profile_user.posts.filter(status='p', is_deleted=False).count(),
-        'total_votes': PollVote.objects.filter(post__author=profile_user, post__status='p', post__is_deleted=False).count(),
-        'total_comments': Comment.objects.filter(post__author=profile_user, post__status='p', post__is_deleted=False, is_deleted=False).count(),
-        'posts_created': profile_user.posts.filter(is_deleted=False).count(),
+        'total_posts': user_stats_row.posts_published,
+        'total_votes': user_stats_row.votes_received,
+        'total_comments': user_stats_row.comments_received,
+        'posts_created': user_stats_row.posts_created,
+        'comments_made': user_stats_row.comments_made,
     }
     
     # Get user badges
     from .badges import get_user_badges, get_badge_progress
-    badges = get_user_badges(profile_user)
-    badge_progress = get_badge_progress(profile_user) if request.user == profile_user else []
+    badges = get_user_badges(profile_user, user_stats_row)
+    badge_progress = get_badge_progress(profile_user, user_stats_row) if request.user == profile_user else []
     
     context = {
         'profile_user': profile_user,
-        'posts': posts,
-        'is_own_profile': request.user.is_authenticated and request.user == profile_user,
+        'posts': posts_page,
+        'next_cursor': posts_page.next_cursor or '',
+        'is_own_profile': is_own_profile,
         'stats': stats,
         'badges': badges,
         'badge_progress': badge_progress,
@@ -1823,79 +1882,55 @@ def moderation_logs(request):
 
 @login_required
 def notifications(request):
-    from collections import defaultdict
-    from django.db.models import Q
-    
-    qs = Notification.objects.filter(user=request.user).select_related('actor', 'post', 'comment', 'feedback').order_by('-created_at')
-    
-    grouped_notifications = []
-    grouped_map = defaultdict(lambda: {'vote': [], 'comment': []})
-    standalone_notifications = []
-    
-    for notif in qs:
-        if notif.post and notif.verb in ['anketine oy verdi', 'gönderine yorum yaptı', 'anketine yorum yaptı']:
-            action_type = 'vote' if notif.verb == 'anketine oy verdi' else 'comment'
-            grouped_map[notif.post.id][action_type].append(notif)
-        else:
-            standalone_notifications.append(notif)
-    
-    for post_id, actions in grouped_map.items():
-        for action_type in ['vote', 'comment']:
-            notifs = actions[action_type]
-            if notifs:
-                seen_actor_ids = set()
-                unique_actors = []
-                for n in notifs:
-                    if not n.actor_id:
-                        continue
-                    if n.actor_id in seen_actor_ids:
-                        continue
-                    seen_actor_ids.add(n.actor_id)
-                    unique_actors.append(n.actor)
-
-                newest_created_at = max((n.created_at for n in notifs), default=notifs[0].created_at)
-                grouped_notifications.append({
-                    'type': 'grouped',
-                    'action': action_type,
-                    'post': notifs[0].post,
-                    'notifications': notifs,
-                    'actors': unique_actors,
-                    'is_read': all(n.is_read for n in notifs),
-                    'created_at': newest_created_at,
-                    'ids': [n.id for n in notifs],
-                    'count': len(notifs),
-                })
-    
-    for notif in standalone_notifications:
-        grouped_notifications.append({
-            'type': 'single',
-            'notification': notif,
-            'is_read': notif.is_read,
-            'created_at': notif.created_at,
-            'ids': [notif.id],
-            'count': 1,
-        })
-    
-    grouped_notifications.sort(key=lambda x: x['created_at'], reverse=True)
-    
-    page = request.GET.get('page', 1)
-    paginator = Paginator(grouped_notifications, 25)
-    notifications_page = paginator.get_page(page)
+    page, groups = notification_groups.inbox_page(request.user, request.GET.get('cursor'))
 
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-    _invalidate_notifications_unread_count_cache(request.user)
+    # Sadece gösterilen satırlar okundu sayılır; sayfa okunmamış haliyle render edilir
+    if notification_groups.mark_groups_read(request.user, groups):
+        _invalidate_notifications_unread_count_cache(request.user)
 
-    return render(request, 'twochoice_app/notifications.html', {'notifications': notifications_page})
+    return render(request, 'twochoice_app/notifications.html', {
+        'notifications': page,
+        'is_first_page': not request.GET.get('cursor'),
+    })
 
 
 @login_required_json
 def notifications_unread_count_api(request):
-    count = cache.get_or_set(
-        f'notifications:unread_count:{request.user.id}',
-        lambda: Notification.objects.filter(user=request.user, is_read=False).count(),
-        10,
-    )
-    return JsonResponse({'count': count})
+    return JsonResponse({'count': notification_groups.unread_count(request.user.id)})
+
+
+def notification_payload(notif):
+    """Dropdown/toast representation of a notification (text with post title, target URL)."""
+    actor = getattr(notif.actor, 'username', None)
+
+    message = notif.message
+
+    # Build rich notification text with post title
+    if notif.kind in (Notification.KIND_VOTE, Notification.KIND_COMMENT) and notif.post:
+        # Format: "user123 'Anket Başlığı' anketine oy verdi"
+        post_title = notif.post.title[:50] + '...' if len(notif.post.title) > 50 else notif.post.title
+        text = f'{actor} "{post_title}" {message}' if actor else f'"{post_title}" {message}'
+    elif actor and notif.kind not in (Notification.KIND_POST_APPROVED, Notification.KIND_POST_REJECTED):
+        # Onay/ret metni gönderinin başlığıyla başlar ("... isimli anketiniz onaylandı"); moderatör adı eklenmez
+        text = f'{actor} {message}'
+    else:
+        text = message
+
+    # Determine URL
+    if notif.feedback_id:
+        url = reverse('feedback_detail', kwargs={'pk': notif.feedback_id})
+    elif notif.post_id:
+        url = reverse('post_detail', kwargs={'pk': notif.post_id})
+    else:
+        url = reverse('notifications')
+
+    return {
+        'id': notif.id,
+        'text': text,
+        'url': url,
+        'created_at': notif.created_at.isoformat(),
+        'is_read': notif.is_read
+    }
 
 
 @login_required_json
@@ -1911,51 +1946,12 @@ def notifications_latest_unread_api(request):
         notifications_list = []
         for notif in notifications:
             try:
-                actor = getattr(notif.actor, 'username', None)
-                
-                # Build rich notification text with post title
-                if notif.post:
-                    post_title = notif.post.title[:50] + '...' if len(notif.post.title) > 50 else notif.post.title
-                    if actor:
-                        # Format: "user123 'Anket Başlığı' anketine oy verdi"
-                        if 'oy verdi' in notif.verb:
-                            text = f'{actor} "{post_title}" anketine oy verdi'
-                        elif 'yorum yaptı' in notif.verb:
-                            text = f'{actor} "{post_title}" anketine yorum yaptı'
-                        else:
-                            text = f'{actor} "{post_title}" {notif.verb}'
-                    else:
-                        text = f'"{post_title}" {notif.verb}'
-                else:
-                    if actor:
-                        text = f'{actor} {notif.verb}'
-                    else:
-                        text = notif.verb
-                
-                # Determine URL
-                if notif.feedback_id:
-                    url = reverse('feedback_detail', kwargs={'pk': notif.feedback_id})
-                elif notif.post_id:
-                    url = reverse('post_detail', kwargs={'pk': notif.post_id})
-                else:
-                    url = reverse('notifications')
-                
-                notifications_list.append({
-                    'id': notif.id,
-                    'text': text,
-                    'url': url,
-                    'created_at': notif.created_at.isoformat(),
-                    'is_read': notif.is_read
-                })
+                notifications_list.append(notification_payload(notif))
             except Exception as e:
                 logger.exception(f'Error processing notification {notif.id}: {e}')
                 continue
         
-        unread_count = cache.get_or_set(
-            f'notifications:unread_count:{request.user.id}',
-            lambda: Notification.objects.filter(user=request.user, is_read=False).count(),
-            10,
-        )
+        unread_count = notification_groups.unread_count(request.user.id)
         
         return JsonResponse({
             'notifications': notifications_list,
@@ -1977,11 +1973,10 @@ def mark_notification_read(request, pk):
         group_ids = request.POST.getlist('group_ids')
         
         if group_ids:
-            Notification.objects.filter(id__in=group_ids, user=request.user).update(is_read=True)
+            notification_groups.mark_notifications_read(request.user, group_ids)
         else:
             notification = get_object_or_404(Notification, pk=pk, user=request.user)
-            notification.is_read = True
-            notification.save(update_fields=['is_read'])
+            notification_groups.mark_notifications_read(request.user, [notification.pk])
 
         _invalidate_notifications_unread_count_cache(request.user)
         
@@ -1996,8 +1991,7 @@ def mark_notification_read(request, pk):
     else:
         # GET request for AJAX
         notification = get_object_or_404(Notification, pk=pk, user=request.user)
-        notification.is_read = True
-        notification.save(update_fields=['is_read'])
+        notification_groups.mark_notifications_read(request.user, [notification.pk])
         _invalidate_notifications_unread_count_cache(request.user)
         return JsonResponse({'success': True})
 
@@ -2005,7 +1999,7 @@ def mark_notification_read(request, pk):
 @login_required
 def mark_all_notifications_read(request):
     """Mark all notifications as read - supports both POST and GET for AJAX"""
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    notification_groups.mark_all_read(request.user)
     _invalidate_notifications_unread_count_cache(request.user)
     
     # AJAX request
@@ -2021,7 +2015,7 @@ def mark_all_notifications_read(request):
 @login_required
 @require_POST
 def clear_read_notifications(request):
-    Notification.objects.filter(user=request.user, is_read=True).delete()
+    notification_groups.clear_read(request.user)
     next_url = request.POST.get('next')
     if next_url:
         return redirect(next_url)
@@ -2104,8 +2098,13 @@ def delete_comment(request, pk):
         return JsonResponse({'error': 'Bu yorumu silme yetkiniz yok.'}, status=403)
     
     # Soft delete
+    was_deleted = comment.is_deleted
     comment.is_deleted = True
     comment.save(update_fields=['is_deleted'])
+    if not was_deleted:
+        record_comment(comment.post, -1, created_at=comment.created_at)
+        user_stats.record_comment(comment, -1)
+        feed_cache.bump_for_post(comment.post)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True, 'message': 'Yorum silindi.'})
@@ -1,11 +1,16 @@
 """
 API views for AJAX requests
 """
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.models import User
 from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+import json
 import logging
 
+from . import live_results
+from .constants import SHARE_DATA_BATCH_LIMIT
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,10 +41,10 @@ def post_share_data_api(request, pk):
         
         # Get poll options with votes
         options = []
-        total_votes = post.votes.count()
+        total_votes = post.vote_count
         
         for option in post.poll_options.all():
-            vote_count = option.votes.count()
+            vote_count = option.vote_count
             percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
             options.append({
                 'text': option.option_text,
@@ -55,3 +60,111 @@ def post_share_data_api(request, pk):
         })
     except Post.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Post not found'}, status=404)
+
+
+def _share_options(options, counts, total_votes):
+    result = []
+    for option_id, option_text in options:
+        vote_count = counts.get(option_id, 0)
+        percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
+        result.append({
+            'id': option_id,
+            'text': option_text,
+            'votes': vote_count,
+            'percentage': round(percentage, 1)
+        })
+    return result
+
+
+def posts_share_data_api(request):
+    """
+    Batch share data for ``?ids=1,2,3`` (up to SHARE_DATA_BATCH_LIMIT posts).
+
+    Posts and options are loaded in two queries regardless of the batch size;
+    tallies come from the live results snapshots where fresh and refresh them
+    otherwise. The JSON array is streamed in request order, unknown or
+    unpublished posts are left out.
+    """
+    from .models import Post, PollOption
+
+    try:
+        ids = list(dict.fromkeys(int(value) for value in request.GET.get('ids', '').split(',') if value.strip()))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid ids'}, status=400)
+    if not ids:
+        return JsonResponse({'success': False, 'error': 'No ids given'}, status=400)
+    if len(ids) > SHARE_DATA_BATCH_LIMIT:
+        return JsonResponse(
+            {'success': False, 'error': f'At most {SHARE_DATA_BATCH_LIMIT} posts per request'}, status=400,
+        )
+
+    # Sürümler satırlardan önce okunur; arada gelen oy bir sonraki sürümde görünür
+    fresh, versions = live_results.cached_snapshots(ids)
+    posts = {
+        post['id']: post
+        for post in Post.objects.filter(pk__in=ids, status='p', is_deleted=False).values('id', 'title', 'post_type')
+    }
+    options = {}
+    counts = {}
+    for option_id, post_id, option_text, vote_count in (
+        PollOption.objects.filter(post_id__in=posts).order_by('id').values_list('id', 'post_id', 'option_text', 'vote_count')
+    ):
+        options.setdefault(post_id, []).append((option_id, option_text))
+        counts.setdefault(post_id, {})[option_id] = vote_count
+
+    stale = {
+        post_id: (True, counts.get(post_id, {}))
+        for post_id, post in posts.items()
+        if post_id not in fresh and post['post_type'] != 'comment_only'
+    }
+    if stale:
+        live_results.prime(stale, versions)
+
+    def stream():
+        yield '['
+        first = True
+        for post_id in ids:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            snap = fresh.get(post_id)
+            tally = snap['counts'] if snap else counts.get(post_id, {})
+            total_votes = sum(tally.values())
+            item = {
+                'id': post_id,
+                'title': post['title'],
+                'options': _share_options(options.get(post_id, []), tally, total_votes),
+                'total_votes': total_votes,
+            }
+            yield ('' if first else ',') + json.dumps(item, ensure_ascii=False)
+            first = False
+        yield ']'
+
+    response = StreamingHttpResponse(stream(), content_type='application/json')
+    patch_cache_control(response, public=True, max_age=int(live_results.tick_seconds()))
+    return response
+
+
+def poll_results_api(request, pk):
+    """Live poll results for post_detail/embed polling (ETag-conditional, optional deltas)."""
+    from .models import Post
+
+    snap = live_results.snapshot(pk)
+    if snap is None:
+        raise Http404
+    if not snap['public']:
+        post = Post.objects.filter(pk=pk, is_deleted=False).first()
+        if post is None or not post.can_view(request.user):
+            raise Http404
+
+    etag = live_results.etag(pk, snap)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(live_results.payload(snap, since=request.GET.get('since')))
+    response['ETag'] = etag
+    if snap['public']:
+        # Aynı tick içindeki tekrarları proxy/CDN de karşılayabilir
+        patch_cache_control(response, public=True, max_age=int(live_results.tick_seconds()))
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
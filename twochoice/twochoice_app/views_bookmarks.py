@@ -8,6 +8,7 @@ from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
 from django.shortcuts import render
 from .models import Post, Bookmark
+from .poll_tallies import attach_results
 import logging
 
 logger = logging.getLogger(__name__)
@@ -55,9 +56,6 @@ def bookmarks_list(request):
         'post',
         'post__author',
         'post__author__profile'
-    ).prefetch_related(
-        'post__poll_options__votes',
-        'post__images'
     )
     
     # Pagination
@@ -66,40 +64,12 @@ def bookmarks_list(request):
     page_obj = paginator.get_page(page_number)
     
     # Prepare posts data
-    posts = []
-    for bookmark in page_obj:
-        post = bookmark.post
-        
-        # Calculate poll data if applicable
-        if post.post_type != 'comment_only':
-            poll_options = []
-            total_votes = 0
-            
-            for option in post.poll_options.all():
-                vote_count = option.votes.count()
-                total_votes += vote_count
-                poll_options.append({
-                    'id': option.id,
-                    'text': option.option_text,
-                    'vote_count': vote_count,
-                })
-            
-            # Calculate percentages
-            for option in poll_options:
-                if total_votes > 0:
-                    option['percentage'] = round((option['vote_count'] / total_votes) * 100, 1)
-                else:
-                    option['percentage'] = 0
-            
-            post.home_poll_options = poll_options
-            post.home_poll_total_votes = total_votes
-        
-        posts.append(post)
+    posts = attach_results([bookmark.post for bookmark in page_obj], request.user)
     
     context = {
         'posts': posts,
         'page_obj': page_obj,
-        'total_bookmarks': bookmarks.count()
+        'total_bookmarks': paginator.count
     }
     
     return render(request, 'twochoice_app/bookmarks.html', context)
@@ -1,41 +1,148 @@
 """
 Embed Views - For embedding polls in external websites
+
+Embed gövdesi (HTML ya da script-tag embed'leri için JSON) gönderinin tally
+sürümüyle (bkz. live_results.py) anahtarlanıp cache'te tutulur. Oylar, gönderi
+ve seçenek değişiklikleri sürümü ilerletir. Zamanlayıcıyla kapanan anketler
+sürümü değiştirmediği için kapanış zamanı da sürüm başına cache'lenir ve
+"kapandı mı" bilgisi anahtara ve ETag'e eklenir. ETag sadece bu ikisinden
+üretildiği için If-None-Match istekleri cache girdisine ya da veritabanına
+bakmadan 304 alır. Yanıtlar `public, max-age` ile paylaşımlı cache'lerde
+(CDN/proxy) tutulabilir; max-age kapanış anını aşmaz.
 """
+import json
+import math
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views.decorators.clickjacking import xframe_options_exempt
+from .constants import EMBED_CACHE_TIMEOUT, EMBED_MAX_AGE, LIVE_RESULTS_POLL_SECONDS
 from .models import Post
+from . import live_results
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@xframe_options_exempt
-def post_embed(request, pk):
-    """Embed view for a post - can be embedded in iframes"""
-    post = get_object_or_404(Post, pk=pk, status='p', is_deleted=False)
-    
+def _poll_options(post):
     # Calculate poll options with votes
-    total_votes = post.votes.count()
+    total_votes = post.vote_count
     poll_options = []
-    
+
     if post.post_type != 'comment_only':
-        for option in post.poll_options.all():
-            vote_count = option.votes.count()
+        for option in post.poll_options.order_by('id'):
+            vote_count = option.vote_count
             percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
             poll_options.append({
                 'option': option,
                 'vote_count': vote_count,
                 'percentage': round(percentage, 1)
             })
-    
+    return poll_options
+
+
+def _render_html(request, post):
     context = {
         'post': post,
-        'poll_options': poll_options,
-        'total_votes': total_votes,
+        'poll_options': _poll_options(post),
+        'total_votes': post.vote_count,
+        'detail_url': request.build_absolute_uri(reverse('post_detail', args=[post.pk])),
         'is_embed': True,
+        'poll_closed': post.is_poll_closed(),
+        'live_results_poll_seconds': LIVE_RESULTS_POLL_SECONDS,
     }
-    
-    return render(request, 'twochoice_app/embed/post_embed.html', context)
+    # request verilmez: context processor'lar kullanıcıya özel veri ekleyip public cache'i kirletmesin
+    return render_to_string('twochoice_app/embed/post_embed.html', context)
+
+
+def _render_json(request, post):
+    return json.dumps({
+        'id': post.pk,
+        'title': post.title,
+        'url': request.build_absolute_uri(reverse('post_detail', args=[post.pk])),
+        'total': post.vote_count,
+        'closed': post.is_poll_closed(),
+        'options': [
+            {
+                'id': item['option'].id,
+                'text': item['option'].option_text,
+                'votes': item['vote_count'],
+                'percentage': item['percentage'],
+            }
+            for item in _poll_options(post)
+        ],
+    }, ensure_ascii=False)
+
+
+def _closes_at(pk, version):
+    """Unix time the poll closes at (``0`` if already closed for good, ``None`` if never), cached per version."""
+    key = f"embed:closes:{pk}:{version}"
+    entry = cache.get(key)
+    if entry is None:
+        post = Post.objects.filter(pk=pk).values('post_type', 'poll_close_mode', 'poll_closes_at').first()
+        closes_at = None
+        if post is not None:
+            if post['post_type'] == 'comment_only':
+                closes_at = 0
+            elif post['poll_close_mode'] != 'none' and post['poll_closes_at'] is not None:
+                closes_at = post['poll_closes_at'].timestamp()
+        entry = {'closes_at': closes_at}
+        cache.set(key, entry, timeout=EMBED_CACHE_TIMEOUT)
+    return entry['closes_at']
+
+
+def _cached_embed(request, pk, variant, content_type, build):
+    version = live_results.tally_version(pk)
+    closes_at = _closes_at(pk, version)
+    now = time.time()
+    closed = closes_at is not None and now >= closes_at
+    state = f"{version}-closed" if closed else str(version)
+    etag = f'"embed-{variant}-{pk}-{state}"'
+
+    response = None
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        # Sadece sürüm okunarak 304; cache girdisi ya da veritabanı gerekmez
+        response = get_conditional_response(request, etag=etag)
+
+    if response is None:
+        # Mutlak linkler host'a bağlı olduğu için anahtarda site kökü de var
+        key = f"embed:{variant}:{pk}:{state}:{request.build_absolute_uri('/')}"
+        entry = cache.get(key)
+        if entry is None:
+            post = get_object_or_404(Post, pk=pk, status='p', is_deleted=False)
+            entry = {'body': build(request, post), 'last_modified': int(time.time())}
+            cache.set(key, entry, timeout=EMBED_CACHE_TIMEOUT)
+        response = get_conditional_response(request, etag=etag, last_modified=entry['last_modified'])
+        if response is None:
+            response = HttpResponse(entry['body'], content_type=content_type)
+        response['Last-Modified'] = http_date(entry['last_modified'])
+
+    response['ETag'] = etag
+    max_age = EMBED_MAX_AGE
+    if closes_at is not None and not closed:
+        # Paylaşımlı cache'ler kapanıştan sonra açık anket gövdesini sunmasın
+        max_age = min(max_age, math.ceil(closes_at - now))
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+@xframe_options_exempt
+def post_embed(request, pk):
+    """Embed view for a post - can be embedded in iframes"""
+    return _cached_embed(request, pk, 'html', 'text/html; charset=utf-8', _render_html)
+
+
+def post_embed_json(request, pk):
+    """Compact JSON variant of the embed for script-tag embeds (served cross-origin)."""
+    response = _cached_embed(request, pk, 'json', 'application/json', _render_json)
+    response['Access-Control-Allow-Origin'] = '*'
+    return response
 
 
 def embed_code_generator(request, pk):
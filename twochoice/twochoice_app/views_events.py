@@ -0,0 +1,68 @@
+"""
+Server-Sent Events
+
+Navbar'daki okunmamış sayısı ve yeni bildirim toast'u polling yerine bu akıştan
+beslenir. Uzun süre açık kalan bağlantılar worker bloklamasın diye uygulama
+ASGI (twochoice/asgi.py) üzerinden servis edilmelidir; bkz.
+NOTIFICATION_STREAM_ENABLED.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .models import Notification
+from . import notification_events
+from .notification_groups import unread_count
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 25
+RETRY_MILLISECONDS = 5000
+
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _notification_data(user_id, notification_id):
+    from .views import notification_payload
+
+    notif = (
+        Notification.objects.filter(user_id=user_id, pk=notification_id)
+        .select_related('actor', 'post', 'feedback')
+        .first()
+    )
+    return notification_payload(notif) if notif else None
+
+
+async def _event_stream(user_id):
+    subscription = await notification_events.subscribe(user_id)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        yield sse_message('unread_count', {'count': await sync_to_async(unread_count)(user_id)})
+        while True:
+            event = await subscription.get(HEARTBEAT_SECONDS)
+            if event is None:
+                # Proxy'ler boşta kalan bağlantıyı kapatmasın
+                yield ": ping\n\n"
+                continue
+            if event.get('type') == 'notification':
+                data = await sync_to_async(_notification_data)(user_id, event.get('id'))
+                if data:
+                    yield sse_message('notification', data)
+            yield sse_message('unread_count', {'count': await sync_to_async(unread_count)(user_id)})
+    finally:
+        await subscription.close()
+
+
+async def notifications_stream(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    response = StreamingHttpResponse(_event_stream(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,14 +1,49 @@
 """
 Search views
 """
+from datetime import timedelta
+from urllib.parse import urlencode
 from django.shortcuts import render
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Q, Count, FloatField, Value
+from django.utils import timezone
 from .models import Post, User
+from .poll_tallies import attach_results
+from .hashtags import filter_by_hashtag
+from .search_index import search_posts
 import logging
 
 logger = logging.getLogger(__name__)
 
+SEARCH_SORTS = {
+    'relevance': ('-search_rank', '-created_at'),
+    'recent': ('-created_at',),
+    'popular': ('-vote_count', '-created_at'),
+}
+
+
+def apply_post_filters(posts, date_filter='all', min_votes='', topic=''):
+    """Apply the advanced search filters (date range, minimum votes, topic)."""
+    now = timezone.now()
+    if date_filter == 'today':
+        posts = posts.filter(created_at__gte=timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0))
+    elif date_filter == 'week':
+        posts = posts.filter(created_at__gte=now - timedelta(days=7))
+    elif date_filter == 'month':
+        posts = posts.filter(created_at__gte=now - timedelta(days=30))
+
+    try:
+        min_votes = int(min_votes)
+    except (TypeError, ValueError):
+        min_votes = 0
+    if min_votes > 0:
+        posts = posts.filter(vote_count__gte=min_votes)
+
+    if topic in {code for code, _ in Post.TOPIC_CHOICES}:
+        posts = posts.filter(topic=topic)
+
+    return posts
+
 
 def search(request):
     """Search posts and users with advanced filters"""
@@ -28,6 +63,14 @@ def search(request):
         'sort_by': sort_by,
         'min_votes': min_votes,
         'topic': topic,
+        'query_params': urlencode({
+            'q': query,
+            'type': search_type,
+            'sort': sort_by,
+            'date': date_filter,
+            'min_votes': min_votes,
+            'topic': topic,
+        }),
     }
     
     if not query:
@@ -42,7 +85,7 @@ def search(request):
         users = User.objects.filter(
             Q(username__icontains=query) | Q(email__icontains=query)
         ).select_related('profile').annotate(
-            post_count=Count('post', filter=Q(post__status='p', post__is_deleted=False))
+            post_count=Count('posts', filter=Q(posts__status='p', posts__is_deleted=False))
         ).order_by('-post_count')[:50]
         
         context['users'] = users
@@ -51,19 +94,18 @@ def search(request):
         logger.info(f"User search: '{query}' - {users.count()} results")
         
     else:
-        # Search posts
-        posts = Post.objects.filter(
-            Q(title__icontains=query) | Q(content__icontains=query),
-            status='p',
-            is_deleted=False
-        ).select_related(
+        # Search posts (full-text index, bkz. search_index.py)
+        posts = Post.objects.filter(status='p', is_deleted=False)
+        if query.startswith('#'):
+            # Hashtag araması PostHashtag tablosu üzerinden
+            posts = filter_by_hashtag(posts, query).annotate(search_rank=Value(0.0, output_field=FloatField()))
+        else:
+            posts = search_posts(posts, query)
+        posts = apply_post_filters(posts, date_filter, min_votes, topic)
+        posts = posts.select_related(
             'author',
             'author__profile'
-        ).prefetch_related(
-            'poll_options__votes',
-            'images',
-            'comments'
-        ).order_by('-created_at')
+        ).order_by(*SEARCH_SORTS.get(sort_by, SEARCH_SORTS['relevance']))
         
         # Pagination
         paginator = Paginator(posts, 20)
@@ -71,32 +113,7 @@ def search(request):
         page_obj = paginator.get_page(page_number)
         
         # Prepare posts data
-        posts_data = []
-        for post in page_obj:
-            # Calculate poll data if applicable
-            if post.post_type != 'comment_only':
-                poll_options = []
-                total_votes = 0
-                
-                for option in post.poll_options.all():
-                    vote_count = option.votes.count()
-                    total_votes += vote_count
-                    poll_options.append({
-                        'option': option,
-                        'vote_count': vote_count,
-                    })
-                
-                # Calculate percentages
-                for option in poll_options:
-                    if total_votes > 0:
-                        option['percent'] = round((option['vote_count'] / total_votes) * 100, 1)
-                    else:
-                        option['percent'] = 0
-                
-                post.home_poll_options = poll_options
-                post.home_poll_total_votes = total_votes
-            
-            posts_data.append(post)
+        posts_data = attach_results(page_obj, request.user)
         
         context['posts'] = posts_data
         context['page_obj'] = page_obj
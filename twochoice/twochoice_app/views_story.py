@@ -3,9 +3,9 @@ Story kartı oluşturma view'ları
 """
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
-from django.contrib.auth.decorators import login_required
+from django.utils.cache import get_conditional_response, patch_cache_control
 from .models import Post, PollVote
-from .story_card import create_story_card
+from . import story_card_cache
 
 
 def generate_story_card(request, pk):
@@ -13,18 +13,24 @@ def generate_story_card(request, pk):
     Story formatında paylaşım kartı oluşturur ve PNG olarak döner
     """
     post = get_object_or_404(Post, pk=pk, status='p', is_deleted=False)
-    
+
     # Kullanıcının oy verdiği seçeneği bul
     user_vote_option_id = None
     if request.user.is_authenticated:
-        user_vote = PollVote.objects.filter(user=request.user, post=post).first()
-        if user_vote:
-            user_vote_option_id = user_vote.option_id
-    
-    # Story kartı oluştur
-    image_bytes = create_story_card(post, user_vote_option_id)
-    
-    # PNG olarak dön
-    response = HttpResponse(image_bytes.getvalue(), content_type='image/png')
-    response['Content-Disposition'] = f'inline; filename="bilemedilema-{post.id}.png"'
+        user_vote_option_id = (
+            PollVote.objects.filter(user=request.user, post=post).values_list('option_id', flat=True).first()
+        )
+
+    # Kart anahtarı render'dan önce bilinir; değişmediyse hiç çizmeden 304 dön
+    key = story_card_cache.card_key(post, user_vote_option_id)
+    etag = f'"{key}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(story_card_cache.get_card(post, user_vote_option_id, key=key), content_type='image/png')
+        response['Content-Disposition'] = f'inline; filename="bilemedilema-{post.id}.png"'
+    response['ETag'] = etag
+    if user_vote_option_id:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
     return response
@@ -0,0 +1,225 @@
+"""
+Write-behind vote ingestion
+
+VOTE_INGESTION_MODE='buffered' olduğunda vote_poll oyu doğrular ve bu modüldeki
+süreç içi tampona ekler; arka plandaki worker tamponu belirli aralıklarla
+bulk_create(ignore_conflicts=True) ile toplu olarak yazar. Aynı kullanıcının aynı
+ankete art arda verdiği oylar tamponda birleşir, sadece son seçim yazılır.
+
+Yazımdan önce seçimler mevcut kullanıcı/gönderi/seçenek satırlarına karşı
+kontrol edilir; bu arada silinmiş satırlara işaret eden seçimler atılır. Yine de
+yazılamayan bir batch en fazla MAX_ATTEMPTS kez denenip loglanarak bırakılır.
+Tampon VOTE_BUFFER_MAX_PENDING seçimle sınırlıdır; doluyken yeni oy istek
+içinde yazılır.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+
+from .models import Notification, Post, PollOption, PollVote
+from .poll_tallies import recount_votes
+from .ranking import refresh_scores
+from .user_stats import refresh_user_stats
+from . import feed_cache, live_results
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_PENDING = 10000
+MAX_ATTEMPTS = 3
+
+
+def is_buffered():
+    return getattr(settings, 'VOTE_INGESTION_MODE', 'sync') == 'buffered'
+
+
+class VoteBuffer:
+    """Thread-safe, per-process buffer of pending vote selections."""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    @property
+    def batch_size(self):
+        return int(getattr(settings, 'VOTE_BUFFER_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+    @property
+    def flush_interval(self):
+        return float(getattr(settings, 'VOTE_BUFFER_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+
+    @property
+    def max_pending(self):
+        return int(getattr(settings, 'VOTE_BUFFER_MAX_PENDING', DEFAULT_MAX_PENDING))
+
+    def submit(self, *, user_id, post_id, option_ids, notify=False):
+        """Queue a voter's full selection for a poll, replacing any pending one."""
+        key = (user_id, post_id)
+        pending = {
+            'option_ids': list(option_ids),
+            'notify': notify,
+            'attempts': 0,
+        }
+        with self._lock:
+            full = key not in self._pending and len(self._pending) >= self.max_pending
+            if not full:
+                self._pending[key] = pending
+            size = len(self._pending)
+
+        if full:
+            # Tampon dolu (worker yetişemiyor ya da yazamıyor): bu oyu istek içinde yaz
+            logger.warning('vote buffer full (%s selections), writing user=%s post=%s inline', size, user_id, post_id)
+            with self._flush_lock:
+                self._write({key: pending})
+            return
+
+        self._ensure_worker()
+        if size >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write every pending selection; returns the number of selections written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            try:
+                return self._write(batch)
+            except Exception:
+                retry = {}
+                for key, value in batch.items():
+                    if value['attempts'] + 1 < MAX_ATTEMPTS:
+                        retry[key] = {**value, 'attempts': value['attempts'] + 1}
+                logger.exception(
+                    'vote buffer flush failed, requeueing %s selections, discarding %s',
+                    len(retry), len(batch) - len(retry),
+                )
+                with self._lock:
+                    # Bu arada gelen yeni seçimler eskisinin yerine geçer
+                    for key, value in retry.items():
+                        self._pending.setdefault(key, value)
+                raise
+
+    def _valid_selections(self, batch):
+        # Tampondayken silinen kullanıcı, gönderi ya da seçeneklere işaret eden seçimleri at
+        user_ids = {user_id for user_id, _ in batch}
+        post_ids = {post_id for _, post_id in batch}
+        option_ids = {option_id for pending in batch.values() for option_id in pending['option_ids']}
+        users = set(User.objects.filter(pk__in=user_ids).values_list('id', flat=True))
+        posts = set(Post.objects.filter(pk__in=post_ids).values_list('id', flat=True))
+        option_posts = dict(PollOption.objects.filter(pk__in=option_ids).values_list('id', 'post_id'))
+
+        valid = {}
+        for (user_id, post_id), pending in batch.items():
+            if user_id not in users or post_id not in posts:
+                continue
+            selected = [option_id for option_id in pending['option_ids'] if option_posts.get(option_id) == post_id]
+            if selected:
+                valid[(user_id, post_id)] = {**pending, 'option_ids': selected}
+        if len(valid) < len(batch):
+            logger.warning('vote buffer dropped %s selections with missing rows', len(batch) - len(valid))
+        return valid
+
+    def _write(self, batch):
+        """Write ``batch`` (selections keyed by (user_id, post_id)); returns the number written."""
+        with transaction.atomic():
+            batch = self._valid_selections(batch)
+            if not batch:
+                return 0
+            user_ids = {user_id for user_id, _ in batch}
+            post_ids = {post_id for _, post_id in batch}
+
+            existing = PollVote.objects.filter(user_id__in=user_ids, post_id__in=post_ids).values_list('id', 'user_id', 'post_id')
+            stale_ids = [vote_id for vote_id, user_id, post_id in existing if (user_id, post_id) in batch]
+            for start in range(0, len(stale_ids), self.batch_size):
+                PollVote.objects.filter(id__in=stale_ids[start:start + self.batch_size]).delete()
+
+            PollVote.objects.bulk_create(
+                [
+                    PollVote(user_id=user_id, post_id=post_id, option_id=option_id)
+                    for (user_id, post_id), pending in batch.items()
+                    for option_id in pending['option_ids']
+                ],
+                batch_size=self.batch_size,
+                ignore_conflicts=True,
+            )
+
+            # Toplu yazımda hangi satırın çakıştığını bilemediğimiz için
+            # etkilenen anketlerin sayaçlarını tek seferde eşitliyoruz.
+            recount_votes(post_ids=post_ids, batch_size=self.batch_size)
+            refresh_scores(post_ids=post_ids, batch_size=self.batch_size)
+            author_ids = set(Post.objects.filter(pk__in=post_ids).values_list('author_id', flat=True))
+            refresh_user_stats(user_ids=user_ids | author_ids, batch_size=self.batch_size)
+
+        for topic in set(Post.objects.filter(pk__in=post_ids).values_list('topic', flat=True)):
+            feed_cache.bump(topic=topic)
+        for post_id in post_ids:
+            live_results.bump(post_id)
+        logger.info('vote buffer flushed selections=%s posts=%s', len(batch), len(post_ids))
+        self._send_notifications(batch, user_ids, post_ids)
+        return len(batch)
+
+    def _send_notifications(self, batch, user_ids, post_ids):
+        from .views import can_send_notification, notify_or_bump
+
+        to_notify = [key for key, pending in batch.items() if pending['notify']]
+        if not to_notify:
+            return
+
+        actors = User.objects.in_bulk(list(user_ids))
+        posts = Post.objects.select_related('author', 'author__profile').in_bulk(list(post_ids))
+        for user_id, post_id in to_notify:
+            actor = actors.get(user_id)
+            post = posts.get(post_id)
+            if not actor or not post or post.author_id == user_id:
+                continue
+            try:
+                if can_send_notification(post.author, 'votes'):
+                    notify_or_bump(user=post.author, actor=actor, post=post, kind=Notification.KIND_VOTE)
+            except Exception:
+                logger.exception('vote buffer notification failed user=%s post=%s', user_id, post_id)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
+            finally:
+                close_old_connections()
+
+
+vote_buffer = VoteBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        vote_buffer.flush()
+    except Exception:
+        logger.exception('vote buffer flush on exit failed')
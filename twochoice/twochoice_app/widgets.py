@@ -1,28 +1,20 @@
 """
 Ana sayfa widget'ları için helper fonksiyonlar
 """
-from django.utils import timezone
-from django.db.models import Count, Q
-from datetime import timedelta
-from .models import Post, Comment
+from django.db.models import F
+from .models import Post
 
 
 def get_daily_trending_polls():
     """
     Bugünün Anketi - Son 24 saatte en çok oy alan anketler
     """
-    yesterday = timezone.now() - timedelta(hours=24)
-    
     return Post.objects.filter(
         status='p',
         is_deleted=False,
         post_type__in=['poll_only', 'both'],
-        created_at__gte=yesterday
-    ).annotate(
-        vote_count=Count('votes')
-    ).filter(
-        vote_count__gt=0
-    ).order_by('-vote_count')[:5]
+        score__recent_votes__gt=0
+    ).order_by('-score__recent_votes', '-vote_count')[:5]
 
 
 def get_most_voted_polls():
@@ -32,10 +24,7 @@ def get_most_voted_polls():
     return Post.objects.filter(
         status='p',
         is_deleted=False,
-        post_type__in=['poll_only', 'both']
-    ).annotate(
-        vote_count=Count('votes')
-    ).filter(
+        post_type__in=['poll_only', 'both'],
         vote_count__gt=10
     ).order_by('-vote_count')[:5]
 
@@ -47,13 +36,11 @@ def get_most_absurd_polls():
     return Post.objects.filter(
         status='p',
         is_deleted=False,
-        post_type__in=['poll_only', 'both']
-    ).annotate(
-        vote_count=Count('votes'),
-        comment_count=Count('comments', filter=Q(comments__is_deleted=False))
-    ).filter(
+        post_type__in=['poll_only', 'both'],
         vote_count__gt=5,
-        comment_count__gt=0
+        score__comment_count__gt=0
+    ).annotate(
+        comment_count=F('score__comment_count')
     ).order_by('-comment_count', '-vote_count')[:5]
 
 
@@ -63,11 +50,10 @@ def get_most_commented_polls():
     """
     return Post.objects.filter(
         status='p',
-        is_deleted=False
+        is_deleted=False,
+        score__comment_count__gt=0
     ).annotate(
-        comment_count=Count('comments', filter=Q(comments__is_deleted=False))
-    ).filter(
-        comment_count__gt=0
+        comment_count=F('score__comment_count')
     ).order_by('-comment_count')[:5]
 
 